@@ -7,6 +7,7 @@ A beautiful web interface for verifying citations in documents using AI.
 import streamlit as st
 import asyncio
 import tempfile
+import threading
 import os
 from pathlib import Path
 import json
@@ -21,10 +22,33 @@ st.set_page_config(
 
 # Import after streamlit config
 from src.citation_verifier.main import verify_document
+from src.citation_verifier.fetcher import SourceFetcher
 from src.reporters.json_report import generate_json_report
 from src.reporters.markdown_report import format_markdown_report
 
 
+@st.cache_resource
+def get_runtime():
+    """Event loop and fetcher shared by every session for the app's lifetime.
+
+    The fetcher's connection pool is bound to one event loop, so verifications
+    run on a dedicated background loop instead of a fresh asyncio.run() each time.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop, SourceFetcher()
+
+
+def run_verification(source: str, use_rag: bool) -> list:
+    """Run verify_document on the shared loop and wait for the result."""
+    loop, fetcher = get_runtime()
+    future = asyncio.run_coroutine_threadsafe(
+        verify_document(source, use_rag=use_rag, fetcher=fetcher),
+        loop
+    )
+    return future.result()
+
+
 def main():
     """Main Streamlit application."""
 
@@ -139,7 +163,7 @@ def verify_and_display(source: str, model: str, use_rag: bool, output_format: st
     with st.spinner("🔄 Processing document and verifying citations..."):
         try:
             # Run verification
-            results = asyncio.run(verify_document(source, use_rag=use_rag))
+            results = run_verification(source, use_rag)
 
             if not results:
                 st.warning("⚠️ No verifiable claims found in the document.")
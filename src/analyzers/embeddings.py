@@ -0,0 +1,52 @@
+"""Process-wide registry of embedding models."""
+import threading
+from typing import Dict
+
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+_models: Dict[str, object] = {}
+_lock = threading.Lock()
+
+
+def get_embedding_model(model_name: str = DEFAULT_MODEL_NAME):
+    """Return the shared sentence-transformers model, loading it on first use.
+
+    Loading is guarded by a lock so concurrent callers wait for a single
+    load instead of each reading the model from disk.
+
+    Args:
+        model_name: Name of the sentence-transformers model
+
+    Returns:
+        The loaded SentenceTransformer instance
+    """
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+
+    with _lock:
+        if model_name not in _models:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise ImportError(
+                    "sentence-transformers not installed. "
+                    "Install with: pip install sentence-transformers"
+                )
+            _models[model_name] = SentenceTransformer(model_name)
+        return _models[model_name]
+
+
+def warm_up(model_name: str = DEFAULT_MODEL_NAME) -> None:
+    """Load the embedding model ahead of the first RAG query."""
+    get_embedding_model(model_name)
+
+
+def warm_up_in_background(model_name: str = DEFAULT_MODEL_NAME) -> threading.Thread:
+    """Start loading the embedding model in a daemon thread.
+
+    Useful at startup so the load overlaps with parsing and claim extraction.
+    """
+    thread = threading.Thread(target=warm_up, args=(model_name,), daemon=True)
+    thread.start()
+    return thread
@@ -1,7 +1,33 @@
 """RAG retriever for finding relevant passages in source documents."""
 from typing import List, Optional
+from collections import OrderedDict
 from dataclasses import dataclass
+import hashlib
 import os
+import threading
+
+from .chunker import TextChunk, chunk_text
+from .embeddings import DEFAULT_MODEL_NAME, get_embedding_model
+
+# Number of source indexes kept in memory, shared by all retrievers
+MAX_CACHED_INDEXES = 32
+
+_index_cache: "OrderedDict[tuple, SourceIndex]" = OrderedDict()
+_index_lock = threading.Lock()
+_build_locks: dict = {}
+
+# Optional persistent store (analyzers.vector_store.EmbeddingStore)
+_embedding_store = None
+
+
+def set_embedding_store(store) -> None:
+    """Use a persistent embedding store for every retriever in this process.
+
+    Args:
+        store: An EmbeddingStore, or None to disable persistence
+    """
+    global _embedding_store
+    _embedding_store = store
 
 
 @dataclass
@@ -12,34 +38,42 @@ class RelevantPassage:
     relevance_score: float
 
 
+@dataclass
+class SourceIndex:
+    """Chunks of one source text together with their embeddings."""
+    content_hash: str
+    chunks: List[TextChunk]
+    embeddings: object  # numpy array, one unit-length row per chunk
+
+
+def content_hash(text: str) -> str:
+    """Stable hash identifying a source text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
 class EmbeddingRetriever:
     """Retrieves relevant passages using embeddings and similarity search."""
     
-    def __init__(self, use_local: bool = True):
+    def __init__(self, use_local: bool = True, model_name: str = DEFAULT_MODEL_NAME):
         """Initialize the retriever.
         
         Args:
             use_local: If True, use local embeddings (sentence-transformers).
                       If False, use OpenAI embeddings (requires API key).
+            model_name: sentence-transformers model, shared process-wide
         """
         self.use_local = use_local
+        self.model_name = model_name
         self._model = None
         self._embeddings = None
         
     def _load_model(self):
-        """Lazy load the embedding model."""
+        """Lazy load the embedding model from the process-wide registry."""
         if self._model is not None:
             return
             
         if self.use_local:
-            try:
-                from sentence_transformers import SentenceTransformer
-                self._model = SentenceTransformer('all-MiniLM-L6-v2')
-            except ImportError:
-                raise ImportError(
-                    "sentence-transformers not installed. "
-                    "Install with: pip install sentence-transformers"
-                )
+            self._model = get_embedding_model(self.model_name)
         else:
             # TODO: Implement OpenAI embeddings
             raise NotImplementedError("OpenAI embeddings not yet implemented")
@@ -49,6 +83,113 @@ class EmbeddingRetriever:
         self._load_model()
         return self._model.encode(texts, convert_to_numpy=True)
     
+    def get_index(self, source_text: str, source_url: Optional[str] = None) -> SourceIndex:
+        """Return the chunk index for a source, building it only once.
+
+        Indexes are cached process-wide by content hash and model, so every
+        claim citing the same source reuses one chunking and encoding pass.
+        When an embedding store is configured and the source URL is known,
+        the index is also read from and written to the store.
+        """
+        key = (self.model_name, content_hash(source_text))
+        with _index_lock:
+            index = _index_cache.get(key)
+            if index is not None:
+                _index_cache.move_to_end(key)
+                return index
+            build_lock = _build_locks.setdefault(key, threading.Lock())
+
+        # Concurrent callers for the same source wait for a single build
+        with build_lock:
+            with _index_lock:
+                index = _index_cache.get(key)
+            if index is not None:
+                return index
+
+            index = self._load_or_build_index(source_text, key[1], source_url)
+
+            with _index_lock:
+                _index_cache[key] = index
+                _build_locks.pop(key, None)
+                while len(_index_cache) > MAX_CACHED_INDEXES:
+                    _index_cache.popitem(last=False)
+        return index
+
+    def _load_or_build_index(
+        self,
+        source_text: str,
+        text_hash: str,
+        source_url: Optional[str]
+    ) -> SourceIndex:
+        """Read the index from the persistent store, or build and store it."""
+        store = _embedding_store if source_url else None
+        if store is not None:
+            try:
+                stored = store.load(source_url, text_hash, self.model_name)
+            except Exception as e:
+                # The store is only a cache: the source is encoded again
+                print(f"Error reading stored embeddings for {source_url}: {e}")
+                stored = None
+            if stored is not None:
+                chunks, embeddings = stored
+                return SourceIndex(content_hash=text_hash, chunks=chunks, embeddings=normalize_rows(embeddings))
+
+        index = self._build_index(source_text, text_hash)
+
+        if store is not None:
+            try:
+                store.save(source_url, text_hash, self.model_name, index.chunks, index.embeddings)
+            except Exception as e:
+                print(f"Error storing embeddings for {source_url}: {e}")
+        return index
+
+    def _build_index(self, source_text: str, text_hash: str) -> SourceIndex:
+        """Chunk and encode a source text."""
+        chunks = chunk_text(source_text, chunk_size=500, overlap=50)
+        embeddings = normalize_rows(self._embed_texts([chunk.text for chunk in chunks]))
+        return SourceIndex(content_hash=text_hash, chunks=chunks, embeddings=embeddings)
+
+    def search(
+        self,
+        index: SourceIndex,
+        queries: List[str],
+        top_k: int = 3,
+        min_score: float = 0.3
+    ) -> List[List[RelevantPassage]]:
+        """Find the most relevant passages of an indexed source for each query.
+
+        All queries are encoded in a single batch.
+
+        Args:
+            index: Index returned by get_index
+            queries: The search queries (e.g., the claims to verify)
+            top_k: Number of top results to return per query
+            min_score: Minimum relevance score (0-1) to include
+
+        Returns:
+            One list of RelevantPassage per query, sorted by relevance
+        """
+        if not queries or not index.chunks:
+            return [[] for _ in queries]
+
+        # One matrix product scores every chunk against every query
+        query_embeddings = normalize_rows(self._embed_texts(queries))
+        scores = query_embeddings @ index.embeddings.T
+        best = top_k_indices(scores, top_k)
+
+        results = []
+        for row, chunk_indices in enumerate(best):
+            results.append([
+                RelevantPassage(
+                    text=index.chunks[i].text,
+                    chunk_id=index.chunks[i].chunk_id,
+                    relevance_score=float(scores[row, i])
+                )
+                for i in chunk_indices
+                if scores[row, i] >= min_score
+            ])
+        return results
+
     def find_relevant_passages(
         self,
         query: str,
@@ -72,34 +213,43 @@ class EmbeddingRetriever:
         
         # Generate embeddings for chunks
         chunk_texts = [chunk.text for chunk in chunks]
-        chunk_embeddings = self._embed_texts(chunk_texts)
-        
-        # Generate embedding for query
-        query_embedding = self._embed_texts([query])[0]
-        
-        # Calculate cosine similarity
-        from numpy import dot
-        from numpy.linalg import norm
-        
-        similarities = []
-        for i, chunk_emb in enumerate(chunk_embeddings):
-            similarity = dot(query_embedding, chunk_emb) / (norm(query_embedding) * norm(chunk_emb))
-            similarities.append((i, float(similarity)))
-        
-        # Sort by similarity
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        
-        # Build result list
-        results = []
-        for chunk_idx, score in similarities[:top_k]:
-            if score >= min_score:
-                results.append(RelevantPassage(
-                    text=chunks[chunk_idx].text,
-                    chunk_id=chunks[chunk_idx].chunk_id,
-                    relevance_score=score
-                ))
-        
-        return results
+        index = SourceIndex(
+            content_hash="",
+            chunks=list(chunks),
+            embeddings=normalize_rows(self._embed_texts(chunk_texts))
+        )
+        return self.search(index, [query], top_k=top_k, min_score=min_score)[0]
+
+
+def normalize_rows(matrix):
+    """Scale each row to unit length so dot products are cosine similarities."""
+    import numpy as np
+
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_indices(scores, k: int):
+    """Column indices of the k highest scores in each row, best first.
+
+    Uses argpartition so only the k selected scores are sorted.
+    """
+    import numpy as np
+
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
 
 
 def get_relevant_context(
@@ -121,23 +271,47 @@ def get_relevant_context(
     Returns:
         Combined relevant passages from the source
     """
-    from .chunker import chunk_text
-    
-    # Chunk the source text
-    chunks = chunk_text(source_text, chunk_size=500, overlap=50)
-    
-    # Find relevant passages
+    return get_relevant_contexts([claim], source_text, max_context_chars, use_local_embeddings)[0]
+
+
+def get_relevant_contexts(
+    claims: List[str],
+    source_text: str,
+    max_context_chars: int = 4000,
+    use_local_embeddings: bool = True,
+    source_url: Optional[str] = None
+) -> List[str]:
+    """Get relevant context from one source text for several claims.
+
+    The source is chunked and encoded once (see EmbeddingRetriever.get_index)
+    and the claims are encoded together in one batch.
+
+    Args:
+        claims: The claims citing this source
+        source_text: The full source text
+        max_context_chars: Maximum characters to return per claim
+        use_local_embeddings: Whether to use local embeddings
+        source_url: URL of the source, used as key in the embedding store
+
+    Returns:
+        Combined relevant passages for each claim, in the same order
+    """
     retriever = EmbeddingRetriever(use_local=use_local_embeddings)
-    passages = retriever.find_relevant_passages(claim, chunks, top_k=5)
-    
-    # Combine passages up to max_context_chars
-    combined_text = []
-    total_chars = 0
-    
-    for passage in passages:
-        if total_chars + len(passage.text) > max_context_chars:
-            break
-        combined_text.append(passage.text)
-        total_chars += len(passage.text) + 2  # +2 for \n\n separator
-    
-    return '\n\n'.join(combined_text) if combined_text else source_text[:max_context_chars]
+    index = retriever.get_index(source_text, source_url=source_url)
+    passages_per_claim = retriever.search(index, claims, top_k=5)
+
+    contexts = []
+    for passages in passages_per_claim:
+        # Combine passages up to max_context_chars
+        combined_text = []
+        total_chars = 0
+
+        for passage in passages:
+            if total_chars + len(passage.text) > max_context_chars:
+                break
+            combined_text.append(passage.text)
+            total_chars += len(passage.text) + 2  # +2 for \n\n separator
+
+        contexts.append('\n\n'.join(combined_text) if combined_text else source_text[:max_context_chars])
+
+    return contexts
@@ -0,0 +1,110 @@
+"""Persistent storage of source chunk embeddings, backed by chromadb."""
+import hashlib
+from typing import List, Optional, Tuple
+
+from .chunker import TextChunk
+
+
+class EmbeddingStore:
+    """Stores the chunk embeddings of each source across runs.
+
+    Entries are keyed by source URL, content hash and embedding model, so an
+    unchanged source is never re-encoded. Saving a new version of a source
+    drops the embeddings of its previous versions.
+    """
+
+    def __init__(self, path: str, collection_name: str = "source_chunks"):
+        """Open (or create) the store.
+
+        Args:
+            path: Directory of the chromadb database
+            collection_name: Name of the chromadb collection
+        """
+        try:
+            import chromadb
+        except ImportError:
+            raise ImportError(
+                "chromadb not installed. "
+                "Install with: pip install chromadb"
+            )
+        self.path = path
+        self._client = chromadb.PersistentClient(path=path)
+        self._collection = self._client.get_or_create_collection(
+            name=collection_name,
+            metadata={"hnsw:space": "cosine"}
+        )
+
+    @staticmethod
+    def source_key(url: str, content_hash: str, model_name: str) -> str:
+        """Identifier of one version of a source encoded with one model."""
+        return hashlib.sha256(f"{url}\n{content_hash}\n{model_name}".encode("utf-8")).hexdigest()
+
+    def load(self, url: str, content_hash: str, model_name: str) -> Optional[Tuple[List[TextChunk], object]]:
+        """Return the stored chunks and embeddings of a source, if any."""
+        import numpy as np
+
+        key = self.source_key(url, content_hash, model_name)
+        stored = self._collection.get(
+            where={"source_key": key},
+            include=["embeddings", "documents", "metadatas"]
+        )
+        if not stored["ids"]:
+            return None
+
+        rows = sorted(
+            zip(stored["metadatas"], stored["documents"], stored["embeddings"]),
+            key=lambda row: row[0]["chunk_id"]
+        )
+        chunks = [
+            TextChunk(
+                text=document,
+                chunk_id=metadata["chunk_id"],
+                start_char=metadata["start_char"],
+                end_char=metadata["end_char"]
+            )
+            for metadata, document, _ in rows
+        ]
+        embeddings = np.array([embedding for _, _, embedding in rows], dtype=np.float32)
+        return chunks, embeddings
+
+    def save(
+        self,
+        url: str,
+        content_hash: str,
+        model_name: str,
+        chunks: List[TextChunk],
+        embeddings
+    ) -> None:
+        """Store the chunks and embeddings of a source, replacing older versions."""
+        if not chunks:
+            return
+
+        # chromadb rejects larger batches (a few thousand records)
+        batch_size = self._client.get_max_batch_size()
+
+        previous = self._collection.get(
+            where={"$and": [{"url": url}, {"model": model_name}]},
+            include=[]
+        )["ids"]
+        for start in range(0, len(previous), batch_size):
+            self._collection.delete(ids=previous[start:start + batch_size])
+
+        key = self.source_key(url, content_hash, model_name)
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start:start + batch_size]
+            self._collection.upsert(
+                ids=[f"{key}:{chunk.chunk_id}" for chunk in batch],
+                embeddings=[list(map(float, embedding)) for embedding in embeddings[start:start + batch_size]],
+                documents=[chunk.text for chunk in batch],
+                metadatas=[
+                    {
+                        "source_key": key,
+                        "url": url,
+                        "model": model_name,
+                        "chunk_id": chunk.chunk_id,
+                        "start_char": chunk.start_char,
+                        "end_char": chunk.end_char,
+                    }
+                    for chunk in batch
+                ]
+            )
@@ -1,25 +1,86 @@
 """REST API for Citation Verifier."""
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional, List
+from typing import Callable, Optional, List
 from enum import Enum
 import asyncio
+import json
+import os
 from datetime import datetime
 import uuid
+from dataclasses import asdict
+from contextlib import asynccontextmanager
 
-from .main import verify_document
+from .main import (
+    DocumentRun,
+    run_verification,
+    verify_batch,
+    DEFAULT_MAX_CONCURRENT_DOCUMENTS,
+    DEFAULT_MAX_CONCURRENT_FETCHES,
+    DEFAULT_MAX_CONCURRENT_VERIFICATIONS,
+)
 from .models import Verdict as VerdictEnum
-from .fetcher import fetch_source
+from .cache import ResultCache, SourceCache, VerdictCache
+from .fetcher import SourceFetcher
+from .incremental import PreviousRun, load_previous_run
 from .verifier import verify_claim as verify_single_claim
-from .models import ClaimCitation, SourceContent
+from .workers import shutdown_workers
+from .models import ClaimCitation, SourceContent, VerificationResult
+
+# Shared across requests: one connection pool for the server's lifetime, and
+# sources cited by several documents are fetched once.
+# Set CITE_VERIFY_CACHE_DIR to also persist fetched sources across restarts.
+_cache_dir = os.getenv("CITE_VERIFY_CACHE_DIR")
+source_fetcher = SourceFetcher(
+    cache=SourceCache(
+        _cache_dir,
+        max_size_mb=int(os.getenv("CITE_VERIFY_CACHE_MAX_MB", "500"))
+    ) if _cache_dir else None,
+    http2=os.getenv("CITE_VERIFY_HTTP2", "").lower() in ("1", "true", "yes")
+)
+# Extraction results and verdicts, in memory and (with CITE_VERIFY_CACHE_DIR) on disk
+extraction_cache = ResultCache(
+    _cache_dir,
+    "extractions",
+    max_size_mb=int(os.getenv("CITE_VERIFY_CACHE_MAX_MB", "500"))
+)
+verdict_cache = VerdictCache(
+    _cache_dir,
+    max_size_mb=int(os.getenv("CITE_VERIFY_CACHE_MAX_MB", "500"))
+)
+
+# Verification jobs (POST /jobs), kept in memory for an hour after they finish
+MAX_CONCURRENT_JOBS = int(os.getenv("CITE_VERIFY_MAX_JOBS", "2"))
+JOB_RETENTION_SECONDS = 3600
+jobs: dict[str, "JobResponse"] = {}
+_job_slots = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up optional RAG resources at startup; close shared resources on shutdown."""
+    if os.getenv("CITE_VERIFY_EMBEDDING_STORE"):
+        from analyzers.retriever import set_embedding_store
+        from analyzers.vector_store import EmbeddingStore
+        set_embedding_store(EmbeddingStore(os.getenv("CITE_VERIFY_EMBEDDING_STORE")))
+    if os.getenv("CITE_VERIFY_PRELOAD_EMBEDDINGS", "").lower() in ("1", "true", "yes"):
+        from analyzers.embeddings import warm_up
+        await asyncio.to_thread(warm_up)
+    yield
+    await source_fetcher.aclose()
+    # Worker processes (CITE_VERIFY_WORKERS) are started on first use
+    shutdown_workers()
+
 
 app = FastAPI(
     title="Citation Verifier API",
     description="AI-powered citation verification API. Verify citations in documents or individual claims.",
     version="0.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Enable CORS
@@ -32,11 +93,25 @@ app.add_middleware(
 )
 
 
+
 # Request/Response models
 class VerifyDocumentRequest(BaseModel):
     """Request to verify all citations in a document."""
     source: str = Field(..., description="URL or file path to the document")
     model: str = Field(default="claude-3-5-haiku-20241022", description="LLM model to use")
+    max_concurrent_fetches: int = Field(
+        default=DEFAULT_MAX_CONCURRENT_FETCHES, ge=1, description="Maximum number of sources fetched concurrently"
+    )
+    max_concurrent_verifications: int = Field(
+        default=DEFAULT_MAX_CONCURRENT_VERIFICATIONS, ge=1, description="Maximum number of concurrent LLM calls"
+    )
+    group_claims: bool = Field(
+        default=False, description="Verify all claims citing the same source in a single LLM call"
+    )
+    since: Optional[dict] = Field(
+        default=None,
+        description="Response of a previous verification of this document; only changed sections and claim/source pairs are processed again"
+    )
 
 
 class VerifyClaimRequest(BaseModel):
@@ -63,6 +138,11 @@ class VerificationResponse(BaseModel):
     confidence: float = Field(ge=0.0, le=1.0)
     explanation: str
     source_quote: Optional[str] = None
+    citation_ref: Optional[str] = None
+    original_context: Optional[str] = None
+    section_hash: Optional[str] = None
+    page: Optional[int] = None
+    source_hash: Optional[str] = None
 
 
 class DocumentVerificationResponse(BaseModel):
@@ -70,6 +150,65 @@ class DocumentVerificationResponse(BaseModel):
     summary: dict
     results: List[VerificationResponse]
     processing_time_seconds: float
+    incremental: Optional[dict] = None
+    usage: Optional[dict] = None
+
+
+class VerifyBatchRequest(BaseModel):
+    """Request to verify a set of documents as one workload."""
+    sources: List[str] = Field(..., min_length=1, description="URLs or file paths of the documents")
+    model: str = Field(default="claude-3-5-haiku-20241022", description="LLM model to use")
+    max_concurrent_documents: int = Field(
+        default=DEFAULT_MAX_CONCURRENT_DOCUMENTS, ge=1, description="Maximum number of documents processed concurrently"
+    )
+    max_concurrent_fetches: int = Field(
+        default=DEFAULT_MAX_CONCURRENT_FETCHES, ge=1, description="Maximum number of sources fetched concurrently, across all documents"
+    )
+    max_concurrent_verifications: int = Field(
+        default=DEFAULT_MAX_CONCURRENT_VERIFICATIONS, ge=1, description="Maximum number of concurrent LLM calls, across all documents"
+    )
+    group_claims: bool = Field(
+        default=False, description="Verify all claims citing the same source in a single LLM call"
+    )
+
+
+class BatchDocumentResponse(BaseModel):
+    """Outcome of one document of a batch."""
+    source: str
+    result: Optional[DocumentVerificationResponse] = None
+    error: Optional[str] = None
+
+
+class BatchVerificationResponse(BaseModel):
+    """Response for batch verification, one entry per document in request order."""
+    documents: List[BatchDocumentResponse]
+    processing_time_seconds: float
+
+
+class JobStatus(str, Enum):
+    """Lifecycle of a verification job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobProgress(BaseModel):
+    """Claims verified so far; the total is known once claims are extracted."""
+    claims_done: int = 0
+    claims_total: Optional[int] = None
+
+
+class JobResponse(BaseModel):
+    """Status of a verification job."""
+    job_id: str
+    status: JobStatus
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    progress: JobProgress = Field(default_factory=JobProgress)
+    result: Optional[DocumentVerificationResponse] = None
+    error: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
@@ -109,45 +248,13 @@ async def verify_document_endpoint(request: VerifyDocumentRequest):
     - Markdown files (.md)
     - PDF files (.pdf)
     - HTML files or URLs
+
+    For long documents, prefer submitting a job (POST /jobs) and polling it.
     """
-    import time
-    start_time = time.time()
+    previous = _load_since(request)
     
     try:
-        # Run verification
-        results = await verify_document(request.source)
-        
-        # Calculate summary
-        verdict_counts = {}
-        for result in results:
-            key = result.verdict.value
-            verdict_counts[key] = verdict_counts.get(key, 0) + 1
-        
-        summary = {
-            "total_citations": len(results),
-            **verdict_counts
-        }
-        
-        # Convert results to response format
-        verification_results = [
-            VerificationResponse(
-                claim=r.claim.claim_text,
-                source_url=getattr(r.claim, 'citation_url', None),
-                verdict=Verdict(r.verdict.value),
-                confidence=r.confidence,
-                explanation=r.explanation,
-                source_quote=r.source_quote
-            )
-            for r in results
-        ]
-        
-        processing_time = time.time() - start_time
-        
-        return DocumentVerificationResponse(
-            summary=summary,
-            results=verification_results,
-            processing_time_seconds=round(processing_time, 2)
-        )
+        return await _verify_document_request(request, previous)
         
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=f"File not found: {request.source}")
@@ -155,12 +262,238 @@ async def verify_document_endpoint(request: VerifyDocumentRequest):
         raise HTTPException(status_code=500, detail=f"Verification failed: {str(e)}")
 
 
+def _load_since(request: VerifyDocumentRequest) -> Optional[PreviousRun]:
+    """Load the previous response of an incremental request, if any."""
+    if request.since is None:
+        return None
+    try:
+        return load_previous_run(request.since)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid previous response: {str(e)}")
+
+
+async def _verify_document_request(
+    request: VerifyDocumentRequest,
+    previous: Optional[PreviousRun],
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    on_result: Optional[Callable[[int, VerificationResult], None]] = None
+) -> DocumentVerificationResponse:
+    """Run a document verification and build its response."""
+    import time
+    start_time = time.time()
+
+    # Run verification
+    run = await run_verification(
+        request.source,
+        max_concurrent_fetches=request.max_concurrent_fetches,
+        max_concurrent_verifications=request.max_concurrent_verifications,
+        fetcher=source_fetcher,
+        extraction_cache=extraction_cache,
+        verdict_cache=verdict_cache,
+        model=request.model,
+        since=previous,
+        group_claims=request.group_claims,
+        on_progress=on_progress,
+        on_result=on_result,
+    )
+    return _document_response(run, time.time() - start_time)
+
+
+def _document_response(run: DocumentRun, processing_time: float) -> DocumentVerificationResponse:
+    """Build the response of a finished document verification."""
+    results = run.results
+    
+    # Calculate summary
+    verdict_counts = {}
+    for result in results:
+        key = result.verdict.value
+        verdict_counts[key] = verdict_counts.get(key, 0) + 1
+    
+    summary = {
+        "total_citations": len(results),
+        **verdict_counts
+    }
+    
+    # Convert results to response format
+    verification_results = [_to_response(r) for r in results]
+    
+    return DocumentVerificationResponse(
+        summary=summary,
+        results=verification_results,
+        processing_time_seconds=round(processing_time, 2),
+        incremental=run.incremental_state(),
+        usage=asdict(run.usage)
+    )
+
+
+@app.post("/verify/batch", response_model=BatchVerificationResponse, tags=["Verification"])
+async def verify_batch_endpoint(request: VerifyBatchRequest):
+    """Verify many documents at once.
+
+    Documents share fetched sources, RAG embeddings, verdicts and the
+    concurrency limits, so sources cited by several documents are fetched
+    and verified once. A failing document does not fail the batch.
+    """
+    import time
+    start_time = time.time()
+
+    try:
+        items = await verify_batch(
+            request.sources,
+            max_concurrent_documents=request.max_concurrent_documents,
+            max_concurrent_fetches=request.max_concurrent_fetches,
+            max_concurrent_verifications=request.max_concurrent_verifications,
+            fetcher=source_fetcher,
+            extraction_cache=extraction_cache,
+            verdict_cache=verdict_cache,
+            model=request.model,
+            group_claims=request.group_claims,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Verification failed: {str(e)}")
+
+    return BatchVerificationResponse(
+        documents=[
+            BatchDocumentResponse(
+                source=item.source,
+                result=_document_response(item.run, item.seconds) if item.run is not None else None,
+                error=item.error
+            )
+            for item in items
+        ],
+        processing_time_seconds=round(time.time() - start_time, 2)
+    )
+
+
+def _to_response(r: VerificationResult) -> VerificationResponse:
+    return VerificationResponse(
+        claim=r.claim.claim_text,
+        source_url=getattr(r.claim, 'citation_url', None),
+        verdict=Verdict(r.verdict.value),
+        confidence=r.confidence,
+        explanation=r.explanation,
+        source_quote=r.source_quote,
+        citation_ref=r.claim.citation_ref,
+        original_context=r.claim.original_context,
+        section_hash=r.claim.section_hash,
+        page=r.claim.page,
+        source_hash=r.source_hash
+    )
+
+
+@app.post("/verify/document/stream", tags=["Verification"])
+async def verify_document_stream(request: VerifyDocumentRequest):
+    """Verify all citations in a document, streaming results as NDJSON.
+
+    Emits one JSON object per line:
+    - `{"event": "extracted", "claims_total": n}` once claims are extracted
+    - `{"event": "result", "index": i, ...}` as soon as claim i is verified
+      (same fields as VerificationResponse; results arrive out of order)
+    - `{"event": "summary", ...}` at the end (DocumentVerificationResponse
+      without the results), or `{"event": "error", "detail": ...}`
+    """
+    previous = _load_since(request)
+    events: asyncio.Queue = asyncio.Queue()
+
+    def on_progress(done: int, total: int):
+        if done == 0:
+            events.put_nowait({"event": "extracted", "claims_total": total})
+
+    def on_result(index: int, result: VerificationResult):
+        events.put_nowait({"event": "result", "index": index, **_to_response(result).model_dump(mode="json")})
+
+    async def run():
+        try:
+            response = await _verify_document_request(request, previous, on_progress, on_result)
+            events.put_nowait({"event": "summary", **response.model_dump(mode="json", exclude={"results"})})
+        except FileNotFoundError:
+            events.put_nowait({"event": "error", "detail": f"File not found: {request.source}"})
+        except Exception as e:
+            events.put_nowait({"event": "error", "detail": f"Verification failed: {str(e)}"})
+        finally:
+            events.put_nowait(None)
+
+    async def stream():
+        task = asyncio.create_task(run())
+        try:
+            while (event := await events.get()) is not None:
+                yield json.dumps(event) + "\n"
+        finally:
+            # Client disconnected: stop verifying
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=202, tags=["Jobs"])
+async def submit_job(request: VerifyDocumentRequest, background_tasks: BackgroundTasks):
+    """Submit a document verification and return its job id immediately.
+
+    Poll GET /jobs/{job_id} for its progress and results. At most
+    CITE_VERIFY_MAX_JOBS jobs run at once; the others wait in the queue.
+    """
+    previous = _load_since(request)
+    _prune_jobs()
+
+    job = JobResponse(
+        job_id=str(uuid.uuid4()),
+        status=JobStatus.QUEUED,
+        created_at=datetime.utcnow()
+    )
+    jobs[job.job_id] = job
+    background_tasks.add_task(_run_job, job, request, previous)
+    return job
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse, tags=["Jobs"])
+async def get_job(job_id: str):
+    """Return the status, progress and (once completed) results of a job."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+async def _run_job(job: JobResponse, request: VerifyDocumentRequest, previous: Optional[PreviousRun]):
+    """Run a submitted job once a worker slot is free."""
+    async with _job_slots:
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+
+        def on_progress(done: int, total: int):
+            job.progress = JobProgress(claims_done=done, claims_total=total)
+
+        try:
+            job.result = await _verify_document_request(request, previous, on_progress)
+            job.status = JobStatus.COMPLETED
+        except FileNotFoundError:
+            job.error = f"File not found: {request.source}"
+            job.status = JobStatus.FAILED
+        except Exception as e:
+            job.error = f"Verification failed: {str(e)}"
+            job.status = JobStatus.FAILED
+        finally:
+            job.finished_at = datetime.utcnow()
+
+
+def _prune_jobs():
+    """Forget finished jobs older than JOB_RETENTION_SECONDS."""
+    now = datetime.utcnow()
+    expired = [
+        job_id for job_id, job in jobs.items()
+        if job.finished_at is not None and (now - job.finished_at).total_seconds() > JOB_RETENTION_SECONDS
+    ]
+    for job_id in expired:
+        del jobs[job_id]
+
+
 @app.post("/verify/claim", response_model=VerificationResponse, tags=["Verification"])
 async def verify_claim_endpoint(request: VerifyClaimRequest):
     """Verify a single claim against a source URL."""
     try:
         # Fetch the source
-        source = await fetch_source(str(request.source_url))
+        source = await source_fetcher.fetch(str(request.source_url))
         
         if source.fetch_status != "success":
             return VerificationResponse(
@@ -180,7 +513,7 @@ async def verify_claim_endpoint(request: VerifyClaimRequest):
         )
         
         # Verify the claim
-        result = await verify_single_claim(claim, source, model=request.model)
+        result = await verify_single_claim(claim, source, model=request.model, verdict_cache=verdict_cache)
         
         return VerificationResponse(
             claim=result.claim.claim_text if hasattr(result.claim, 'claim_text') else request.claim,
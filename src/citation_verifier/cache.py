@@ -0,0 +1,397 @@
+"""Persistent on-disk caches."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from .models import SourceContent
+
+
+@dataclass
+class CachedSource:
+    """A source stored in the cache, with its HTTP validators.
+
+    content is the text extracted from the raw body, which is kept so the
+    text can be extracted again without downloading.
+    """
+    url: str
+    content: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    body: Optional[bytes] = None
+    content_type: Optional[str] = None
+    extractor: Optional[str] = None # version of the extraction that produced content
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        """Whether the entry can be used without revalidation."""
+        return time.time() - self.fetched_at < ttl_seconds
+
+    def to_source(self, url: Optional[str] = None) -> SourceContent:
+        return SourceContent(
+            url=url or self.url,
+            content=self.content,
+            fetch_status="success",
+            etag=self.etag,
+            last_modified=self.last_modified,
+            content_type=self.content_type,
+        )
+
+
+class SourceCache:
+    """SQLite-backed cache of fetched sources, keyed by normalized URL.
+
+    Entries younger than the TTL are served directly; older ones are kept
+    so they can be revalidated with a conditional GET. When the stored
+    bodies exceed the byte budget, least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl_seconds: float = 24 * 3600,
+        max_size_mb: int = 500
+    ):
+        """Open (or create) the cache.
+
+        Args:
+            cache_dir: Directory holding the cache database
+            ttl_seconds: Age after which an entry must be revalidated
+            max_size_mb: Maximum total size of cached bodies in MB
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        self.path = Path(cache_dir) / "sources.sqlite"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sources)")}
+        if columns and "body" not in columns:
+            # Older caches stored raw markup as content and have no body to extract it from
+            self._conn.execute("DROP TABLE sources")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS sources (
+                url TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL,
+                body BLOB,
+                content_type TEXT,
+                extractor TEXT
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[CachedSource]:
+        """Return the cached entry for a normalized URL, fresh or not."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, content, etag, last_modified, fetched_at, body, content_type, extractor "
+                "FROM sources WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE sources SET last_access = ? WHERE url = ?", (time.time(), url)
+            )
+            self._conn.commit()
+        return CachedSource(*row)
+
+    def put(self, url: str, source: SourceContent, extractor: Optional[str] = None) -> None:
+        """Store a successfully fetched source under a normalized URL.
+
+        Args:
+            url: Normalized URL
+            source: The fetched source; its raw body is stored with its text
+            extractor: Version of the text extraction that produced the content
+        """
+        if source.fetch_status != "success" or not source.content or source.truncated:
+            return
+
+        size = len(source.content.encode("utf-8")) + len(source.raw_content or b"")
+        if size > self.max_size_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url, source.content, source.etag, source.last_modified, now, now, size,
+                    source.raw_content, source.content_type, extractor
+                )
+            )
+            _evict_lru(self._conn, "sources", "url", self.max_size_bytes)
+            self._conn.commit()
+
+    def update_text(self, url: str, content: str, extractor: str) -> None:
+        """Replace the extracted text of an entry, keeping its body and validators."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sources SET content = ?, extractor = ?, "
+                "size = LENGTH(CAST(? AS BLOB)) + COALESCE(LENGTH(body), 0) WHERE url = ?",
+                (content, extractor, content, url)
+            )
+            self._conn.commit()
+
+    def mark_revalidated(self, url: str) -> None:
+        """Reset the age of an entry after the server answered 304."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sources SET fetched_at = ?, last_access = ? WHERE url = ?",
+                (now, now, url)
+            )
+            self._conn.commit()
+
+    def total_size(self) -> int:
+        """Total size in bytes of the cached bodies."""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM sources").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class ResultCache:
+    """Size-bounded cache of JSON-serializable results.
+
+    An in-memory LRU sits in front of an optional SQLite backend; without a
+    cache directory the cache only lives in memory. Keys are built with
+    cache_key() from everything that determines the result.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str],
+        name: str,
+        max_size_mb: int = 100,
+        memory_entries: int = 256
+    ):
+        """Open (or create) the cache.
+
+        Args:
+            cache_dir: Directory holding the cache database, or None for memory only
+            name: Name of the database file (one per kind of result)
+            max_size_mb: Maximum total size of the stored results in MB
+            memory_entries: Number of results kept in memory
+        """
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if cache_dir is not None:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(Path(cache_dir) / f"{name}.sqlite", check_same_thread=False)
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )"""
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached result for a key, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            if self._conn is None:
+                return None
+
+            row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            value = json.loads(row[0])
+            self._remember(key, value)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a result."""
+        encoded = json.dumps(value)
+        with self._lock:
+            self._remember(key, value)
+            if self._conn is None or len(encoded) > self.max_size_bytes:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, encoded, time.time(), len(encoded))
+            )
+            _evict_lru(self._conn, "results", "key", self.max_size_bytes)
+            self._conn.commit()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+
+    def _remember(self, key: str, value: Any) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+
+class VerdictCache:
+    """Cache of verification verdicts, in memory and optionally on disk.
+
+    A verdict is keyed by the normalized claim text, the hash of the source
+    content, the model and the prompt version. When a source changes, the
+    verdicts computed against its previous content are dropped as soon as
+    the claim is verified again.
+
+    A cache may sit in front of a fallback cache (e.g. the shared one of a
+    server): lookups go through to the fallback and new verdicts are stored
+    in both, except those put with shared=False.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str],
+        max_size_mb: int = 100,
+        memory_entries: int = 1024,
+        fallback: Optional["VerdictCache"] = None
+    ):
+        """Open (or create) the cache.
+
+        Args:
+            cache_dir: Directory holding the cache database, or None for memory only
+            max_size_mb: Maximum total size of the stored verdicts in MB
+            memory_entries: Number of verdicts kept in memory
+            fallback: Cache consulted on a miss and updated by put()
+        """
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.memory_entries = memory_entries
+        self.fallback = fallback
+        self.hits = 0
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if cache_dir is not None:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(Path(cache_dir) / "verdicts.sqlite", check_same_thread=False)
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS verdicts (
+                    key TEXT PRIMARY KEY,
+                    claim_key TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    source_hash TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS verdicts_claim ON verdicts (claim_key, url)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def claim_key(claim_text: str, model: str, prompt_version: str) -> str:
+        """Identify a claim independently of the source version."""
+        normalized = " ".join(claim_text.lower().split()).rstrip(".!?;: ")
+        return cache_key(normalized, model, prompt_version)
+
+    def get(self, claim_text: str, url: str, source_hash: str, model: str, prompt_version: str) -> Optional[dict]:
+        """Return the stored verdict fields, or None."""
+        claim_key = self.claim_key(claim_text, model, prompt_version)
+        key = cache_key(claim_key, url, source_hash)
+        with self._lock:
+            value = self._memory.get(key)
+            if value is None and self._conn is not None:
+                row = self._conn.execute("SELECT value FROM verdicts WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE verdicts SET last_access = ? WHERE key = ?", (time.time(), key))
+                    self._conn.commit()
+                    value = json.loads(row[0])
+            if value is None and self.fallback is not None:
+                value = self.fallback.get(claim_text, url, source_hash, model, prompt_version)
+            if value is None:
+                return None
+            self._remember(key, value)
+            self.hits += 1
+            return value
+
+    def put(
+        self,
+        claim_text: str,
+        url: str,
+        source_hash: str,
+        model: str,
+        prompt_version: str,
+        value: dict,
+        shared: bool = True
+    ) -> None:
+        """Store verdict fields, dropping verdicts for older versions of the source.
+
+        With shared=False the verdict is not stored in the fallback cache,
+        e.g. for verdicts taken from a client-supplied report.
+        """
+        claim_key = self.claim_key(claim_text, model, prompt_version)
+        key = cache_key(claim_key, url, source_hash)
+        encoded = json.dumps(value)
+        if shared and self.fallback is not None:
+            self.fallback.put(claim_text, url, source_hash, model, prompt_version, value)
+        with self._lock:
+            self._remember(key, value)
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "DELETE FROM verdicts WHERE claim_key = ? AND url = ? AND source_hash != ?",
+                (claim_key, url, source_hash)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, claim_key, url, source_hash, encoded, time.time(), len(encoded))
+            )
+            _evict_lru(self._conn, "verdicts", "key", self.max_size_bytes)
+            self._conn.commit()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+
+    def _remember(self, key: str, value: dict) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+
+def cache_key(*parts: str) -> str:
+    """Hash the inputs that determine a cached result into a key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _evict_lru(conn: sqlite3.Connection, table: str, key_column: str, max_size_bytes: int) -> None:
+    """Drop least recently used rows until the table is under the byte budget."""
+    total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+    if total <= max_size_bytes:
+        return
+
+    rows = conn.execute(f"SELECT {key_column}, size FROM {table} ORDER BY last_access ASC").fetchall()
+    to_delete = []
+    for key, size in rows:
+        if total <= max_size_bytes:
+            break
+        to_delete.append((key,))
+        total -= size
+    conn.executemany(f"DELETE FROM {table} WHERE {key_column} = ?", to_delete)
@@ -1,14 +1,34 @@
 """Citation Verifier CLI interface."""
 import asyncio
+import glob
 import sys
 from pathlib import Path
+from typing import Optional
 
 import typer
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from dotenv import load_dotenv
 
-from .main import verify_document
+from analyzers.embeddings import warm_up_in_background
+from analyzers.retriever import set_embedding_store
+from analyzers.vector_store import EmbeddingStore
+from .cache import ResultCache, SourceCache, VerdictCache
+from .fetcher import SourceFetcher
+from .incremental import PreviousRun, load_previous_run
+from .llm import configure_rate_limits, get_rate_limiter
+from .verifier import NO_RAG_FETCH_BYTES
+from .workers import configure_workers, shutdown_workers
+from .main import (
+    BatchItem,
+    DocumentRun,
+    run_verification,
+    verify_batch,
+    DEFAULT_MAX_CONCURRENT_DOCUMENTS,
+    DEFAULT_MAX_CONCURRENT_FETCHES,
+    DEFAULT_MAX_CONCURRENT_VERIFICATIONS,
+    DEFAULT_MODEL,
+)
 from reporters.json_report import format_json_report
 from reporters.markdown_report import format_markdown_report
 from reporters.terminal_report import display_terminal_report
@@ -23,6 +43,9 @@ app = typer.Typer(
 
 console = Console()
 
+# Files picked up by `cite-verify batch`
+DOCUMENT_SUFFIXES = {".md", ".pdf", ".html", ".htm", ".txt"}
+
 
 @app.command()
 def check(
@@ -37,7 +60,7 @@ def check(
         help="Output format: terminal, json, markdown"
     ),
     model: str = typer.Option(
-        "claude-3-5-haiku-20241022",
+        DEFAULT_MODEL,
         "--model",
         "-m",
         help="LLM model to use for verification"
@@ -53,6 +76,77 @@ def check(
         "--no-rag",
         help="Disable RAG (Retrieval-Augmented Generation) for long documents. Use this on systems with limited memory."
     ),
+    max_fetches: int = typer.Option(
+        DEFAULT_MAX_CONCURRENT_FETCHES,
+        "--max-fetches",
+        min=1,
+        help="Maximum number of sources fetched concurrently"
+    ),
+    max_llm_calls: int = typer.Option(
+        DEFAULT_MAX_CONCURRENT_VERIFICATIONS,
+        "--max-llm-calls",
+        min=1,
+        help="Maximum number of concurrent LLM verification calls"
+    ),
+    cache_dir: Optional[Path] = typer.Option(
+        None,
+        "--cache-dir",
+        help="Directory for persistent caches (fetched sources, extracted claims, verdicts) reused across runs"
+    ),
+    cache_max_mb: int = typer.Option(
+        500,
+        "--cache-max-mb",
+        min=1,
+        help="Maximum size of each cache in MB (least recently used entries are evicted)"
+    ),
+    http2: bool = typer.Option(
+        False,
+        "--http2",
+        help="Use HTTP/2 when fetching sources (requires httpx[http2])"
+    ),
+    preload_model: bool = typer.Option(
+        False,
+        "--preload-model",
+        help="Load the RAG embedding model in the background while claims are extracted"
+    ),
+    embedding_store: Optional[Path] = typer.Option(
+        None,
+        "--embedding-store",
+        help="Directory of a persistent embedding store (chromadb) so unchanged sources are not re-encoded"
+    ),
+    requests_per_minute: Optional[int] = typer.Option(
+        None,
+        "--requests-per-minute",
+        min=1,
+        help="Client-side limit on LLM requests per minute (default: CITE_VERIFY_REQUESTS_PER_MINUTE or none)"
+    ),
+    tokens_per_minute: Optional[int] = typer.Option(
+        None,
+        "--tokens-per-minute",
+        min=1,
+        help="Client-side limit on LLM input tokens per minute (default: CITE_VERIFY_TOKENS_PER_MINUTE or none)"
+    ),
+    group_claims: bool = typer.Option(
+        False,
+        "--group-claims",
+        help="Verify all claims citing the same source in a single LLM call (fewer requests and input tokens)"
+    ),
+    since: Optional[Path] = typer.Option(
+        None,
+        "--since",
+        help="JSON report of a previous run (see --save-report); only changed sections and claim/source pairs are processed again"
+    ),
+    save_report: Optional[Path] = typer.Option(
+        None,
+        "--save-report",
+        help="Also write the JSON report to this file, for a later run with --since"
+    ),
+    workers: Optional[int] = typer.Option(
+        None,
+        "--workers",
+        min=0,
+        help="Worker processes for document parsing and source embedding (default: CITE_VERIFY_WORKERS or 0, i.e. threads)"
+    ),
 ):
     """Verify citations in a document."""
 
@@ -63,9 +157,39 @@ def check(
             console.print(f"[red]Error: File not found: {source}[/red]")
             raise typer.Exit(1)
 
+    previous = None
+    if since is not None:
+        try:
+            previous = load_previous_run(since)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]Error: Cannot use {since} as previous report: {e}[/red]")
+            raise typer.Exit(1)
+
+    _apply_rate_limits(requests_per_minute, tokens_per_minute)
+
+    if preload_model and not no_rag:
+        warm_up_in_background()
+
     # Run verification
     try:
-        results = asyncio.run(_verify_with_progress(source, verbose, use_rag=not no_rag))
+        if embedding_store and not no_rag:
+            set_embedding_store(EmbeddingStore(str(embedding_store)))
+        if workers is not None:
+            configure_workers(workers, str(embedding_store) if embedding_store and not no_rag else None)
+        fetcher, extraction_cache, verdict_cache = _open_caches(cache_dir, cache_max_mb, http2, use_rag=not no_rag)
+        run = asyncio.run(_verify_with_progress(
+            source,
+            verbose,
+            use_rag=not no_rag,
+            max_fetches=max_fetches,
+            max_llm_calls=max_llm_calls,
+            fetcher=fetcher,
+            extraction_cache=extraction_cache,
+            verdict_cache=verdict_cache,
+            model=model,
+            since=previous,
+            group_claims=group_claims,
+        ))
     except KeyboardInterrupt:
         console.print("\n[yellow]Verification cancelled by user[/yellow]")
         raise typer.Exit(130)
@@ -74,12 +198,18 @@ def check(
         if verbose:
             console.print_exception()
         raise typer.Exit(1)
+    finally:
+        shutdown_workers()
+
+    results = run.results
+    if save_report is not None:
+        save_report.write_text(format_json_report(results, run.incremental_state()), encoding="utf-8")
 
     # Display results using appropriate reporter
     if output_format == "terminal":
         display_terminal_report(results, console)
     elif output_format == "json":
-        console.print(format_json_report(results))
+        console.print(format_json_report(results, run.incremental_state()))
     elif output_format == "markdown":
         print(format_markdown_report(results))
     else:
@@ -87,7 +217,218 @@ def check(
         raise typer.Exit(1)
 
 
-async def _verify_with_progress(source: str, verbose: bool, use_rag: bool = True) -> list:
+@app.command()
+def batch(
+    documents: str = typer.Argument(
+        ...,
+        help="Directory of documents, or a glob pattern (e.g. 'reports/**/*.md')"
+    ),
+    output_dir: Path = typer.Option(
+        Path("reports"),
+        "--output-dir",
+        "-d",
+        help="Directory where one report per document is written"
+    ),
+    output_format: str = typer.Option(
+        "json",
+        "--output",
+        "-o",
+        help="Report format: json (reusable with check --since) or markdown"
+    ),
+    model: str = typer.Option(
+        DEFAULT_MODEL,
+        "--model",
+        "-m",
+        help="LLM model to use for verification"
+    ),
+    no_rag: bool = typer.Option(
+        False,
+        "--no-rag",
+        help="Disable RAG for long sources"
+    ),
+    max_documents: int = typer.Option(
+        DEFAULT_MAX_CONCURRENT_DOCUMENTS,
+        "--max-documents",
+        min=1,
+        help="Maximum number of documents processed concurrently"
+    ),
+    max_fetches: int = typer.Option(
+        DEFAULT_MAX_CONCURRENT_FETCHES,
+        "--max-fetches",
+        min=1,
+        help="Maximum number of sources fetched concurrently, across all documents"
+    ),
+    max_llm_calls: int = typer.Option(
+        DEFAULT_MAX_CONCURRENT_VERIFICATIONS,
+        "--max-llm-calls",
+        min=1,
+        help="Maximum number of concurrent LLM verification calls, across all documents"
+    ),
+    cache_dir: Optional[Path] = typer.Option(
+        None,
+        "--cache-dir",
+        help="Directory for persistent caches reused across runs"
+    ),
+    cache_max_mb: int = typer.Option(
+        500,
+        "--cache-max-mb",
+        min=1,
+        help="Maximum size of each cache in MB"
+    ),
+    http2: bool = typer.Option(
+        False,
+        "--http2",
+        help="Use HTTP/2 when fetching sources (requires httpx[http2])"
+    ),
+    group_claims: bool = typer.Option(
+        False,
+        "--group-claims",
+        help="Verify all claims citing the same source in a single LLM call"
+    ),
+    requests_per_minute: Optional[int] = typer.Option(
+        None,
+        "--requests-per-minute",
+        min=1,
+        help="Client-side limit on LLM requests per minute"
+    ),
+    tokens_per_minute: Optional[int] = typer.Option(
+        None,
+        "--tokens-per-minute",
+        min=1,
+        help="Client-side limit on LLM input tokens per minute"
+    ),
+    workers: Optional[int] = typer.Option(
+        None,
+        "--workers",
+        min=0,
+        help="Worker processes for document parsing and source embedding (default: CITE_VERIFY_WORKERS or 0, i.e. threads)"
+    ),
+):
+    """Verify many documents at once, sharing fetched sources and verdicts between them."""
+    if output_format not in ("json", "markdown"):
+        console.print(f"[red]Unknown output format: {output_format}[/red]")
+        raise typer.Exit(1)
+
+    sources = find_documents(documents)
+    if not sources:
+        console.print(f"[red]Error: No documents found in {documents}[/red]")
+        raise typer.Exit(1)
+    console.print(f"Verifying {len(sources)} documents")
+
+    _apply_rate_limits(requests_per_minute, tokens_per_minute)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    report_paths = _report_paths(sources, output_dir, ".json" if output_format == "json" else ".md")
+
+    def write_report(item: BatchItem):
+        if item.run is None:
+            console.print(f"[red]✗ {item.source}: {item.error}[/red]")
+            return
+        if output_format == "json":
+            report = format_json_report(item.run.results, item.run.incremental_state())
+        else:
+            report = format_markdown_report(item.run.results)
+        report_paths[item.source].write_text(report, encoding="utf-8")
+        console.print(f"[green]✓[/green] {item.source} → {report_paths[item.source]}")
+
+    try:
+        if workers is not None:
+            configure_workers(workers)
+        fetcher, extraction_cache, verdict_cache = _open_caches(cache_dir, cache_max_mb, http2, use_rag=not no_rag)
+        items = asyncio.run(verify_batch(
+            sources,
+            use_rag=not no_rag,
+            max_concurrent_documents=max_documents,
+            max_concurrent_fetches=max_fetches,
+            max_concurrent_verifications=max_llm_calls,
+            fetcher=fetcher,
+            extraction_cache=extraction_cache,
+            verdict_cache=verdict_cache,
+            model=model,
+            group_claims=group_claims,
+            on_document=write_report,
+        ))
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Verification cancelled by user[/yellow]")
+        raise typer.Exit(130)
+    finally:
+        shutdown_workers()
+
+    failed = [item for item in items if item.run is None]
+    if failed:
+        console.print(f"[red]{len(failed)} of {len(items)} documents failed[/red]")
+        raise typer.Exit(1)
+
+
+def find_documents(pattern: str) -> list[str]:
+    """List the documents of a directory, or matching a glob pattern."""
+    path = Path(pattern)
+    if path.is_dir():
+        candidates = path.iterdir()
+    else:
+        candidates = (Path(match) for match in glob.glob(pattern, recursive=True))
+    return sorted(
+        str(candidate) for candidate in candidates
+        if candidate.is_file() and candidate.suffix.lower() in DOCUMENT_SUFFIXES
+    )
+
+
+def _report_paths(sources: list[str], output_dir: Path, suffix: str) -> dict[str, Path]:
+    """Name each report after its document, disambiguating repeated names."""
+    paths = {}
+    used = set()
+    for source in sources:
+        stem = Path(source).stem
+        name, n = stem, 1
+        while name in used:
+            n += 1
+            name = f"{stem}-{n}"
+        used.add(name)
+        paths[source] = output_dir / f"{name}{suffix}"
+    return paths
+
+
+def _open_caches(
+    cache_dir: Optional[Path],
+    cache_max_mb: int,
+    http2: bool,
+    use_rag: bool = True
+) -> tuple[SourceFetcher, Optional[ResultCache], Optional[VerdictCache]]:
+    """Create the fetcher and the caches, persistent when a cache directory is given.
+
+    Without RAG, downloads stop once NO_RAG_FETCH_BYTES were received.
+    """
+    cache = SourceCache(str(cache_dir), max_size_mb=cache_max_mb) if cache_dir else None
+    extraction_cache = (
+        ResultCache(str(cache_dir), "extractions", max_size_mb=cache_max_mb) if cache_dir else None
+    )
+    verdict_cache = VerdictCache(str(cache_dir), max_size_mb=cache_max_mb) if cache_dir else None
+    stop_after_bytes = None if use_rag else NO_RAG_FETCH_BYTES
+    return SourceFetcher(cache=cache, http2=http2, stop_after_bytes=stop_after_bytes), extraction_cache, verdict_cache
+
+
+def _apply_rate_limits(requests_per_minute: Optional[int], tokens_per_minute: Optional[int]):
+    """Override the LLM rate limits set in the environment."""
+    if requests_per_minute or tokens_per_minute:
+        limiter = get_rate_limiter()
+        configure_rate_limits(
+            requests_per_minute or limiter.requests_per_minute,
+            tokens_per_minute or limiter.tokens_per_minute
+        )
+
+
+async def _verify_with_progress(
+    source: str,
+    verbose: bool,
+    use_rag: bool = True,
+    max_fetches: int = DEFAULT_MAX_CONCURRENT_FETCHES,
+    max_llm_calls: int = DEFAULT_MAX_CONCURRENT_VERIFICATIONS,
+    fetcher: Optional[SourceFetcher] = None,
+    extraction_cache: Optional[ResultCache] = None,
+    verdict_cache: Optional[VerdictCache] = None,
+    model: str = DEFAULT_MODEL,
+    since: Optional[PreviousRun] = None,
+    group_claims: bool = False,
+) -> DocumentRun:
     """Run verification with progress display."""
     with Progress(
         SpinnerColumn(),
@@ -96,10 +437,25 @@ async def _verify_with_progress(source: str, verbose: bool, use_rag: bool = True
         transient=not verbose,
     ) as progress:
         task = progress.add_task(f"Verifying citations in {source}...", total=None)
-        results = await verify_document(source, use_rag=use_rag)
+        try:
+            run = await run_verification(
+                source,
+                use_rag=use_rag,
+                max_concurrent_fetches=max_fetches,
+                max_concurrent_verifications=max_llm_calls,
+                fetcher=fetcher,
+                extraction_cache=extraction_cache,
+                verdict_cache=verdict_cache,
+                model=model,
+                since=since,
+                group_claims=group_claims,
+            )
+        finally:
+            if fetcher is not None:
+                await fetcher.aclose()
         progress.update(task, completed=True)
 
-    return results
+    return run
 
 
 @app.command()
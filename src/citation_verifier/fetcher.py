@@ -1,67 +1,399 @@
-import httpx    
+import asyncio
+import importlib.util
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+from parsers.html_parser import extract_main_text
+from parsers.pdf import extract_pdf_text
+from .cache import CachedSource, SourceCache
 from .models import SourceContent
+from .workers import run_cpu_bound
+
+# Stored with each cached source; cached bodies are extracted again when it changes
+EXTRACTOR_VERSION = "1"
+HTML_TYPES = {"text/html", "application/xhtml+xml"}
 
-async def fetch_source(url: str, timeout: int = 30, max_size_mb: int = 10) -> SourceContent:
+async def fetch_source(
+    url: str,
+    timeout: int = 30,
+    max_size_mb: int = 10,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    stop_after_bytes: Optional[int] = None,
+) -> SourceContent:
     """Get the content of an url
 
+    The body is streamed: a Content-Length above the limit is rejected before
+    downloading, and the download is aborted as soon as the limit is crossed.
+
     Args:
         url: The URL to fetch
         timeout: Timeout in seconds (default: 30)
         max_size_mb: Maximum content size in MB (default: 10)
+        etag: ETag of a cached copy, sent as If-None-Match
+        last_modified: Last-Modified of a cached copy, sent as If-Modified-Since
+        client: Pooled client to reuse. A temporary one is opened if omitted.
+        stop_after_bytes: Stop reading once this many bytes were received and
+            return the partial content, marked as truncated.
+
+    The body is then reduced to its text according to its content type
+    (see extract_source_text); the raw body is kept in raw_content.
+
+    Returns a "not_modified" status without content when the server
+    confirms the cached copy is still current.
     """
     try:
         # Validate URL format
         if not url.startswith(('http://', 'https://')):
             return SourceContent(url=url, fetch_status="error: invalid_url_scheme")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url,
-                timeout=timeout,
-                follow_redirects=True,
-                headers={
-                    "User-Agent": "CitationVerifier/0.1"
-                }
+        headers = {"User-Agent": "CitationVerifier/0.1"}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        max_size_bytes = int(max_size_mb * 1024 * 1024)
+
+        if client is not None:
+            return await _stream_source(client, url, timeout, headers, max_size_bytes, stop_after_bytes)
+
+        async with httpx.AsyncClient() as temporary_client:
+            return await _stream_source(
+                temporary_client, url, timeout, headers, max_size_bytes, stop_after_bytes
             )
 
-            if response.status_code == 200:
-                # Check content size
-                content_length = len(response.content)
-                max_size_bytes = max_size_mb * 1024 * 1024
+    except httpx.TimeoutException:
+        return SourceContent(url=url, fetch_status="timeout")
+    except httpx.InvalidURL:
+        return SourceContent(url=url, fetch_status="error: invalid_url")
+    except Exception as e:
+        return SourceContent(url=url, fetch_status=f"error: {str(e)}")
 
-                if content_length > max_size_bytes:
-                    return SourceContent(
-                        url=url,
-                        fetch_status=f"error: content_too_large ({content_length / 1024 / 1024:.1f}MB)"
-                    )
 
-                return SourceContent(
-                    url=url,
-                    content=response.text,
-                    fetch_status="success"
-                )
+async def _stream_source(
+    client: httpx.AsyncClient,
+    url: str,
+    timeout: int,
+    headers: dict,
+    max_size_bytes: int,
+    stop_after_bytes: Optional[int],
+) -> SourceContent:
+    """Stream a response body, enforcing the size limit while reading."""
+    async with client.stream(
+        "GET",
+        url,
+        timeout=timeout,
+        follow_redirects=True,
+        headers=headers
+    ) as response:
+        if response.status_code == 304:
+            return SourceContent(url=url, fetch_status="not_modified")
 
-            elif response.status_code == 403:
-                return SourceContent(
-                    url=url,
-                    fetch_status="access_denied"
-                )
+        elif response.status_code == 403:
+            return SourceContent(
+                url=url,
+                fetch_status="access_denied"
+            )
 
-            elif response.status_code == 404:
+        elif response.status_code == 404:
+            return SourceContent(
+                url=url,
+                fetch_status="not_found"
+            )
+
+        elif response.status_code != 200:
+            return SourceContent(
+                url=url,
+                fetch_status=f"failed_{response.status_code}"
+            )
+
+        content_type = _media_type(response.headers.get("Content-Type"))
+        if content_type == "application/pdf":
+            # A truncated PDF cannot be parsed
+            stop_after_bytes = None
+
+        # Reject up front when the server announces an oversized body
+        declared_length = response.headers.get("Content-Length")
+        if declared_length and declared_length.isdigit() and int(declared_length) > max_size_bytes:
+            return SourceContent(
+                url=url,
+                fetch_status=f"error: content_too_large ({int(declared_length) / 1024 / 1024:.1f}MB)"
+            )
+
+        chunks = []
+        received = 0
+        truncated = False
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            received += len(chunk)
+
+            if received > max_size_bytes:
                 return SourceContent(
                     url=url,
-                    fetch_status="not_found"
+                    fetch_status=f"error: content_too_large (>{max_size_bytes / 1024 / 1024:.1f}MB)"
                 )
 
-            else:
-                return SourceContent(
-                    url=url,
-                    fetch_status=f"failed_{response.status_code}"
+            if stop_after_bytes is not None and received >= stop_after_bytes:
+                truncated = True
+                break
+
+        body = b"".join(chunks)
+        if truncated:
+            body = body[:stop_after_bytes]
+
+        # Markup and PDF parsing are CPU-bound (worker processes when enabled)
+        text = await run_cpu_bound(extract_source_text, body, content_type, response.encoding)
+        if not text.strip():
+            return SourceContent(url=url, fetch_status="extraction_failed")
+
+        return SourceContent(
+            url=url,
+            content=text,
+            fetch_status="success",
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            truncated=truncated,
+            content_type=content_type,
+            raw_content=body
+        )
+
+
+def extract_source_text(body: bytes, content_type: Optional[str], encoding: Optional[str] = None) -> str:
+    """Reduce a fetched body to the text the verification reads.
+
+    HTML pages are reduced to their main text (trafilatura), PDFs to the
+    text of their pages (PyMuPDF); other content is decoded as is.
+
+    Args:
+        body: Raw response body
+        content_type: Media type of the response, without parameters
+        encoding: Charset of the response, for text content
+
+    Returns:
+        The extracted text (empty if nothing could be extracted)
+    """
+    if content_type == "application/pdf" or body.startswith(b"%PDF-"):
+        try:
+            return extract_pdf_text(body)
+        except Exception:
+            return ""
+
+    text = body.decode(encoding or "utf-8", errors="replace")
+    if content_type in HTML_TYPES or (content_type is None and text.lstrip()[:1] == "<"):
+        return extract_main_text(text)
+    return text
+
+
+def _without_body(source: SourceContent) -> SourceContent:
+    if source.raw_content is None:
+        return source
+    return source.model_copy(update={"raw_content": None})
+
+
+def _media_type(header: Optional[str]) -> Optional[str]:
+    if not header:
+        return None
+    return header.split(";", 1)[0].strip().lower() or None
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so that equivalent spellings share one cache key.
+
+    Lowercases the scheme and host, drops default ports and the fragment,
+    and uses "/" for an empty path. The query string is kept as is.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if (scheme, port) in (("http", 80), ("https", 443)):
+        netloc = netloc.rsplit(":", 1)[0]
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+class SourceFetcher:
+    """Fetch sources once per URL and share the result.
+
+    Concurrent requests for the same normalized URL wait on a single
+    download, and successful results are kept in a size-bounded LRU so that
+    later claims (or later documents) citing the same URL reuse them. With
+    a SourceCache, results also persist across runs.
+
+    The fetcher owns a pooled httpx client that keeps connections alive
+    between fetches, so it should live as long as its event loop and be
+    closed with aclose() (or used as an async context manager).
+    """
+
+    def __init__(
+        self,
+        timeout: int = 30,
+        max_size_mb: int = 10,
+        max_cache_mb: int = 64,
+        cache: Optional[SourceCache] = None,
+        max_connections: int = 100,
+        max_connections_per_host: int = 6,
+        http2: bool = False,
+        stop_after_bytes: Optional[int] = None
+    ):
+        """Initialize the fetcher.
+
+        Args:
+            timeout: Timeout in seconds for each download
+            max_size_mb: Maximum content size in MB for a single source
+            max_cache_mb: Maximum total size in MB of the reused results
+            cache: Optional persistent cache consulted before downloading
+            max_connections: Maximum number of open connections overall
+            max_connections_per_host: Maximum concurrent requests to one host
+            http2: Negotiate HTTP/2 when the server supports it (requires h2)
+            stop_after_bytes: Keep only the first bytes of each source, for
+                callers that never look past them (e.g. no RAG)
+        """
+        if http2 and importlib.util.find_spec("h2") is None:
+            raise ImportError(
+                "HTTP/2 support requires the h2 package. "
+                "Install with: pip install 'httpx[http2]'"
+            )
+        self.timeout = timeout
+        self.max_size_mb = max_size_mb
+        self.max_cache_bytes = max_cache_mb * 1024 * 1024
+        self.cache = cache
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.http2 = http2
+        self.stop_after_bytes = stop_after_bytes
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self.downloads = 0
+        self.reused = 0
+        self.cache_hits = 0
+        self._results: OrderedDict[str, SourceContent] = OrderedDict()
+        self._cached_bytes = 0
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def fetch(self, url: str) -> SourceContent:
+        """Fetch a URL, reusing a completed or in-flight download if any."""
+        key = normalize_url(url)
+
+        cached = self._results.get(key)
+        if cached is not None:
+            self._results.move_to_end(key)
+            self.reused += 1
+            return cached
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._download(url))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._on_done(key, done))
+        else:
+            self.reused += 1
+
+        # Shield so that one cancelled caller does not cancel the shared download
+        return await asyncio.shield(task)
+
+    async def __aenter__(self) -> "SourceFetcher":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled client. The fetcher reopens one if used again."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazily create the pooled client inside the running event loop."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=30
                 )
+            )
+        return self._client
 
-    except httpx.TimeoutException:
-        return SourceContent(url=url, fetch_status="timeout")
-    except httpx.InvalidURL:
-        return SourceContent(url=url, fetch_status="error: invalid_url")
-    except Exception as e:
-        return SourceContent(url=url, fetch_status=f"error: {str(e)}")
\ No newline at end of file
+    async def _get(self, url: str, **kwargs) -> SourceContent:
+        """Download through the pooled client, within the per-host limit."""
+        host = urlsplit(url).hostname or ""
+        limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.max_connections_per_host))
+        self.downloads += 1
+        async with limit:
+            return await fetch_source(
+                url,
+                timeout=self.timeout,
+                max_size_mb=self.max_size_mb,
+                client=self._get_client(),
+                stop_after_bytes=self.stop_after_bytes,
+                **kwargs
+            )
+
+    async def _download(self, url: str) -> SourceContent:
+        # Callers only read the text; the raw body (up to max_size_mb) is only
+        # for the persistent cache and must not be shared or sent to workers
+        if self.cache is None:
+            return _without_body(await self._get(url))
+
+        key = normalize_url(url)
+        # SQLite reads and writes (bodies up to max_size_mb) run off the event loop
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None and cached.extractor != EXTRACTOR_VERSION:
+            cached = await self._extract_again(key, cached)
+        if cached is not None and cached.is_fresh(self.cache.ttl_seconds):
+            self.cache_hits += 1
+            return cached.to_source(url)
+
+        result = await self._get(
+            url,
+            etag=cached.etag if cached else None,
+            last_modified=cached.last_modified if cached else None
+        )
+
+        if result.fetch_status == "not_modified" and cached is not None:
+            self.cache_hits += 1
+            await asyncio.to_thread(self.cache.mark_revalidated, key)
+            return cached.to_source(url)
+
+        await asyncio.to_thread(self.cache.put, key, result, EXTRACTOR_VERSION)
+        return _without_body(result)
+
+    async def _extract_again(self, key: str, cached: CachedSource) -> Optional[CachedSource]:
+        """Update the text of an entry cached by an older extractor, from its raw body."""
+        if cached.body is None:
+            return None
+        text = await run_cpu_bound(extract_source_text, cached.body, cached.content_type)
+        if not text.strip():
+            return None
+        cached.content = text
+        cached.extractor = EXTRACTOR_VERSION
+        await asyncio.to_thread(self.cache.update_text, key, text, EXTRACTOR_VERSION)
+        return cached
+
+    def _on_done(self, key: str, task: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        result = task.result()
+        # Only successes are kept: failures may be transient
+        if result.fetch_status != "success" or not result.content:
+            return
+
+        size = len(result.content)
+        if size > self.max_cache_bytes:
+            return
+        self._results[key] = result
+        self._cached_bytes += size
+        while self._cached_bytes > self.max_cache_bytes:
+            _, evicted = self._results.popitem(last=False)
+            self._cached_bytes -= len(evicted.content)
@@ -0,0 +1,161 @@
+"""Incremental re-verification of edited documents.
+
+A document is split into sections (paragraphs). JSON reports record the hash
+of every section, the section each claim was found in and the hash of the
+source content each verdict was computed against. Given such a report, only
+the sections that changed are sent to claim extraction, and only the claims
+whose text or source changed are sent to the LLM again.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Union
+
+from .cache import VerdictCache, cache_key
+from .fetcher import normalize_url
+from .models import ClaimCitation
+
+# Claims whose context is not found verbatim are attributed to the section
+# sharing at least this fraction of their words
+MIN_SECTION_OVERLAP = 0.6
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def split_sections(text: str) -> list[str]:
+    """Split a document into sections on blank lines."""
+    return [section.strip() for section in re.split(r"\n\s*\n", text) if section.strip()]
+
+
+def section_hash(section: str) -> str:
+    """Hash a section, ignoring whitespace changes."""
+    return cache_key(" ".join(section.split()))[:16]
+
+
+def assign_sections(claims: list[ClaimCitation], sections: list[str]) -> list[ClaimCitation]:
+    """Set the section_hash of each claim to the section it was found in.
+
+    Claims that cannot be located keep a section_hash of None.
+    """
+    normalized = [" ".join(section.split()).lower() for section in sections]
+    words = [set(_WORD_PATTERN.findall(section)) for section in normalized]
+
+    for claim in claims:
+        claim.section_hash = None
+        context = " ".join(claim.original_context.split()).lower()
+        match = next((i for i, section in enumerate(normalized) if context and context in section), None)
+
+        if match is None:
+            claim_words = set(_WORD_PATTERN.findall(claim.claim_text.lower()))
+            if claim_words:
+                overlaps = [len(claim_words & section_words) / len(claim_words) for section_words in words]
+                best = max(range(len(overlaps)), key=overlaps.__getitem__, default=None)
+                if best is not None and overlaps[best] >= MIN_SECTION_OVERLAP:
+                    match = best
+
+        if match is not None:
+            claim.section_hash = section_hash(sections[match])
+    return claims
+
+
+def complete_sections(hashes: list[str], missing: list[ClaimCitation]) -> list[str]:
+    """Drop the sections that have a claim missing from the report.
+
+    The claims of a recorded section are reused without extraction, so a
+    section is only recorded when every claim extracted from it is in the
+    report (e.g. not when its source was unavailable or its reference
+    undefined). A missing claim of unknown section makes no section safe.
+    """
+    if any(claim.section_hash is None for claim in missing):
+        return []
+    incomplete = {claim.section_hash for claim in missing}
+    return [hash_ for hash_ in hashes if hash_ not in incomplete]
+
+
+@dataclass
+class PreviousRun:
+    """What a previous JSON report tells about an earlier version of a document."""
+    sections: set[str]
+    claims: dict[str, list[ClaimCitation]]
+    verdicts: list[tuple[ClaimCitation, str, dict]] = field(default_factory=list)
+    model: Optional[str] = None
+    prompt_version: Optional[str] = None
+
+    def reusable_claims(self, section: str) -> list[ClaimCitation]:
+        """Return copies of the claims extracted from an unchanged section."""
+        return [claim.model_copy() for claim in self.claims.get(section, [])]
+
+    def seed(self, verdict_cache: Optional[VerdictCache] = None) -> VerdictCache:
+        """Return a verdict cache holding the previous verdicts.
+
+        They are only reused for claims verified with the same model and
+        prompt version against an unchanged source. The previous verdicts
+        come from the caller's report, so they are kept in a cache of their
+        own, in front of verdict_cache, and never written to it.
+        """
+        seeded = VerdictCache(None, memory_entries=len(self.verdicts) + 1024, fallback=verdict_cache)
+        if self.model and self.prompt_version:
+            for claim, source_hash, value in self.verdicts:
+                seeded.put(
+                    claim.claim_text,
+                    normalize_url(claim.citation_url),
+                    source_hash,
+                    self.model,
+                    self.prompt_version,
+                    value,
+                    shared=False
+                )
+        return seeded
+
+
+def load_previous_run(report: Union[str, Path, dict]) -> PreviousRun:
+    """Load a JSON report written by a previous run.
+
+    Args:
+        report: Path to a report written with `cite-verify check --save-report`,
+            or the report itself (e.g. a /verify/document response)
+
+    Raises:
+        ValueError: If the report does not record the document sections
+    """
+    if not isinstance(report, dict):
+        report = json.loads(Path(report).read_text(encoding="utf-8"))
+
+    state = report.get("incremental")
+    if not state or "sections" not in state:
+        raise ValueError("Report has no section hashes; it was not written by an incremental-capable run")
+
+    sections = set(state["sections"])
+    claims: dict[str, list[ClaimCitation]] = {}
+    verdicts = []
+    for item in report.get("results", []):
+        claim = ClaimCitation(
+            claim_text=item["claim"],
+            citation_url=item.get("source_url"),
+            citation_ref=item.get("citation_ref"),
+            original_context=item.get("original_context") or item["claim"],
+            section_hash=item.get("section_hash")
+        )
+        if claim.section_hash is None:
+            # Its section is unknown, so no section can safely skip extraction
+            sections = set()
+        else:
+            claims.setdefault(claim.section_hash, []).append(claim)
+
+        if item.get("source_hash") and claim.citation_url:
+            verdicts.append((claim, item["source_hash"], {
+                "verdict": item["verdict"],
+                "confidence": item["confidence"],
+                "explanation": item["explanation"],
+                "source_quote": item.get("source_quote"),
+                "source_hash": item["source_hash"],
+            }))
+
+    return PreviousRun(
+        sections=sections,
+        claims=claims,
+        verdicts=verdicts,
+        model=state.get("model"),
+        prompt_version=state.get("prompt_version")
+    )
@@ -0,0 +1,262 @@
+"""Shared Anthropic API clients."""
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Optional
+
+import anthropic
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Retries of rate-limited, overloaded and transient failures (the SDK's own
+# retries are disabled so they do not multiply with these)
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+_lock = threading.Lock()
+_client: Optional[anthropic.Anthropic] = None
+# An async client's connection pool belongs to one event loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, anthropic.AsyncAnthropic]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_api_key() -> str:
+    """Return the Anthropic API key from the environment."""
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+    return api_key
+
+
+def get_client() -> anthropic.Anthropic:
+    """Return the process-wide synchronous client, creating it on first use."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = anthropic.Anthropic(api_key=get_api_key(), max_retries=0)
+        return _client
+
+
+def get_async_client() -> anthropic.AsyncAnthropic:
+    """Return the async client for the running event loop.
+
+    The client is created once per loop and reused by every call made on
+    it, so concurrent verifications share one connection pool.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = anthropic.AsyncAnthropic(api_key=get_api_key(), max_retries=0)
+            _async_clients[loop] = client
+        return client
+
+
+@dataclass
+class TokenUsage:
+    """Token counts accumulated over the LLM calls of a run."""
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+    def add(self, response) -> None:
+        """Add the usage reported in an API response."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        self.requests += 1
+        self.input_tokens += getattr(usage, "input_tokens", None) or 0
+        self.output_tokens += getattr(usage, "output_tokens", None) or 0
+        self.cache_creation_input_tokens += getattr(usage, "cache_creation_input_tokens", None) or 0
+        self.cache_read_input_tokens += getattr(usage, "cache_read_input_tokens", None) or 0
+
+    def summary(self) -> str:
+        """One-line summary of the input tokens served from the prompt cache."""
+        return (
+            f"LLM usage: {self.requests} requests, {self.cache_read_input_tokens} input tokens "
+            f"read from cache, {self.cache_creation_input_tokens} written to cache, "
+            f"{self.input_tokens} uncached, {self.output_tokens} output"
+        )
+
+
+class RateLimiter:
+    """Client-side token buckets for requests and input tokens per minute.
+
+    Shared by every LLM call of the process, sync or async. Capacity is
+    reserved up front from an estimate of the input tokens and adjusted
+    once the response reports the actual count.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None):
+        """Create the limiter; a limit of None is not enforced."""
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int) -> float:
+        """Take capacity for one request and return how long to wait before sending it."""
+        with self._lock:
+            self._refill()
+            wait = 0.0
+            if self.requests_per_minute:
+                self._requests -= 1
+                wait = max(wait, -self._requests * 60 / self.requests_per_minute)
+            if self.tokens_per_minute:
+                # A request larger than the bucket waits for a full bucket, not forever
+                self._tokens -= min(tokens, self.tokens_per_minute)
+                wait = max(wait, -self._tokens * 60 / self.tokens_per_minute)
+            return wait
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Give back (or take) the difference between estimated and actual tokens."""
+        if not self.tokens_per_minute:
+            return
+        with self._lock:
+            self._tokens = min(self._tokens + estimated - actual, float(self.tokens_per_minute))
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(
+                self._requests + elapsed * self.requests_per_minute / 60, float(self.requests_per_minute)
+            )
+        if self.tokens_per_minute:
+            self._tokens = min(self._tokens + elapsed * self.tokens_per_minute / 60, float(self.tokens_per_minute))
+
+
+def _env_limit(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+_rate_limiter = RateLimiter(
+    _env_limit("CITE_VERIFY_REQUESTS_PER_MINUTE"),
+    _env_limit("CITE_VERIFY_TOKENS_PER_MINUTE")
+)
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter."""
+    return _rate_limiter
+
+
+def configure_rate_limits(requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None) -> None:
+    """Replace the process-wide rate limits (None disables a limit)."""
+    global _rate_limiter
+    _rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+
+def create_message(client: anthropic.Anthropic, **kwargs):
+    """Call client.messages.create within the rate limits, retrying transient failures.
+
+    Raises:
+        anthropic.APIError: If the call still fails after MAX_RETRIES retries,
+            or fails with an error that is not worth retrying
+    """
+    limiter = get_rate_limiter()
+    estimated = estimate_tokens(kwargs)
+    for attempt in range(MAX_RETRIES + 1):
+        time.sleep(limiter.reserve(estimated))
+        try:
+            response = client.messages.create(**kwargs)
+        except anthropic.APIError as e:
+            delay = _retry_delay(e, attempt)
+            if delay is None:
+                raise
+            print(f"  LLM call failed ({_describe(e)}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        limiter.settle(estimated, _counted_tokens(response, estimated))
+        return response
+
+
+async def create_message_async(client: anthropic.AsyncAnthropic, **kwargs):
+    """Async version of create_message."""
+    limiter = get_rate_limiter()
+    estimated = estimate_tokens(kwargs)
+    for attempt in range(MAX_RETRIES + 1):
+        await asyncio.sleep(limiter.reserve(estimated))
+        try:
+            response = await client.messages.create(**kwargs)
+        except anthropic.APIError as e:
+            delay = _retry_delay(e, attempt)
+            if delay is None:
+                raise
+            print(f"  LLM call failed ({_describe(e)}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        limiter.settle(estimated, _counted_tokens(response, estimated))
+        return response
+
+
+def estimate_tokens(request: dict) -> int:
+    """Rough count of the input tokens of a request (about 4 characters per token)."""
+    chars = 0
+    for message in request.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, str):
+            chars += len(content)
+        else:
+            chars += sum(len(block.get("text", "")) for block in content)
+    return chars // 4 + 1
+
+
+def _counted_tokens(response, default: int) -> int:
+    # Cache reads do not count towards input token limits
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return default
+    return (getattr(usage, "input_tokens", None) or 0) + (getattr(usage, "cache_creation_input_tokens", None) or 0)
+
+
+def _retry_delay(error: anthropic.APIError, attempt: int) -> Optional[float]:
+    """Return how long to wait before retrying, or None if the error is final."""
+    if attempt >= MAX_RETRIES:
+        return None
+    if isinstance(error, anthropic.APIStatusError):
+        if error.status_code not in (408, 409, 429) and error.status_code < 500:
+            return None
+    elif not isinstance(error, anthropic.APIConnectionError):
+        return None
+
+    # Full jitter spreads out the retries of concurrent calls
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def _retry_after(error: anthropic.APIError) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        # HTTP-date form: fall back to the exponential backoff
+        return None
+    return None
+
+
+def _describe(error: anthropic.APIError) -> str:
+    status = getattr(error, "status_code", None)
+    return f"{status} {type(error).__name__}" if status else type(error).__name__
@@ -1,39 +1,552 @@
 import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Callable
 from dotenv import load_dotenv
-from .pipeline import process_document
-from .fetcher import fetch_source
-from .verifier import verify_claim
+from .pipeline import extract_document, load_document
+from .cache import ResultCache, VerdictCache
+from .fetcher import SourceFetcher, normalize_url
+from .incremental import PreviousRun, complete_sections
+from .llm import TokenUsage
+from .workers import get_worker_pool, run_cpu_bound
+from .verifier import (
+    MAX_GROUPED_CLAIMS,
+    MAX_SOURCE_CHARS,
+    min_cacheable_chars,
+    NO_RAG_FETCH_BYTES,
+    lookup_verdict,
+    prepare_contexts,
+    verdict_version,
+    verify_claim,
+    verify_claims_grouped,
+)
+from .models import ClaimCitation, SourceContent, VerificationResult, Verdict
 
 load_dotenv()
 
-async def verify_document(source: str, use_rag: bool = True) -> list:
-    """Vérifie toutes les citations d'un document."""
+# Default concurrency limits for the two network-bound stages
+DEFAULT_MAX_CONCURRENT_FETCHES = 10
+DEFAULT_MAX_CONCURRENT_VERIFICATIONS = 5
+# Documents of a batch processed at once (extraction runs in threads)
+DEFAULT_MAX_CONCURRENT_DOCUMENTS = 4
+
+DEFAULT_MODEL = "claude-3-5-haiku-20241022"
+
+
+@dataclass
+class ConcurrencyLimits:
+    """Bounds on fetches and LLM calls in flight, shareable between documents."""
+    fetches: asyncio.Semaphore
+    verifications: asyncio.Semaphore
+
+    @classmethod
+    def create(cls, max_concurrent_fetches: int, max_concurrent_verifications: int) -> "ConcurrencyLimits":
+        if max_concurrent_fetches < 1 or max_concurrent_verifications < 1:
+            raise ValueError("Concurrency limits must be at least 1")
+        return cls(asyncio.Semaphore(max_concurrent_fetches), asyncio.Semaphore(max_concurrent_verifications))
+
+
+async def verify_document(
+    source: str,
+    use_rag: bool = True,
+    max_concurrent_fetches: int = DEFAULT_MAX_CONCURRENT_FETCHES,
+    max_concurrent_verifications: int = DEFAULT_MAX_CONCURRENT_VERIFICATIONS,
+    fetcher: SourceFetcher | None = None,
+    extraction_cache: ResultCache | None = None,
+    verdict_cache: VerdictCache | None = None,
+    model: str = DEFAULT_MODEL,
+    since: PreviousRun | None = None,
+    group_claims: bool = False,
+    on_progress: Callable[[int, int], None] | None = None,
+    on_result: Callable[[int, VerificationResult], None] | None = None,
+) -> list:
+    """Vérifie toutes les citations d'un document.
+
+    Claims are fetched and verified concurrently. Fetches and LLM calls are
+    bounded by separate limits; set both to 1 for sequential processing.
+
+    Args:
+        source: Path to a file (.md, .html, .pdf) or a URL.
+        use_rag: Whether to use RAG for long sources.
+        max_concurrent_fetches: Maximum number of sources fetched at once.
+        max_concurrent_verifications: Maximum number of LLM calls in flight.
+        fetcher: Fetcher shared across documents; the caller owns its
+            lifetime. A new one is created (and closed) for this document
+            if omitted, so repeated URLs are still downloaded once.
+        extraction_cache: Optional cache of claim extraction results.
+        verdict_cache: Optional cache of verdicts, reused while neither the
+            claim nor the source content changed.
+        model: LLM model used for verification.
+        since: Previous run on an earlier version of the document (see
+            incremental.load_previous_run). Only changed sections are
+            extracted and only changed claim/source pairs are verified.
+        group_claims: Verify the claims citing the same source with one
+            LLM call, sending the source once.
+        on_progress: Called with (claims done, total claims) once claims
+            are extracted and each time claims are done.
+        on_result: Called with (claim index, result) as soon as each claim
+            is verified.
+
+    Returns:
+        List of VerificationResult, in the order the claims appear in the document.
+    """
+    run = await run_verification(
+        source,
+        use_rag=use_rag,
+        max_concurrent_fetches=max_concurrent_fetches,
+        max_concurrent_verifications=max_concurrent_verifications,
+        fetcher=fetcher,
+        extraction_cache=extraction_cache,
+        verdict_cache=verdict_cache,
+        model=model,
+        since=since,
+        group_claims=group_claims,
+        on_progress=on_progress,
+        on_result=on_result,
+    )
+    return run.results
+
+
+@dataclass
+class DocumentRun:
+    """Results of a document verification and what a later incremental run needs."""
+    results: list[VerificationResult]
+    sections: list[str]
+    model: str
+    prompt_version: str
+    usage: TokenUsage = field(default_factory=TokenUsage)
+
+    def incremental_state(self) -> dict:
+        """Return the report entry read back by incremental.load_previous_run."""
+        return {
+            "sections": self.sections,
+            "model": self.model,
+            "prompt_version": self.prompt_version,
+        }
+
+
+async def run_verification(
+    source: str,
+    use_rag: bool = True,
+    max_concurrent_fetches: int = DEFAULT_MAX_CONCURRENT_FETCHES,
+    max_concurrent_verifications: int = DEFAULT_MAX_CONCURRENT_VERIFICATIONS,
+    fetcher: SourceFetcher | None = None,
+    extraction_cache: ResultCache | None = None,
+    verdict_cache: VerdictCache | None = None,
+    model: str = DEFAULT_MODEL,
+    since: PreviousRun | None = None,
+    group_claims: bool = False,
+    on_progress: Callable[[int, int], None] | None = None,
+    on_result: Callable[[int, VerificationResult], None] | None = None,
+    limits: ConcurrencyLimits | None = None,
+) -> DocumentRun:
+    """Same as verify_document, also returning the section hashes of the document.
+
+    `limits`, if given, replaces max_concurrent_fetches and
+    max_concurrent_verifications so that several documents share them.
+    """
+    if limits is None:
+        limits = ConcurrencyLimits.create(max_concurrent_fetches, max_concurrent_verifications)
 
     print(f"Processing: {source}")
 
-    # Extraire les claims
-    claims = process_document(source)
+    # Extraire les claims, off the event loop: parsing is CPU-bound (worker
+    # processes when enabled), extraction waits on the LLM (threads)
+    pool = get_worker_pool()
+    if pool is not None and source.lower().endswith(".pdf"):
+        # Large PDFs fan their pages out to the worker processes themselves
+        document = await asyncio.to_thread(load_document, source, pool)
+    else:
+        document = await run_cpu_bound(load_document, source)
+    claims, sections = await asyncio.to_thread(extract_document, document, extraction_cache, since)
     print(f"Found {len(claims)} verifiable claims")
 
-    results = []
+    if since is not None:
+        # Verdicts of the previous run are reused while the claim and its source are
+        # unchanged; they stay in a run-local cache in front of the shared one
+        verdict_cache = since.seed(verdict_cache)
+
+    usage = TokenUsage()
+    results = await verify_claims(
+        claims,
+        use_rag=use_rag,
+        fetcher=fetcher,
+        verdict_cache=verdict_cache,
+        model=model,
+        group_claims=group_claims,
+        usage=usage,
+        on_progress=on_progress,
+        on_result=on_result,
+        limits=limits,
+    )
+    # Claims left out of the results (unavailable source) must be extracted again next time
+    verified = {(r.claim.claim_text, r.claim.citation_url) for r in results}
+    missing = [c for c in claims if (c.claim_text, c.citation_url) not in verified]
+    return DocumentRun(
+        results=results,
+        sections=complete_sections(sections, missing),
+        model=model,
+        prompt_version=verdict_version(use_rag),
+        usage=usage,
+    )
+
+
+async def verify_claims(
+    claims: list[ClaimCitation],
+    use_rag: bool = True,
+    max_concurrent_fetches: int = DEFAULT_MAX_CONCURRENT_FETCHES,
+    max_concurrent_verifications: int = DEFAULT_MAX_CONCURRENT_VERIFICATIONS,
+    fetcher: SourceFetcher | None = None,
+    verdict_cache: VerdictCache | None = None,
+    model: str = DEFAULT_MODEL,
+    group_claims: bool = False,
+    usage: TokenUsage | None = None,
+    on_progress: Callable[[int, int], None] | None = None,
+    on_result: Callable[[int, VerificationResult], None] | None = None,
+    limits: ConcurrencyLimits | None = None,
+) -> list:
+    """Fetch the sources of already extracted claims and verify them.
+
+    Takes the same options as run_verification, plus an optional usage
+    accumulator for the tokens of the LLM calls. Claim indices passed to
+    on_result are positions in `claims`. Claims whose source is
+    unavailable are left out of the results.
+    """
+    if limits is None:
+        limits = ConcurrencyLimits.create(max_concurrent_fetches, max_concurrent_verifications)
+
+    owns_fetcher = fetcher is None
+    if owns_fetcher:
+        fetcher = SourceFetcher(stop_after_bytes=None if use_rag else NO_RAG_FETCH_BYTES)
+
+    run = _Run(
+        fetcher=fetcher,
+        fetch_limit=limits.fetches,
+        llm_limit=limits.verifications,
+        use_rag=use_rag,
+        model=model,
+        verdict_cache=verdict_cache,
+        total=len(claims),
+        group_claims=group_claims,
+        usage=usage if usage is not None else TokenUsage(),
+        on_progress=on_progress,
+        on_result=on_result,
+    )
+    if on_progress is not None:
+        on_progress(0, run.total)
+
+    # Claims citing the same source are handled together: one fetch, one RAG index
+    groups: dict[str, list[int]] = {}
+    for i, claim in enumerate(claims):
+        groups.setdefault(normalize_url(claim.citation_url), []).append(i)
+
+    outcomes: list[VerificationResult | None] = [None] * len(claims)
+    try:
+        grouped_results = await asyncio.gather(*(
+            _verify_source_group(run, claims, indices) for indices in groups.values()
+        ))
+    finally:
+        if owns_fetcher:
+            await fetcher.aclose()
+
+    for group_results in grouped_results:
+        for i, result in group_results:
+            outcomes[i] = result
+
+    print(
+        f"Fetched {fetcher.downloads} sources "
+        f"({fetcher.reused} reused, {fetcher.cache_hits} from cache)"
+    )
+    if run.usage.requests:
+        print(run.usage.summary())
+
+    return [result for result in outcomes if result is not None]
+
+
+@dataclass
+class BatchItem:
+    """Outcome of one document of a batch: its run, or the error that stopped it."""
+    source: str
+    run: DocumentRun | None = None
+    error: str | None = None
+    seconds: float = 0.0
+
 
-    for i, claim in enumerate(claims, 1):
-        print(f"\n[{i}/{len(claims)}] Verifying: {claim.claim_text[:50]}...")
+async def verify_batch(
+    sources: list[str],
+    use_rag: bool = True,
+    max_concurrent_documents: int = DEFAULT_MAX_CONCURRENT_DOCUMENTS,
+    max_concurrent_fetches: int = DEFAULT_MAX_CONCURRENT_FETCHES,
+    max_concurrent_verifications: int = DEFAULT_MAX_CONCURRENT_VERIFICATIONS,
+    fetcher: SourceFetcher | None = None,
+    extraction_cache: ResultCache | None = None,
+    verdict_cache: VerdictCache | None = None,
+    model: str = DEFAULT_MODEL,
+    group_claims: bool = False,
+    on_document: Callable[[BatchItem], None] | None = None,
+) -> list[BatchItem]:
+    """Verify several documents as one workload.
 
+    All documents share one fetcher, one verdict cache and one set of
+    fetch/LLM limits: a source cited by many documents is downloaded (and
+    embedded) once, and a claim repeated across documents against an
+    unchanged source is verified once. The embedding index of long sources
+    is shared process-wide (see analyzers.retriever).
+
+    Args:
+        sources: Paths or URLs of the documents.
+        max_concurrent_documents: Documents extracted and verified at once.
+        on_document: Called with each BatchItem as soon as its document is done.
+        Other arguments: see verify_document. A memory-only verdict cache is
+            used when none is given.
+
+    Returns:
+        One BatchItem per source, in the order of `sources`. A failing
+        document does not stop the others.
+    """
+    if max_concurrent_documents < 1:
+        raise ValueError("Concurrency limits must be at least 1")
+    limits = ConcurrencyLimits.create(max_concurrent_fetches, max_concurrent_verifications)
+    document_limit = asyncio.Semaphore(max_concurrent_documents)
+
+    owns_fetcher = fetcher is None
+    if owns_fetcher:
+        fetcher = SourceFetcher(stop_after_bytes=None if use_rag else NO_RAG_FETCH_BYTES)
+    if verdict_cache is None:
+        verdict_cache = VerdictCache(None)
+
+    async def verify_one(source: str) -> BatchItem:
+        async with document_limit:
+            start = time.monotonic()
+            try:
+                item = BatchItem(source, run=await run_verification(
+                    source,
+                    use_rag=use_rag,
+                    fetcher=fetcher,
+                    extraction_cache=extraction_cache,
+                    verdict_cache=verdict_cache,
+                    model=model,
+                    group_claims=group_claims,
+                    limits=limits,
+                ))
+            except Exception as e:
+                print(f"Verification failed for {source}: {e}")
+                item = BatchItem(source, error=str(e))
+            item.seconds = time.monotonic() - start
+        if on_document is not None:
+            on_document(item)
+        return item
+
+    try:
+        items = await asyncio.gather(*(verify_one(source) for source in sources))
+    finally:
+        if owns_fetcher:
+            await fetcher.aclose()
+
+    print(
+        f"Verified {sum(item.run is not None for item in items)}/{len(items)} documents; "
+        f"{fetcher.downloads} sources downloaded, {fetcher.reused} fetches shared, "
+        f"{verdict_cache.hits} verdicts reused"
+    )
+    return items
+
+
+@dataclass
+class _Run:
+    """Shared state of one verify_claims call."""
+    fetcher: SourceFetcher
+    fetch_limit: asyncio.Semaphore
+    llm_limit: asyncio.Semaphore
+    use_rag: bool
+    model: str
+    verdict_cache: VerdictCache | None
+    total: int
+    group_claims: bool = False
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    on_progress: Callable[[int, int], None] | None = None
+    on_result: Callable[[int, VerificationResult], None] | None = None
+    done: int = 0
+
+    def advance(self, results: list[tuple[int, VerificationResult]] = (), skipped: int = 0) -> None:
+        """Record finished claims: (index, result) pairs and claims left without result."""
+        if not results and not skipped:
+            return
+        self.done += len(results) + skipped
+        if self.on_result is not None:
+            for i, result in results:
+                self.on_result(i, result)
+        if self.on_progress is not None:
+            self.on_progress(self.done, self.total)
+
+
+async def _verify_source_group(
+    run: _Run,
+    claims: list[ClaimCitation],
+    indices: list[int],
+) -> list[tuple[int, VerificationResult]]:
+    """Fetch one source and verify every claim citing it.
+
+    Returns (claim index, result) pairs. Nothing is returned when the source
+    is unavailable; other failures become INCONCLUSIVE results so they do not
+    abort the rest of the batch.
+    """
+    group = [claims[i] for i in indices]
+
+    try:
         # Fetch la source
-        source_content = await fetch_source(claim.citation_url)
+        async with run.fetch_limit:
+            source_content = await run.fetcher.fetch(group[0].citation_url)
 
         if source_content.fetch_status != "success":
-            print(f"  Source unavailable: {source_content.fetch_status}")
-            continue
+            print(f"Source unavailable ({len(group)} claims): {source_content.fetch_status}")
+            run.advance(skipped=len(group))
+            return []
+
+        # Claims already verified against this version of the source need no LLM call
+        results: dict[int, VerificationResult] = {}
+        for i, claim in zip(indices, group):
+            cached = lookup_verdict(claim, source_content, run.model, run.use_rag, run.verdict_cache)
+            if cached is not None:
+                results[i] = cached
 
+        pending = [(i, claim) for i, claim in zip(indices, group) if i not in results]
+
+        # Long sources are indexed once for all the claims citing them (not
+        # at all when every verdict is cached)
+        contexts = await run_cpu_bound(
+            prepare_contexts, [claim for _, claim in pending], source_content, run.use_rag
+        ) if pending else []
+
+    except Exception as e:
+        print(f"Verification failed for {group[0].citation_url}: {e}")
+        failed = [(i, _failed_result(claim, e)) for i, claim in zip(indices, group)]
+        run.advance(failed)
+        return failed
+
+    run.advance(list(results.items()))
+
+    if run.group_claims:
+        # Claims that see the same part of the source share one LLM call
+        batches: dict[str | None, list[tuple[int, ClaimCitation]]] = {}
+        for item, context in zip(pending, contexts):
+            batches.setdefault(context, []).append(item)
+        verified_batches = await asyncio.gather(*(
+            _verify_batch(run, batch[start:start + MAX_GROUPED_CLAIMS], source_content, context)
+            for context, batch in batches.items()
+            for start in range(0, len(batch), MAX_GROUPED_CLAIMS)
+        ))
+        for batch_results in verified_batches:
+            results.update(batch_results)
+        return [(i, results[i]) for i in indices]
+
+    # Claims sharing a large context are sent once the first one has written
+    # it to the prompt cache, so the others read it instead of paying for it
+    shared: dict[str | None, list[tuple[int, ClaimCitation]]] = {}
+    for item, context in zip(pending, contexts):
+        shared.setdefault(context, []).append(item)
+    verified_groups = await asyncio.gather(*(
+        _verify_sharing_context(run, items, source_content, context)
+        for context, items in shared.items()
+    ))
+    for group_results in verified_groups:
+        results.update(group_results)
+    return [(i, results[i]) for i in indices]
+
+
+async def _verify_sharing_context(
+    run: _Run,
+    items: list[tuple[int, ClaimCitation]],
+    source_content: SourceContent,
+    context: str | None,
+) -> list[tuple[int, VerificationResult]]:
+    """Verify claims sent with the same source excerpt."""
+    content = context if context is not None else source_content.content[:MAX_SOURCE_CHARS]
+    first = []
+    if len(items) > 1 and len(content) >= min_cacheable_chars(run.model):
+        first, items = items[:1], items[1:]
+
+    verified = [
+        await _verify_one(run, i, claim, source_content, context)
+        for i, claim in first
+    ]
+    verified += await asyncio.gather(*(
+        _verify_one(run, i, claim, source_content, context)
+        for i, claim in items
+    ))
+    return list(zip((i for i, _ in first + items), verified))
+
+
+async def _verify_batch(
+    run: _Run,
+    batch: list[tuple[int, ClaimCitation]],
+    source_content: SourceContent,
+    context: str | None,
+) -> list[tuple[int, VerificationResult]]:
+    """Verify several claims against their common source in one call."""
+    claims = [claim for _, claim in batch]
+    try:
+        async with run.llm_limit:
+            verified = await verify_claims_grouped(
+                claims,
+                source_content,
+                model=run.model,
+                use_rag=run.use_rag,
+                context=context,
+                verdict_cache=run.verdict_cache,
+                usage=run.usage,
+            )
+    except Exception as e:
+        print(f"Verification failed for {len(claims)} claims: {e}")
+        failed = [(i, _failed_result(claim, e)) for i, claim in batch]
+        run.advance(failed)
+        return failed
+
+    for (i, claim), result in zip(batch, verified):
+        print(f"[{i + 1}/{run.total}] {claim.claim_text[:50]}... -> {result.verdict.value}")
+    done = list(zip((i for i, _ in batch), verified))
+    run.advance(done)
+    return done
+
+
+async def _verify_one(
+    run: _Run,
+    index: int,
+    claim: ClaimCitation,
+    source_content: SourceContent,
+    context: str | None,
+) -> VerificationResult:
+    """Verify a single claim against its fetched source."""
+    label = f"[{index + 1}/{run.total}]"
+    try:
         # Vérifier
-        result = await verify_claim(claim, source_content, use_rag=use_rag)
-        results.append(result)
+        async with run.llm_limit:
+            result = await verify_claim(
+                claim,
+                source_content,
+                model=run.model,
+                use_rag=run.use_rag,
+                context=context,
+                verdict_cache=run.verdict_cache,
+                usage=run.usage,
+            )
+    except Exception as e:
+        print(f"{label} Verification failed: {e}")
+        result = _failed_result(claim, e)
+        run.advance([(index, result)])
+        return result
+
+    print(f"{label} {claim.claim_text[:50]}... -> {result.verdict.value}")
+    run.advance([(index, result)])
+    return result
 
-        print(f"  Verdict: {result.verdict.value}")
 
-    return results
+def _failed_result(claim: ClaimCitation, error: Exception) -> VerificationResult:
+    return VerificationResult(
+        claim=claim,
+        verdict=Verdict.INCONCLUSIVE,
+        confidence=0.0,
+        explanation=f"Verification failed: {error}"
+    )
 
 
 async def main():
@@ -58,4 +571,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field 
+from pydantic import BaseModel, Field, PrivateAttr
 from enum import Enum
 from typing import Optional 
+import hashlib
 
 class Verdict(str, Enum):
     """List of potential verdicts"""
@@ -16,6 +17,8 @@ class ClaimCitation(BaseModel):
     citation_url: Optional[str] = None      
     citation_ref: Optional[str] = None      
     original_context: str
+    section_hash: Optional[str] = None      # section of the document the claim was found in
+    page: Optional[int] = None              # page of a PDF the claim was found on
     
     @property
     def has_url(self) -> bool:
@@ -24,7 +27,25 @@ class ClaimCitation(BaseModel):
 class SourceContent(BaseModel):
     url : str
     content : Optional[str] =None
-    fetch_status : str ="pending" # success, failed, timeout, paywalled
+    fetch_status : str ="pending" # success, failed, timeout, paywalled, not_modified
+    etag : Optional[str] = None
+    last_modified : Optional[str] = None
+    truncated : bool = False # content was cut short while downloading
+    content_type : Optional[str] = None # media type of the response, e.g. "text/html"
+    raw_content : Optional[bytes] = Field(default=None, repr=False, exclude=True) # body before text extraction
+
+    # (content, hash): the hash is only reused for the very string it was
+    # computed from, so a copy or an assignment with new content re-hashes
+    _hashed : Optional[tuple] = PrivateAttr(default=None)
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        """SHA-256 of the content, identifying this version of the source."""
+        if self.content is None:
+            return None
+        if self._hashed is None or self._hashed[0] is not self.content:
+            self._hashed = (self.content, hashlib.sha256(self.content.encode("utf-8")).hexdigest())
+        return self._hashed[1]
 
 
 class VerificationResult(BaseModel):
@@ -34,4 +55,5 @@ class VerificationResult(BaseModel):
     verdict: Verdict
     confidence: float = Field(ge=0.0, le=1.0)
     explanation: str
-    source_quote: Optional[str] = None
\ No newline at end of file
+    source_quote: Optional[str] = None
+    source_hash: Optional[str] = None # content_hash of the source the verdict was computed against
\ No newline at end of file
@@ -1,19 +1,79 @@
+from concurrent.futures import Executor
+from dataclasses import dataclass
 from pathlib import Path
 from parsers.markdown import parse_document as parse_markdown, resolve_references
 from parsers.html_parser import parse_url, parse_html_file
-from parsers.pdf import parse_pdf
-from extractors.claim_extractor import extract_claims
+from parsers.pdf import page_at, parse_pdf
+from extractors.claim_extractor import extract_claims, merge_claims
+from extractors.regex_extractor import extract_marked_claims
+from .cache import ResultCache
+from .incremental import PreviousRun, assign_sections, complete_sections, section_hash, split_sections
 from .models import ClaimCitation
 
-def process_document(source : str) -> list[ClaimCitation]:
+def process_document(
+    source : str,
+    extraction_cache : ResultCache | None = None,
+    previous : PreviousRun | None = None
+) -> list[ClaimCitation]:
     """ Process a document, either a local file or a URL, and return the claims.
 
         Args:
         source: Path to a file (.md, .html, .pdf) or a URL.
+        extraction_cache: Optional cache of LLM extraction results.
+        previous: Previous run on an earlier version of the document; claims
+            of unchanged sections are reused instead of extracted again.
 
         Returns:
         List of ClaimCitation with resolved URLs."""
-    
+    return extract_document(source, extraction_cache, previous)[0]
+
+
+@dataclass
+class LoadedDocument:
+    """Text of a parsed document, ready for claim extraction."""
+    text : str
+    references : dict[str, str]
+    structured : bool # citations are marked explicitly ([n] references, links)
+    page_offsets : list[int] | None = None # PDF: offset in text of the start of each page
+    first_page : int = 1 # PDF: number of the first page in text
+
+
+def extract_document(
+    source : "str | LoadedDocument",
+    extraction_cache : ResultCache | None = None,
+    previous : PreviousRun | None = None
+) -> tuple[list[ClaimCitation], list[str]]:
+    """ Same as process_document, also returning the hashes of the document sections
+        whose claims are all verifiable (see incremental.complete_sections).
+
+        The document may already be loaded (see load_document)."""
+    document = load_document(source) if isinstance(source, str) else source
+    text = document.text
+    references = document.references
+    structured = document.structured
+
+    sections = split_sections(text)
+    hashes = [section_hash(section) for section in sections]
+
+    if previous is None:
+        claims = _extract_text(text, references, structured, extraction_cache)
+        claims = assign_sections(resolve_references(claims, references), sections)
+    else:
+        claims = _extract_changed_sections(sections, hashes, references, structured, extraction_cache, previous)
+    if document.page_offsets:
+        claims = _assign_pages(claims, text, document.page_offsets, document.first_page)
+
+    verifiable_claims= [c for c in claims if c.citation_url]
+    # Sections with an unresolved claim are extracted again next time
+    unresolved = [c for c in claims if not c.citation_url]
+    return verifiable_claims, complete_sections(hashes, unresolved)
+
+
+def load_document(source : str, executor : Executor | None = None) -> LoadedDocument:
+    """ Parse a local file or a URL into text and references.
+
+        CPU-bound for PDF and HTML; see workers.run_cpu_bound. The pages of
+        a PDF are extracted in the executor when one is given."""
     if source.startswith("http://") or source.startswith("https://"):
         page=parse_url(source)
         if page.fetch_status !="success":
@@ -21,31 +81,106 @@ def process_document(source : str) -> list[ClaimCitation]:
         
         text=page.text
         references={}
+        structured=False
     else:
         path=Path(source)
         if not path.exists():
             raise FileNotFoundError(f"File not found: {source}")
         
         suffix= path.suffix.lower()
+        structured=False
         if suffix==".md":
             doc=parse_markdown(source)
             text=doc.text
             references=doc.references
+            structured=True
         elif suffix in [".html", ".htm"]:
             page= parse_html_file(source)
             text=page.text
             references={}
         
         elif suffix==".pdf":
-            doc = parse_pdf(source)
-            text = doc.text
-            references = doc.references
+            doc = parse_pdf(source, executor=executor)
+            return LoadedDocument(
+                text=doc.text,
+                references=doc.references,
+                structured=bool(doc.references),
+                page_offsets=doc.page_offsets,
+                first_page=doc.first_page
+            )
         else:
             text=path.read_text(encoding="utf-8")
             references={}
 
-    claims=extract_claims(text)
-    claims=resolve_references(claims, references)
+    return LoadedDocument(text=text, references=references, structured=structured)
 
-    verifiable_claims= [c for c in claims if c.citation_url]
-    return verifiable_claims
\ No newline at end of file
+
+def _assign_pages(
+    claims : list[ClaimCitation],
+    text : str,
+    page_offsets : list[int],
+    first_page : int = 1
+) -> list[ClaimCitation]:
+    """ Set the page (1-based) each claim was found on, when its context is in the text."""
+    for claim in claims:
+        position = text.find(claim.original_context) if claim.original_context else -1
+        if position < 0:
+            position = text.find(claim.claim_text)
+        claim.page = page_at(page_offsets, position, first_page) if position >= 0 else None
+    return claims
+
+
+def _extract_text(text : str, references : dict, structured : bool, extraction_cache : ResultCache | None) -> list[ClaimCitation]:
+    if structured:
+        # Fast path: explicit [n] markers and links need no LLM; only
+        # unresolved prose citations ("according to McKinsey") are sent to it
+        claims, remaining = extract_marked_claims(text, references)
+        if remaining:
+            claims = merge_claims([claims, extract_claims(remaining, cache=extraction_cache)])
+    else:
+        claims=extract_claims(text, cache=extraction_cache)
+    return claims
+
+
+def _extract_changed_sections(
+    sections : list[str],
+    hashes : list[str],
+    references : dict,
+    structured : bool,
+    extraction_cache : ResultCache | None,
+    previous : PreviousRun
+) -> list[ClaimCitation]:
+    """ Reuse the claims of unchanged sections and extract the others."""
+    reused=[]
+    changed=[]
+    seen=set()
+    for section, hash_ in zip(sections, hashes):
+        if hash_ in previous.sections:
+            if hash_ not in seen:
+                reused.extend(previous.reusable_claims(hash_))
+            seen.add(hash_)
+        else:
+            changed.append(section)
+
+    print(f"Reusing claims of {len(sections) - len(changed)} unchanged sections, extracting {len(changed)} changed sections")
+
+    # References are resolved again: a reference definition may have changed
+    for claim in reused:
+        if claim.citation_ref and _is_defined(claim.citation_ref, references):
+            claim.citation_url = None
+
+    extracted = _extract_text("\n\n".join(changed), references, structured, extraction_cache) if changed else []
+    extracted = assign_sections(extracted, changed)
+    claims = resolve_references(reused + extracted, references)
+
+    # Back in document order
+    position = {}
+    for i, hash_ in enumerate(hashes):
+        position.setdefault(hash_, i)
+    claims.sort(key=lambda claim: position.get(claim.section_hash, len(hashes)))
+    return merge_claims([claims])
+
+
+def _is_defined(ref : str, references : dict) -> bool:
+    ref = ref.strip()
+    return ref in references or f"[{ref}]" in references
\ No newline at end of file
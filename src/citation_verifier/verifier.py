@@ -1,26 +1,27 @@
-import anthropic
+import json
+from typing import Optional
+from .cache import VerdictCache, cache_key
+from .fetcher import normalize_url
+from .llm import TokenUsage, create_message_async, get_async_client
 from .models import ClaimCitation, SourceContent, VerificationResult, Verdict
-from dotenv import load_dotenv
-import os
+from .workers import run_cpu_bound
 
-load_dotenv()
+# The source block comes first so it forms a prefix shared by every claim
+# verified against the same content, and is marked for Anthropic prompt caching
+SOURCE_PROMPT= """Tu es un vérificateur de citations. Ta tâche est de déterminer si une source citée supporte réellement les affirmations faites.
 
-# Verify API key exists
-api_key = os.getenv("ANTHROPIC_API_KEY")
-if not api_key:
-    raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
-
-client = anthropic.Anthropic(api_key=api_key)
-print("✓ Claude API client initialized successfully")
+CONTENU DE LA SOURCE CITÉE:
+{source_content}
 
-VERIFICATION_PROMPT= """Tu es un vérificateur de citations. Ta tâche est de déterminer si une source citée supporte réellement l'affirmation faite.
+Critères:
+- SUPPORTED: La source dit explicitement ce que l'affirmation prétend
+- NOT_SUPPORTED: La source contredit l'affirmation ou ne mentionne pas le sujet
+- PARTIAL: La source supporte partiellement (chiffres différents, nuances omises)
+- INCONCLUSIVE: Impossible de déterminer avec certitude"""
 
-AFFIRMATION À VÉRIFIER:
+VERIFICATION_PROMPT= """AFFIRMATION À VÉRIFIER:
 {claim}
 
-CONTENU DE LA SOURCE CITÉE:
-{source_content}
-
 Analyse si la source supporte l'affirmation. Réponds en JSON avec ce format exact:
 {{
     "verdict": "supported|not_supported|partial|inconclusive",
@@ -29,21 +30,138 @@ Analyse si la source supporte l'affirmation. Réponds en JSON avec ce format exa
     "source_quote": "Citation exacte de la source qui justifie ton verdict (ou null)"
 }}
 
-Critères:
-- SUPPORTED: La source dit explicitement ce que l'affirmation prétend
-- NOT_SUPPORTED: La source contredit l'affirmation ou ne mentionne pas le sujet
-- PARTIAL: La source supporte partiellement (chiffres différents, nuances omises)
-- INCONCLUSIVE: Impossible de déterminer avec certitude
+Réponds UNIQUEMENT avec le JSON, rien d'autre."""
+
+GROUPED_VERIFICATION_PROMPT= """AFFIRMATIONS À VÉRIFIER:
+{claims}
+
+Analyse chaque affirmation indépendamment. Réponds en JSON avec ce format exact, avec une entrée par affirmation:
+{{
+    "results": [
+        {{
+            "id": 1,
+            "verdict": "supported|not_supported|partial|inconclusive",
+            "confidence": 0.0-1.0,
+            "explanation": "Explication claire de ton verdict",
+            "source_quote": "Citation exacte de la source qui justifie ton verdict (ou null)"
+        }}
+    ]
+}}
 
 Réponds UNIQUEMENT avec le JSON, rien d'autre."""
 
+# Identifies the prompts in cached verdicts; changes whenever a prompt is edited
+PROMPT_VERSION = cache_key(SOURCE_PROMPT, VERIFICATION_PROMPT, GROUPED_VERIFICATION_PROMPT)[:12]
+
+# Minimum cacheable prompt length in tokens, by model name fragment (first
+# match wins); shorter source blocks are not cached and not worth waiting for
+MIN_CACHEABLE_TOKENS = [
+    ("haiku-4", 4096),
+    ("opus-4-5", 4096),
+    ("haiku", 2048),
+]
+DEFAULT_MIN_CACHEABLE_TOKENS = 1024
+
+# Maximum number of claims verified in a single grouped call
+MAX_GROUPED_CLAIMS = 10
+
+# Sources longer than this are searched with RAG (or truncated without it)
+MAX_SOURCE_CHARS = 15000
+RAG_CONTEXT_CHARS = 6000
+# Without RAG only the first MAX_SOURCE_CHARS of a source are read, so the
+# download stops after this many bytes (room for the markup around the text)
+NO_RAG_FETCH_BYTES = 512 * 1024
+
+
+def min_cacheable_chars(model: str) -> int:
+    """Length of the shortest source block the model caches (about 4 characters per token)."""
+    tokens = next(
+        (tokens for fragment, tokens in MIN_CACHEABLE_TOKENS if fragment in model),
+        DEFAULT_MIN_CACHEABLE_TOKENS
+    )
+    return tokens * 4
+
+
+def prepare_contexts(
+        claims : list[ClaimCitation],
+        source : SourceContent,
+        use_rag : bool = True
+) -> list[Optional[str]]:
+    """Select the source content to send for each claim citing one source.
+
+    For long sources with RAG enabled, the source is indexed once and all
+    claims are searched in a single batch. Returns None for every claim when
+    the whole source fits, so verify_claim falls back to its default.
+    """
+    if not claims:
+        # Nothing to search for: do not index the source
+        return []
+    if not source.content or not use_rag or len(source.content) <= MAX_SOURCE_CHARS:
+        return [None] * len(claims)
+
+    try:
+        from analyzers.retriever import get_relevant_contexts
+        contexts = get_relevant_contexts(
+            [claim.claim_text for claim in claims],
+            source.content,
+            max_context_chars=RAG_CONTEXT_CHARS,
+            source_url=normalize_url(source.url)
+        )
+        print(f"  Using RAG: Retrieved context for {len(claims)} claims from {source.url}")
+        return contexts
+    except Exception as e:
+        # Fallback to truncation if RAG fails
+        print(f"  RAG retrieval failed: {e}, falling back to truncation")
+        return [source.content[:MAX_SOURCE_CHARS]] * len(claims)
+
+
+def verdict_version(use_rag: bool) -> str:
+    """Identify the prompt and context selection a verdict was computed with."""
+    # RAG changes which part of a long source the model sees
+    return f"{PROMPT_VERSION}-{'rag' if use_rag else 'truncate'}"
+
+
+def lookup_verdict(
+        claim : ClaimCitation,
+        source : SourceContent,
+        model : str,
+        use_rag : bool,
+        verdict_cache : Optional[VerdictCache]
+) -> Optional[VerificationResult]:
+    """Return the cached verdict for this claim and source version, if any."""
+    if verdict_cache is None or not source.content:
+        return None
+
+    cached = verdict_cache.get(
+        claim.claim_text, normalize_url(source.url), source.content_hash, model, verdict_version(use_rag)
+    )
+    if cached is None:
+        return None
+    return VerificationResult(claim=claim, **{**cached, "source_hash": source.content_hash})
+
+
 async def verify_claim(
         claim : ClaimCitation,
         source : SourceContent,
         model : str ="claude-3-5-haiku-20241022",
-        use_rag: bool = True
+        use_rag: bool = True,
+        context: Optional[str] = None,
+        verdict_cache: Optional[VerdictCache] = None,
+        usage: Optional[TokenUsage] = None
 ) -> VerificationResult:
-    """Verify if a source support the claim """
+    """Verify if a source support the claim
+
+    Args:
+        claim: The claim to verify
+        source: The fetched source
+        model: LLM model to use
+        use_rag: Whether to use RAG for long sources
+        context: Source excerpt already selected for this claim (see
+            prepare_contexts). Computed from the source if omitted.
+        verdict_cache: Optional cache of verdicts, keyed by claim, source
+            content hash, model and prompt version
+        usage: Optional accumulator of the tokens used by the call
+    """
 
     if source.fetch_status != "success" or not source.content:
         return VerificationResult(
@@ -53,41 +171,153 @@ async def verify_claim(
             explanation = f"Source unavailable : {source.fetch_status}"
         )
 
-    # Use RAG for long documents (if enabled and document is long enough)
-    if use_rag and len(source.content) > 15000:
-        try:
-            from analyzers.retriever import get_relevant_context
-            content = get_relevant_context(claim.claim_text, source.content, max_context_chars=6000)
-            print(f"  Using RAG: Retrieved {len(content)} chars of relevant context")
-        except Exception as e:
-            # Fallback to truncation if RAG fails
-            print(f"  RAG retrieval failed: {e}, falling back to truncation")
-            content = source.content[:15000]
-    else:
-        # Truncate if too long and RAG is disabled
-        content = source.content[:15000] if len(source.content) > 15000 else source.content
-    client = anthropic.Anthropic(api_key=api_key)
-    print("Claude API client initialized successfully")
-
-    response = client.messages.create(
+    cached = lookup_verdict(claim, source, model, use_rag, verdict_cache)
+    if cached is not None:
+        return cached
+
+    if context is None:
+        # Chunking and encoding a long source would block the event loop
+        context = (await run_cpu_bound(prepare_contexts, [claim], source, use_rag))[0]
+
+    # Truncate if too long and RAG is disabled
+    content = context if context is not None else source.content[:MAX_SOURCE_CHARS]
+
+    client = get_async_client()
+
+    response = await create_message_async(
+        client ,
         model = model ,
         max_tokens = 1024 ,
-        messages = [{
-            "role" : "user",
-            "content" : VERIFICATION_PROMPT.format(
-                claim = claim.claim_text,
-                source_content = content
-            )
-        }]
+        messages = _messages(content, VERIFICATION_PROMPT.format(claim = claim.claim_text))
     )
+    if usage is not None:
+        usage.add(response)
 
-    import json
     result_data = json.loads(response.content[0].text)
 
+    result = _parse_result(claim, source, result_data)
+    _store_verdict(result, source, model, use_rag, verdict_cache)
+    return result
+
+
+async def verify_claims_grouped(
+        claims : list[ClaimCitation],
+        source : SourceContent,
+        model : str ="claude-3-5-haiku-20241022",
+        use_rag: bool = True,
+        context: Optional[str] = None,
+        verdict_cache: Optional[VerdictCache] = None,
+        usage: Optional[TokenUsage] = None
+) -> list[VerificationResult]:
+    """Verify several claims citing the same source with a single LLM call
+
+    The source is sent once with a numbered list of the claims. Claims
+    whose verdict cannot be parsed from the answer are verified one by one
+    with verify_claim.
+
+    Args:
+        claims: Claims citing the source (at most MAX_GROUPED_CLAIMS)
+        source: The fetched source
+        model: LLM model to use
+        use_rag: Whether to use RAG for long sources
+        context: Source excerpt shared by all the claims (see
+            prepare_contexts). The source itself is used if omitted.
+        verdict_cache: Optional cache of verdicts
+        usage: Optional accumulator of the tokens used by the calls
+
+    Returns:
+        One VerificationResult per claim, in the same order
+    """
+    if len(claims) == 1 or source.fetch_status != "success" or not source.content:
+        return [
+            await verify_claim(claim, source, model, use_rag, context, verdict_cache, usage)
+            for claim in claims
+        ]
+
+    results: list[Optional[VerificationResult]] = [
+        lookup_verdict(claim, source, model, use_rag, verdict_cache) for claim in claims
+    ]
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    if len(pending) > 1:
+        content = context if context is not None else source.content[:MAX_SOURCE_CHARS]
+        numbered = "\n".join(f"{n}. {claims[i].claim_text}" for n, i in enumerate(pending, start=1))
+
+        client = get_async_client()
+
+        response = await create_message_async(
+            client ,
+            model = model ,
+            max_tokens = min(4096, 512 * len(pending) + 512) ,
+            messages = _messages(content, GROUPED_VERIFICATION_PROMPT.format(claims = numbered))
+        )
+        if usage is not None:
+            usage.add(response)
+
+        try:
+            entries = json.loads(response.content[0].text)["results"]
+            by_id = {int(entry["id"]): entry for entry in entries}
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            print(f"  Grouped verification answer could not be parsed ({e}), verifying claims one by one")
+            by_id = {}
+
+        for n, i in enumerate(pending, start=1):
+            try:
+                results[i] = _parse_result(claims[i], source, by_id[n])
+            except (KeyError, TypeError, ValueError):
+                continue
+            _store_verdict(results[i], source, model, use_rag, verdict_cache)
+
+    # Fallback for the claims missing from (or malformed in) the grouped answer
+    for i, result in enumerate(results):
+        if result is None:
+            results[i] = await verify_claim(claims[i], source, model, use_rag, context, verdict_cache, usage)
+
+    return results
+
+
+def _messages(source_content : str, claim_prompt : str) -> list[dict]:
+    """Build the request: cacheable source block first, claim-specific text last."""
+    return [{
+        "role" : "user",
+        "content" : [
+            {
+                "type" : "text",
+                "text" : SOURCE_PROMPT.format(source_content = source_content),
+                "cache_control" : {"type" : "ephemeral"}
+            },
+            {
+                "type" : "text",
+                "text" : claim_prompt
+            }
+        ]
+    }]
+
+
+def _parse_result(claim : ClaimCitation, source : SourceContent, result_data : dict) -> VerificationResult:
     return VerificationResult(
         claim=claim.model_dump(),
         verdict=Verdict(result_data["verdict"]),
         confidence=result_data["confidence"],
         explanation=result_data["explanation"],
-        source_quote=result_data.get("source_quote")
-    )
\ No newline at end of file
+        source_quote=result_data.get("source_quote"),
+        source_hash=source.content_hash
+    )
+
+
+def _store_verdict(
+        result : VerificationResult,
+        source : SourceContent,
+        model : str,
+        use_rag : bool,
+        verdict_cache : Optional[VerdictCache]
+) -> None:
+    if verdict_cache is not None:
+        verdict_cache.put(
+            result.claim.claim_text,
+            normalize_url(source.url),
+            source.content_hash,
+            model,
+            verdict_version(use_rag),
+            result.model_dump(mode="json", exclude={"claim"})
+        )
\ No newline at end of file
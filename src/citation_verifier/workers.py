@@ -0,0 +1,81 @@
+"""Process pool for the CPU-bound stages of the pipeline.
+
+Document parsing (PyMuPDF, trafilatura) and embedding of long sources hold
+the GIL, so running them in threads stalls the event loop and uses a single
+core. With workers enabled they run in separate processes instead.
+
+Workers are off by default (threads are used, as before). Enable them with
+CITE_VERIFY_WORKERS=<n> or configure_workers(n). Each worker that embeds
+sources loads its own copy of the embedding model (~400MB).
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_workers = int(os.getenv("CITE_VERIFY_WORKERS", "0"))
+_embedding_store: Optional[str] = os.getenv("CITE_VERIFY_EMBEDDING_STORE")
+
+
+def configure_workers(workers: int, embedding_store: Optional[str] = None) -> None:
+    """Set the number of worker processes (0 to run CPU-bound stages in threads).
+
+    Args:
+        workers: Number of worker processes
+        embedding_store: Directory of the persistent embedding store the
+            workers should use (see analyzers.vector_store)
+    """
+    global _workers, _embedding_store
+    if workers < 0:
+        raise ValueError("Number of workers cannot be negative")
+    shutdown_workers()
+    with _lock:
+        _workers = workers
+        _embedding_store = embedding_store
+
+
+def get_worker_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the process pool, creating it on first use, or None if disabled."""
+    global _pool
+    with _lock:
+        if _workers and _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=_workers,
+                initializer=_init_worker,
+                initargs=(_embedding_store,)
+            )
+        return _pool
+
+
+def shutdown_workers() -> None:
+    """Stop the worker processes; they are started again on next use."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def run_cpu_bound(func: Callable[..., T], *args) -> T:
+    """Run func(*args) in a worker process, or in a thread if workers are disabled.
+
+    func and its arguments must be picklable (module-level functions and
+    plain data) when workers are enabled.
+    """
+    pool = get_worker_pool()
+    if pool is None:
+        return await asyncio.to_thread(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+
+
+def _init_worker(embedding_store: Optional[str]) -> None:
+    """Set up a worker process: same embedding store as the parent."""
+    if embedding_store:
+        from analyzers.retriever import set_embedding_store
+        from analyzers.vector_store import EmbeddingStore
+        set_embedding_store(EmbeddingStore(embedding_store))
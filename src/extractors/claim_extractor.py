@@ -1,14 +1,11 @@
 import json
-from anthropic import Anthropic
+import anthropic
+from concurrent.futures import ThreadPoolExecutor
+from analyzers.chunker import chunk_by_paragraphs, chunk_text
+from typing import Optional
+from citation_verifier.cache import ResultCache, cache_key
+from citation_verifier.llm import create_message, get_client
 from citation_verifier.models import ClaimCitation
-from dotenv import load_dotenv
-import os 
-load_dotenv()
-
-# Verify API key exists
-api_key = os.getenv("ANTHROPIC_API_KEY")
-if not api_key:
-    raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
 
 
 EXTRACTION_PROMPT="""Analyse ce document et extrais TOUTES les affirmations qui citent une source externe.
@@ -42,16 +39,111 @@ Règles:
 
 Réponds UNIQUEMENT avec le JSON."""
 
-def extract_claims( document_text:str , model : str ="claude-3-5-haiku-20241022") -> list[ClaimCitation]:
+# Documents longer than this are split into segments extracted in parallel
+MAX_EXTRACTION_CHARS = 15000
+SEGMENT_CHARS = 12000
+SEGMENT_OVERLAP_CHARS = 1000
+MAX_PARALLEL_SEGMENTS = 4
+
+
+def extract_claims(
+    document_text: str,
+    model: str = "claude-3-5-haiku-20241022",
+    max_workers: int = MAX_PARALLEL_SEGMENTS,
+    cache: Optional[ResultCache] = None
+) -> list[ClaimCitation]:
+    """Extract claim/citation pairs of a document
+
+    Long documents are split on paragraph boundaries into overlapping
+    segments that are extracted concurrently; claims found in several
+    segments are merged.
+
+    Args:
+        document_text: Full text of the document
+        model: LLM model to use
+        max_workers: Maximum number of segments extracted at once
+        cache: Optional cache of extraction results, keyed by the hash of
+            the text, the extraction prompt and the model
+    """
+    if len(document_text) <= MAX_EXTRACTION_CHARS:
+        return _extract_segment(document_text, model, cache)
+
+    segments = split_into_segments(document_text)
+    print(f"Extracting claims from {len(segments)} segments")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda segment: _extract_segment(segment, model, cache), segments))
+
+    return merge_claims(results)
+
+
+def split_into_segments(
+    document_text: str,
+    segment_chars: int = SEGMENT_CHARS,
+    overlap_chars: int = SEGMENT_OVERLAP_CHARS
+) -> list[str]:
+    """Split a document on paragraph boundaries into overlapping segments.
+
+    Each segment starts with the tail of the previous one so that a claim
+    spanning a boundary is fully contained in at least one segment.
+    """
+    segments = []
+    for chunk in chunk_by_paragraphs(document_text, max_chunk_size=segment_chars):
+        if len(chunk.text) > MAX_EXTRACTION_CHARS:
+            # A single paragraph larger than a segment: fall back to sentence boundaries
+            segments.extend(c.text for c in chunk_text(chunk.text, chunk_size=segment_chars, overlap=overlap_chars))
+        else:
+            segments.append(chunk.text)
+
+    overlapped = segments[:1]
+    for previous, segment in zip(segments, segments[1:]):
+        tail = previous[-overlap_chars:]
+        # Start the overlap on a paragraph boundary when possible
+        boundary = tail.find("\n\n")
+        if boundary != -1:
+            tail = tail[boundary + 2:]
+        overlapped.append(f"{tail}\n\n{segment}" if tail else segment)
+    return overlapped
+
+
+def merge_claims(results: list[list[ClaimCitation]]) -> list[ClaimCitation]:
+    """Merge claims extracted from several segments, dropping duplicates.
+
+    Claims are considered duplicates when they have the same normalized
+    text and the same citation. Document order is preserved.
+    """
+    merged = []
+    seen = set()
+    for claims in results:
+        for claim in claims:
+            key = (
+                " ".join(claim.claim_text.lower().split()),
+                claim.citation_url or (claim.citation_ref or "").strip()
+            )
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(claim)
+    return merged
+
 
-    """Extract claim/citation pairs of a document"""
+def _extract_segment(text: str, model: str, cache: Optional[ResultCache] = None) -> list[ClaimCitation]:
+    """Extract claims from one piece of text with a single LLM call.
 
-    client = Anthropic(api_key=api_key)
+    Successful extractions are stored in the cache; failures are not, so
+    they are retried on the next run.
+    """
+    key = cache_key(model, EXTRACTION_PROMPT, text)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return [ClaimCitation(**item) for item in cached]
+
+    client = get_client()
 
-    text = document_text[:15000] if len(document_text) > 15000 else document_text
-    
     try:
-        response = client.messages.create(
+        response = create_message(
+            client,
             model=model,
             max_tokens=4096,
             messages=[{
@@ -75,6 +167,8 @@ def extract_claims( document_text:str , model : str ="claude-3-5-haiku-20241022"
                 original_context=item["original_context"]
             ))
 
+        if cache is not None:
+            cache.put(key, [claim.model_dump() for claim in claims])
         return claims
 
     except json.JSONDecodeError as e:
@@ -83,6 +177,9 @@ def extract_claims( document_text:str , model : str ="claude-3-5-haiku-20241022"
     except KeyError as e:
         print(f"Error: Missing expected field in response: {e}")
         return []
+    except anthropic.APIError:
+        # Already retried: losing the claims of a segment silently would be worse than failing
+        raise
     except Exception as e:
         print(f"Error during claim extraction: {e}")
-        return []
\ No newline at end of file
+        return []
@@ -0,0 +1,190 @@
+"""Deterministic claim extraction for documents with explicit citations."""
+import re
+from citation_verifier.models import ClaimCitation
+
+# Reference list entries: "[1]: https://..." or "[1] https://...", with an
+# optional Markdown title: "[1]: https://... "Title""
+REFERENCE_LINE_PATTERN = re.compile(
+    r'^\s*\[(\d+)\]:?\s+https?://\S+(?:\s+(?:"[^"]*"|\'[^\']*\'|\([^)]*\)))?\s*$',
+    re.MULTILINE
+)
+# "[1]", and grouped markers: "[1, 2]", "[1-3]", "[1–3]"
+MARKER_PATTERN = re.compile(r'\[(\d+(?:\s*[-–,]\s*\d+)*)\]')
+# Any other bracket holding a number ("[1a]", "[see 2]") is left to the LLM
+OTHER_MARKER_PATTERN = re.compile(r'\[[^\]\[]*\d[^\]\[]*\]')
+# Ranges longer than this are not expanded (most likely not a citation)
+MAX_MARKER_RANGE = 50
+# Images are not citations: "![alt](https://...)"
+IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+# Bullet or number of a list item
+LIST_ITEM_PATTERN = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+')
+INLINE_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\((https?://[^)\s]+)\)')
+BARE_URL_PATTERN = re.compile(r'https?://[^\s<>"\]]+')
+# Split after sentence punctuation, but keep a trailing "[n]" with its sentence
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+(?!\[\d)')
+# Words whose period does not end the sentence ("e.g.", "U.S." and other
+# initials are recognized by INITIALS_PATTERN)
+ABBREVIATIONS = {
+    "al.", "cf.", "vs.", "fig.", "figs.", "no.", "nos.", "vol.", "p.", "pp.", "eq.", "sec.", "ch.",
+    "ed.", "eds.", "approx.", "dr.", "mr.", "mrs.", "ms.", "prof.", "inc.", "ltd.", "corp.", "co.",
+    "jr.", "sr.", "st.", "mt.", "resp.",
+}
+INITIALS_PATTERN = re.compile(r'^(?:[A-Za-z]\.)+$')
+
+# Phrases announcing a citation without a marker or link ("according to McKinsey")
+PROSE_CITATION_PATTERN = re.compile(
+    r"\b(according to|as reported by|reported by|a (?:recent )?(?:study|survey|report|paper) (?:by|from)|"
+    r"published (?:by|in)|cited by|selon|d'après|une étude|un rapport|une enquête)\b",
+    re.IGNORECASE
+)
+
+
+def extract_marked_claims(
+    document_text: str,
+    references: dict[str, str]
+) -> tuple[list[ClaimCitation], str]:
+    """Extract claims carrying [n] markers or links, without calling the LLM.
+
+    Sentences with a [n] marker found in the references, a Markdown inline
+    link or a bare URL become claims directly. Sentences that look like a
+    prose citation ("according to McKinsey") or whose marker cannot be
+    resolved are returned for LLM extraction.
+
+    Args:
+        document_text: Full text of the document
+        references: Mapping of "[n]" to URL, as returned by the parsers
+
+    Returns:
+        The extracted claims, and the text still needing LLM extraction
+        (empty when everything was resolved).
+    """
+    text = REFERENCE_LINE_PATTERN.sub('', document_text)
+
+    claims = []
+    unresolved = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph or paragraph.startswith('#'):
+            continue
+
+        pending = []
+        for line in paragraph.splitlines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            for sentence in _split_sentences(line):
+                sentence_claims, needs_llm = _claims_from_sentence(sentence.strip(), references)
+                claims.extend(sentence_claims)
+                if needs_llm:
+                    pending.append(sentence.strip())
+
+        if pending:
+            unresolved.append(' '.join(pending))
+
+    return claims, '\n\n'.join(unresolved)
+
+
+def _split_sentences(line: str) -> list[str]:
+    """Split a line into sentences, not after abbreviations and initials."""
+    sentences = []
+    start = 0
+    for match in SENTENCE_SPLIT_PATTERN.finditer(line):
+        last_word = line[start:match.start()].rsplit(None, 1)[-1]
+        if last_word.lower() in ABBREVIATIONS or INITIALS_PATTERN.match(last_word):
+            continue
+        sentences.append(line[start:match.start()])
+        start = match.end()
+    sentences.append(line[start:])
+    return sentences
+
+
+def _claims_from_sentence(
+    sentence: str,
+    references: dict[str, str]
+) -> tuple[list[ClaimCitation], bool]:
+    """Return the claims of one sentence and whether it still needs the LLM."""
+    sentence = IMAGE_PATTERN.sub('', sentence).strip()
+    if not _has_text(sentence):
+        return [], False
+
+    citations = []  # (url, ref)
+    unresolved_marker = False
+
+    for match in MARKER_PATTERN.finditer(sentence):
+        numbers = _marker_numbers(match.group(1))
+        if not numbers:
+            unresolved_marker = True
+        for number in numbers:
+            ref = f"[{number}]"
+            if ref in references:
+                citations.append((references[ref], ref))
+            else:
+                unresolved_marker = True
+
+    for _, url in INLINE_LINK_PATTERN.findall(sentence):
+        citations.append((url, None))
+
+    without_links = INLINE_LINK_PATTERN.sub('', sentence)
+    if OTHER_MARKER_PATTERN.search(MARKER_PATTERN.sub('', without_links)):
+        unresolved_marker = True
+    for url in BARE_URL_PATTERN.findall(without_links):
+        citations.append((url.rstrip('.,;:)'), None))
+
+    if not citations:
+        return [], unresolved_marker or bool(PROSE_CITATION_PATTERN.search(sentence))
+
+    claim_text = _clean_sentence(sentence)
+    seen = set()
+    claims = []
+    for url, ref in citations:
+        if url in seen:
+            continue
+        seen.add(url)
+        claims.append(ClaimCitation(
+            claim_text=claim_text,
+            citation_url=url,
+            citation_ref=ref,
+            original_context=sentence
+        ))
+    return claims, unresolved_marker
+
+
+def _marker_numbers(marker: str) -> list[int]:
+    """Expand the content of a marker ("1, 3-5") into reference numbers.
+
+    Returns an empty list when a range is reversed or too long.
+    """
+    numbers = []
+    for item in marker.split(','):
+        bounds = [int(bound) for bound in re.split(r'[-–]', item)]
+        if len(bounds) == 1:
+            numbers.append(bounds[0])
+            continue
+        start, end = bounds[0], bounds[-1]
+        if len(bounds) > 2 or end < start or end - start >= MAX_MARKER_RANGE:
+            return []
+        numbers.extend(range(start, end + 1))
+    return numbers
+
+
+def _has_text(sentence: str) -> bool:
+    """Whether a sentence says anything besides its links and markup.
+
+    A list item holding only a link ("- [Python docs](https://...)") is a
+    link, not a claim.
+    """
+    text = LIST_ITEM_PATTERN.sub('', sentence)
+    text = INLINE_LINK_PATTERN.sub('', text)
+    text = MARKER_PATTERN.sub('', text)
+    text = BARE_URL_PATTERN.sub('', text)
+    return bool(re.search(r'\w', text))
+
+
+def _clean_sentence(sentence: str) -> str:
+    """Remove citation markup from a sentence, keeping link texts."""
+    text = INLINE_LINK_PATTERN.sub(r'\1', sentence)
+    text = MARKER_PATTERN.sub('', text)
+    text = re.sub(r'\(\s*https?://[^)\s]+\s*\)', '', text)
+    text = BARE_URL_PATTERN.sub('', text)
+    text = re.sub(r'\s+([.,;:!?])', r'\1', text)
+    return ' '.join(text.split())
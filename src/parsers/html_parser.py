@@ -83,4 +83,19 @@ def parse_html_file(file_path:str)-> ParsedWebPage:
         text=extracted or "",
         title=title,
         fetch_status="success" if extracted else "extraction_failed"
-    )
\ No newline at end of file
+    )
+
+
+def extract_main_text(html : str) -> str:
+    """Extract the main text of an html page, without navigation, scripts and styles"""
+
+    extracted = trafilatura.extract(
+        html,
+        include_comments=False,
+        include_tables=True,
+        no_fallback=False
+    )
+    if not extracted:
+        # Pages too short or unusual for main-content detection: keep all the visible text
+        extracted = trafilatura.html2txt(html)
+    return extracted or ""
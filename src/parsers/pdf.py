@@ -1,39 +1,259 @@
 import fitz
+from bisect import bisect_right
+from concurrent.futures import Executor
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
 import re
 
+# Pages extracted per task when pages are fanned out to worker processes:
+# each task reopens the document, so single pages would cost more than they save
+PAGES_PER_TASK = 16
+
+# Heading of the bibliography, alone on its line
+REFERENCE_HEADING = re.compile(
+    r'^\s*(references|bibliography|sources|works cited|notes|références|bibliographie)\s*:?\s*$',
+    re.IGNORECASE | re.MULTILINE
+)
+# An entry of the bibliography starts with its [n] marker at the start of a line
+ENTRY_MARKER = re.compile(r'^\s*(\[\d+\])', re.MULTILINE)
+URL_OR_DOI = re.compile(r'https?://[^\s<>"]+|(?:doi:\s*)?\b10\.\d{4,9}/[^\s<>"]+', re.IGNORECASE)
+# End of a line cut inside a URL or DOI, and the start of its continuation
+URL_AT_END = re.compile(r'(https?://|\b10\.\d{4,9}/)\S*$', re.IGNORECASE)
+URL_CONTINUATION = re.compile(r'^[\w\-./?=&%#~+:;@!$*,]+')
+
+@dataclass
+class PDFPage:
+    number : int # 1-based
+    text : str
+
 @dataclass
 class ParsedPDF:
     text : str
     references : dict[str,str]
     page_count : int
     source_path : str
+    first_page : int = 1
+    page_offsets : list[int] = field(default_factory=list) # offset in text of the start of each page
+
+    def page_at(self, offset : int) -> int:
+        """Return the page number (1-based) of a character offset in text"""
+        return page_at(self.page_offsets, offset, self.first_page)
+
+def page_at(page_offsets : list[int], offset : int, first_page : int = 1) -> int:
+    """Return the page number (1-based) of a character offset, given the offset of each page"""
+    return first_page + max(bisect_right(page_offsets, offset) - 1, 0)
+
+def parse_pdf(
+    file_path : str,
+    first_page : int = 1,
+    last_page : Optional[int] = None,
+    executor : Optional[Executor] = None
+) -> ParsedPDF:
+    """Extract text from a pdf
+
+    Args:
+        file_path: Path to the PDF
+        first_page: First page to extract (1-based)
+        last_page: Last page to extract, included (default: last page of the document)
+        executor: Optional process pool the pages are extracted in, in batches
 
-def parse_pdf(file_path : str) -> ParsedPDF:
-    """Extract text from a pdf"""
+    Returns:
+        ParsedPDF with the text of the pages and the offset of each page in it
+    """
+    path=Path(file_path)
+    pages = []
+    page_offsets = []
+    offset = 0
+    for page in iter_pdf_pages(file_path, first_page, last_page, executor):
+        page_offsets.append(offset)
+        pages.append(page)
+        offset += len(page.text) + 1 # "\n" between pages
+
+    return ParsedPDF(
+        text="\n".join(page.text for page in pages),
+        references=extract_references(file_path, pages),
+        page_count=len(pages),
+        source_path=str(path.absolute()),
+        first_page=pages[0].number if pages else first_page,
+        page_offsets=page_offsets
+    )
+
+def iter_pdf_pages(
+    file_path : str,
+    first_page : int = 1,
+    last_page : Optional[int] = None,
+    executor : Optional[Executor] = None
+) -> Iterator[PDFPage]:
+    """Yield the pages of a pdf in order, as they are extracted
 
+    With an executor, batches of PAGES_PER_TASK pages are extracted in
+    parallel; pages are still yielded in order. parse_pdf collects all the
+    pages, since claim extraction and reference scanning need the whole
+    text; callers that can work page by page use this directly.
+    """
     path=Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"file not found: {file_path}")
-    
-    doc=fitz.open(file_path)
-    text_parts = []
-    for page in doc :
-        text_parts.append(page.get_text())
-    full_text="\n".join(text_parts)
+    if first_page < 1:
+        raise ValueError("first_page must be at least 1")
 
-    references={}
-    ref_pattern=r'\[(\d+)\]\s*(https?://[^\s]+)'
-    for match in re.finditer(ref_pattern, full_text):
-        ref_id=f"[{match.group(1)}]"
-        url=match.group(2)
-        references[ref_id]=url
-    doc.close()
+    with fitz.open(file_path) as doc:
+        page_count = len(doc)
+        stop = page_count if last_page is None else min(last_page, page_count)
+        if executor is None or stop - first_page < PAGES_PER_TASK:
+            for number in range(first_page, stop + 1):
+                yield PDFPage(number=number, text=doc[number - 1].get_text())
+            return
 
-    return ParsedPDF(
-        text=full_text,
-        references=references,
-        page_count=len(text_parts),
-        source_path=str(path.absolute())
+    starts = range(first_page, stop + 1, PAGES_PER_TASK)
+    batches = executor.map(
+        _extract_pages,
+        [str(path)] * len(starts),
+        starts,
+        [min(s + PAGES_PER_TASK - 1, stop) for s in starts]
     )
+    for batch in batches:
+        yield from batch
+
+def _extract_pages(file_path : str, first_page : int, last_page : int) -> list[PDFPage]:
+    """Extract a batch of pages (runs in a worker process)"""
+    with fitz.open(file_path) as doc:
+        return [
+            PDFPage(number=number, text=doc[number - 1].get_text())
+            for number in range(first_page, last_page + 1)
+        ]
+
+def extract_references(file_path : str, pages : list[PDFPage]) -> dict[str,str]:
+    """Map the [n] entries of the bibliography to their URL
+
+    Only the pages from the last reference heading followed by [n] entries
+    are scanned (all the pages if there is none: a later "Notes" appendix
+    does not hide the bibliography before it). Link annotations give the exact target of an
+    entry; otherwise the URL or DOI is read from the entry's text, joined
+    back when it is wrapped over several lines.
+
+    Args:
+        file_path: Path to the PDF
+        pages: Pages already extracted from it
+
+    Returns:
+        Dict of reference id ("[1]") to URL; DOIs are given as https://doi.org/ URLs
+    """
+    headings = [i for i, page in enumerate(pages) if REFERENCE_HEADING.search(page.text)]
+    for start in reversed(headings):
+        relevant = pages[start:]
+        if any(ENTRY_MARKER.search(page.text) for page in relevant):
+            break
+    else:
+        relevant = pages
+
+    # Blank line between pages: a URL is not joined across a page break
+    references = _references_from_text("\n\n".join(page.text for page in relevant))
+    with fitz.open(file_path) as doc:
+        references.update(_references_from_links(doc, relevant, after_heading=relevant is not pages))
+    return references
+
+def _references_from_text(text : str) -> dict[str,str]:
+    references={}
+    parts = ENTRY_MARKER.split(text)
+    for ref_id, entry in zip(parts[1::2], parts[2::2]):
+        match = URL_OR_DOI.search(_unwrap(entry))
+        if match and ref_id not in references:
+            references[ref_id] = _to_url(match.group(0))
+    return references
+
+def _references_from_links(doc, pages : list[PDFPage], after_heading : bool = False) -> dict[str,str]:
+    """Attribute each URI link to the [n] entry whose text it is in
+
+    An entry runs from its [n] marker, at the start of a line, to the next
+    marker or heading. It continues on the next page only if that page has
+    entries too: links on a page without any (an appendix, a figure) are
+    not credited to the last entry. With after_heading, the first page is
+    only read after its reference heading.
+    """
+    references={}
+    ref_id = None
+    for n, page in enumerate(pages):
+        pdf_page = doc[page.number - 1]
+        words = pdf_page.get_text("words")
+        lines = _word_lines(words)
+        entries = {i for i, line in enumerate(lines) if re.fullmatch(r'\[\d+\]', words[line[0]][4])}
+        if not entries:
+            ref_id = None
+            continue
+        headings = {i for i, line in enumerate(lines) if REFERENCE_HEADING.match(" ".join(words[w][4] for w in line))}
+
+        first = 0
+        if n == 0 and after_heading:
+            before_entries = [i for i in headings if i < max(entries)]
+            first = max(before_entries) + 1 if before_entries else 0
+
+        owner = {} # word index -> entry it belongs to
+        for i in range(first, len(lines)):
+            if i in entries:
+                ref_id = words[lines[i][0]][4]
+            elif i in headings:
+                ref_id = None
+            for w in lines[i]:
+                owner[w] = ref_id
+
+        for link in pdf_page.get_links():
+            if link.get("kind") != fitz.LINK_URI or not link.get("uri"):
+                continue
+            entry = owner.get(_word_at(words, link["from"]))
+            if entry is not None and entry not in references:
+                references[entry] = link["uri"]
+    return references
+
+def _word_lines(words : list) -> list[list[int]]:
+    """Group the indexes of words by line, in reading order"""
+    lines = []
+    previous = None
+    for i, word in enumerate(words):
+        line = (word[5], word[6]) # block_no, line_no
+        if line != previous:
+            lines.append([])
+            previous = line
+        lines[-1].append(i)
+    return lines
+
+def _word_at(words : list, rect) -> Optional[int]:
+    """Index of the first word whose center is inside rect"""
+    for i, (x0, y0, x1, y1, *_) in enumerate(words):
+        if rect.contains(fitz.Point((x0 + x1) / 2, (y0 + y1) / 2)):
+            return i
+    return None
+
+def _unwrap(entry : str) -> str:
+    """Join the lines of an entry, without a space where a URL was wrapped"""
+    lines = [line.strip() for line in entry.strip().splitlines()]
+    text = lines[0] if lines else ""
+    wrapped = True # the previous line may continue on this one
+    for line in lines[1:]:
+        if not line or REFERENCE_HEADING.match(line):
+            wrapped = False
+            continue
+        continuation = URL_CONTINUATION.match(line)
+        if wrapped and URL_AT_END.search(text) and continuation and (
+            text[-1] in "/-_?=&#~%" or re.search(r'[/=&?#%_]', continuation.group(0))
+        ):
+            # Line breaks in URLs do not add hyphens, so a trailing one is kept
+            text += line
+        else:
+            text += " " + line
+        wrapped = True
+    return text
+
+def _to_url(match : str) -> str:
+    url = match.rstrip(".,;:'\"")
+    while url[-1] in ")]" and url.count(url[-1]) > url.count("(" if url[-1] == ")" else "["):
+        url = url[:-1].rstrip(".,;:")
+    if not url.lower().startswith("http"):
+        url = "https://doi.org/" + re.sub(r'^doi:\s*', '', url, flags=re.IGNORECASE)
+    return url
+
+def extract_pdf_text(data : bytes) -> str:
+    """Extract the text of a pdf held in memory (e.g. a downloaded source)"""
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return "\n".join(page.get_text() for page in doc)
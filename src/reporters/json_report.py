@@ -1,13 +1,16 @@
 """JSON reporter for verification results."""
 import json
-from typing import List
+from typing import List, Optional
 
 
-def generate_json_report(results: List) -> dict:
+def generate_json_report(results: List, incremental: Optional[dict] = None) -> dict:
     """Generate a JSON report from verification results.
     
     Args:
         results: List of VerificationResult objects
+        incremental: Section hashes, model and prompt version of the run
+            (see DocumentRun.incremental_state); included so the report can
+            be passed back with `--since`
         
     Returns:
         Dictionary with summary and detailed results
@@ -18,7 +21,7 @@ def generate_json_report(results: List) -> dict:
         key = result.verdict.value
         verdict_counts[key] = verdict_counts.get(key, 0) + 1
 
-    return {
+    report = {
         "summary": {
             "total_citations": len(results),
             **verdict_counts
@@ -31,20 +34,29 @@ def generate_json_report(results: List) -> dict:
                 "confidence": result.confidence,
                 "explanation": result.explanation,
                 "source_quote": result.source_quote,
+                "citation_ref": result.claim.citation_ref,
+                "original_context": result.claim.original_context,
+                "section_hash": result.claim.section_hash,
+                "page": result.claim.page,
+                "source_hash": result.source_hash,
             }
             for result in results
         ]
     }
+    if incremental is not None:
+        report["incremental"] = incremental
+    return report
 
 
-def format_json_report(results: List) -> str:
+def format_json_report(results: List, incremental: Optional[dict] = None) -> str:
     """Format verification results as JSON string.
     
     Args:
         results: List of VerificationResult objects
+        incremental: Optional incremental state, see generate_json_report
         
     Returns:
         JSON-formatted string
     """
-    report = generate_json_report(results)
+    report = generate_json_report(results, incremental)
     return json.dumps(report, indent=2)
@@ -0,0 +1,53 @@
+import sys
+import threading
+import time
+import types
+
+import pytest
+from analyzers import embeddings
+from analyzers.retriever import EmbeddingRetriever
+
+
+@pytest.fixture
+def fake_sentence_transformers(monkeypatch):
+    """Install a fake sentence_transformers module that counts model loads."""
+    loads = []
+
+    class FakeSentenceTransformer:
+        def __init__(self, name):
+            time.sleep(0.05)
+            loads.append(name)
+            self.name = name
+
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = FakeSentenceTransformer
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+    monkeypatch.setattr(embeddings, "_models", {})
+    return loads
+
+
+def test_get_embedding_model_loads_once(fake_sentence_transformers):
+    """Test that concurrent callers share a single model load"""
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(embeddings.get_embedding_model()))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fake_sentence_transformers == [embeddings.DEFAULT_MODEL_NAME]
+    assert all(model is results[0] for model in results)
+
+
+def test_retrievers_share_the_registry_model(fake_sentence_transformers):
+    """Test that separate retrievers reuse the same loaded model"""
+    embeddings.warm_up()
+    first, second = EmbeddingRetriever(), EmbeddingRetriever()
+    first._load_model()
+    second._load_model()
+
+    assert first._model is second._model
+    assert len(fake_sentence_transformers) == 1
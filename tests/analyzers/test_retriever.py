@@ -0,0 +1,186 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+from analyzers import embeddings, retriever
+from analyzers.retriever import EmbeddingRetriever, get_relevant_contexts
+
+VOCABULARY = ["python", "language", "snake", "reptile", "coffee", "bean"]
+
+
+class FakeSentenceTransformer:
+    """Encodes texts as bag-of-words vectors over a tiny vocabulary."""
+
+    def __init__(self, name):
+        self.calls = []
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.calls.append(list(texts))
+        vectors = np.array([
+            [text.lower().count(word) for word in VOCABULARY] for text in texts
+        ], dtype=float)
+        return vectors + 1e-6
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = FakeSentenceTransformer
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+    monkeypatch.setattr(embeddings, "_models", {})
+    monkeypatch.setattr(retriever, "_index_cache", retriever.OrderedDict())
+    return embeddings.get_embedding_model()
+
+
+def _long_source():
+    paragraphs = [
+        "Python is a programming language with a large community. " * 5,
+        "The python snake is a large reptile found in Asia and Africa. " * 5,
+        "Coffee is brewed from roasted coffee bean seeds. " * 5,
+    ]
+    return " ".join(paragraphs * 4)
+
+
+def test_search_ranks_relevant_passages(fake_model):
+    """Test that the most similar chunks come first"""
+    r = EmbeddingRetriever()
+    index = r.get_index(_long_source())
+
+    [passages] = r.search(index, ["Which reptile is a snake?"], top_k=2)
+
+    assert passages
+    assert all("reptile" in p.text for p in passages)
+    assert passages[0].relevance_score >= passages[-1].relevance_score
+
+
+def test_source_is_indexed_once_for_many_claims(fake_model):
+    """Test that claims citing one source share one index and one query batch"""
+    source = _long_source()
+    claims = ["Python is a language", "Pythons are reptiles", "Coffee comes from beans"]
+
+    contexts = get_relevant_contexts(claims, source)
+    get_relevant_contexts(claims[:1], source)
+
+    chunk_encodings = [call for call in fake_model.calls if len(call) > len(claims)]
+    assert len(chunk_encodings) == 1
+    assert claims in fake_model.calls
+    assert "coffee" in contexts[2].lower()
+
+
+def test_top_k_indices_matches_full_sort():
+    """Test that argpartition-based top-k agrees with a full sort"""
+    rng = np.random.default_rng(0)
+    scores = rng.random((3, 1000))
+
+    best = retriever.top_k_indices(scores, 5)
+
+    expected = np.argsort(-scores, axis=1)[:, :5]
+    assert np.array_equal(best, expected)
+    assert retriever.top_k_indices(scores[:, :2], 5).shape == (3, 2)
+
+
+def test_find_relevant_passages_uses_cosine_similarity(fake_model):
+    """Test that find_relevant_passages scores are cosine similarities"""
+    from analyzers.chunker import chunk_text
+
+    chunks = chunk_text(_long_source(), chunk_size=300, overlap=10)
+
+    passages = EmbeddingRetriever().find_relevant_passages("coffee bean", chunks, top_k=3)
+
+    assert len(passages) == 3
+    assert all("coffee" in p.text.lower() for p in passages)
+    assert all(0.0 <= p.relevance_score <= 1.0 + 1e-6 for p in passages)
+
+
+class FakeStore:
+    """In-memory stand-in for EmbeddingStore."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def load(self, url, content_hash, model_name):
+        return self.entries.get((url, content_hash, model_name))
+
+    def save(self, url, content_hash, model_name, chunks, embeddings):
+        self.entries[(url, content_hash, model_name)] = (chunks, embeddings)
+
+
+def test_embedding_store_skips_encoding_for_known_sources(fake_model, monkeypatch):
+    """Test that a stored source is loaded instead of re-encoded"""
+    store = FakeStore()
+    monkeypatch.setattr(retriever, "_embedding_store", store)
+    source = _long_source()
+
+    get_relevant_contexts(["Python is a language"], source, source_url="https://example.com/")
+    assert len(store.entries) == 1
+
+    # New process: empty in-memory cache, same store
+    monkeypatch.setattr(retriever, "_index_cache", retriever.OrderedDict())
+    fake_model.calls.clear()
+    contexts = get_relevant_contexts(["Coffee beans"], source, source_url="https://example.com/")
+
+    assert fake_model.calls == [["Coffee beans"]]
+    assert "coffee" in contexts[0].lower()
+
+
+def test_embedding_store_roundtrip(tmp_path):
+    """Test saving and loading chunk embeddings with chromadb"""
+    pytest.importorskip("chromadb")
+    from analyzers.chunker import TextChunk
+    from analyzers.vector_store import EmbeddingStore
+
+    store = EmbeddingStore(str(tmp_path))
+    chunks = [TextChunk(text=f"chunk {i}", chunk_id=i, start_char=i, end_char=i + 1) for i in range(3)]
+    store.save("https://example.com/", "hash-v1", "model", chunks, np.eye(3))
+
+    loaded_chunks, loaded = store.load("https://example.com/", "hash-v1", "model")
+    assert [c.text for c in loaded_chunks] == ["chunk 0", "chunk 1", "chunk 2"]
+    assert np.allclose(loaded, np.eye(3))
+
+    store.save("https://example.com/", "hash-v2", "model", chunks, np.eye(3))
+    assert store.load("https://example.com/", "hash-v1", "model") is None
+
+
+def test_embedding_store_saves_in_batches(tmp_path):
+    """Test that sources with more chunks than a chromadb batch are stored and replaced"""
+    pytest.importorskip("chromadb")
+    from analyzers.chunker import TextChunk
+    from analyzers.vector_store import EmbeddingStore
+
+    store = EmbeddingStore(str(tmp_path))
+    limit = store._client.get_max_batch_size()
+    count = limit + 10
+    chunks = [TextChunk(text=f"chunk {i}", chunk_id=i, start_char=i, end_char=i + 1) for i in range(count)]
+    embeddings = np.ones((count, 2))
+
+    store.save("https://example.com/", "hash-v1", "model", chunks, embeddings)
+    loaded_chunks, loaded = store.load("https://example.com/", "hash-v1", "model")
+    assert len(loaded_chunks) == count
+    assert loaded.shape == (count, 2)
+
+    store.save("https://example.com/", "hash-v2", "model", chunks, embeddings)
+    assert store.load("https://example.com/", "hash-v1", "model") is None
+
+
+class FailingStore:
+    """Store whose backend is unavailable."""
+
+    def load(self, url, content_hash, model_name):
+        raise RuntimeError("store unavailable")
+
+    def save(self, url, content_hash, model_name, chunks, embeddings):
+        raise RuntimeError("store unavailable")
+
+
+def test_store_failure_still_returns_and_caches_index(fake_model, monkeypatch):
+    """Test that a failing embedding store does not lose the in-memory index"""
+    monkeypatch.setattr(retriever, "_embedding_store", FailingStore())
+    source = _long_source()
+
+    contexts = get_relevant_contexts(["Coffee beans"], source, source_url="https://example.com/")
+    get_relevant_contexts(["Python is a language"], source, source_url="https://example.com/")
+
+    assert "coffee" in contexts[0].lower()
+    chunk_encodings = [call for call in fake_model.calls if len(call) > 1]
+    assert len(chunk_encodings) == 1
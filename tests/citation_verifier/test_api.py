@@ -0,0 +1,122 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from citation_verifier import api
+from citation_verifier.llm import TokenUsage
+from citation_verifier.main import DocumentRun
+from citation_verifier.models import ClaimCitation, Verdict, VerificationResult
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """API client whose document verification is replaced by a fake."""
+    async def fake_run_verification(source, on_progress=None, on_result=None, **kwargs):
+        if source == "missing.md":
+            raise FileNotFoundError(source)
+        claims = [
+            ClaimCitation(claim_text=f"Claim {i}", citation_url="https://example.com/", original_context="")
+            for i in range(3)
+        ]
+        if on_progress is not None:
+            on_progress(0, len(claims))
+            for done in range(1, len(claims) + 1):
+                on_progress(done, len(claims))
+        results = [
+            VerificationResult(claim=claim, verdict=Verdict.SUPPORTED, confidence=0.9, explanation="ok")
+            for claim in claims
+        ]
+        if on_result is not None:
+            for i, result in enumerate(results):
+                on_result(i, result)
+        return DocumentRun(results=results, sections=[], model="model", prompt_version="v", usage=TokenUsage())
+
+    monkeypatch.setattr(api, "run_verification", fake_run_verification)
+    monkeypatch.setattr(api, "jobs", {})
+    return TestClient(api.app)
+
+
+def test_submit_job_returns_immediately_with_id(client):
+    """Test that a submitted job can be polled until it completes"""
+    response = client.post("/jobs", json={"source": "doc.md"})
+
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    job = client.get(f"/jobs/{job_id}").json()
+    assert job["status"] == "completed"
+    assert job["progress"] == {"claims_done": 3, "claims_total": 3}
+    assert job["result"]["summary"] == {"total_citations": 3, "supported": 3}
+
+
+def test_failed_job_reports_error(client):
+    """Test that a failing job is marked failed with its error"""
+    job_id = client.post("/jobs", json={"source": "missing.md"}).json()["job_id"]
+
+    job = client.get(f"/jobs/{job_id}").json()
+    assert job["status"] == "failed"
+    assert job["error"] == "File not found: missing.md"
+    assert job["result"] is None
+
+
+def test_unknown_job_is_404(client):
+    """Test that polling an unknown job id returns 404"""
+    assert client.get("/jobs/does-not-exist").status_code == 404
+
+
+def test_verify_document_endpoint_still_synchronous(client):
+    """Test that the blocking endpoint returns the results directly"""
+    response = client.post("/verify/document", json={"source": "doc.md"})
+
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 3
+
+
+def test_stream_emits_extraction_results_and_summary(client):
+    """Test that the stream reports extraction, each result, then the summary"""
+    import json
+
+    with client.stream("POST", "/verify/document/stream", json={"source": "doc.md"}) as response:
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert events[0] == {"event": "extracted", "claims_total": 3}
+    assert [e["index"] for e in events[1:4]] == [0, 1, 2]
+    assert all(e["event"] == "result" and e["verdict"] == "supported" for e in events[1:4])
+    assert events[4]["event"] == "summary"
+    assert events[4]["summary"] == {"total_citations": 3, "supported": 3}
+    assert "results" not in events[4]
+
+
+def test_stream_reports_errors(client):
+    """Test that a failing verification ends the stream with an error event"""
+    import json
+
+    with client.stream("POST", "/verify/document/stream", json={"source": "missing.md"}) as response:
+        events = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert events == [{"event": "error", "detail": "File not found: missing.md"}]
+
+
+def test_verify_batch_endpoint(client, monkeypatch):
+    """Test that each document of a batch gets its own result or error"""
+    from citation_verifier.main import BatchItem
+
+    async def fake_verify_batch(sources, **kwargs):
+        items = []
+        for source in sources:
+            if source == "missing.md":
+                items.append(BatchItem(source, error="File not found: missing.md"))
+            else:
+                items.append(BatchItem(source, run=await api.run_verification(source), seconds=1.5))
+        return items
+
+    monkeypatch.setattr(api, "verify_batch", fake_verify_batch)
+
+    response = client.post("/verify/batch", json={"sources": ["a.md", "missing.md"]})
+
+    assert response.status_code == 200
+    documents = response.json()["documents"]
+    assert documents[0]["source"] == "a.md"
+    assert documents[0]["result"]["summary"]["total_citations"] == 3
+    assert documents[0]["result"]["processing_time_seconds"] == 1.5
+    assert documents[1] == {"source": "missing.md", "result": None, "error": "File not found: missing.md"}
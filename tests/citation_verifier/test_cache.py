@@ -0,0 +1,141 @@
+import time
+
+import pytest
+from citation_verifier import fetcher as fetcher_module
+from citation_verifier.cache import ResultCache, SourceCache, VerdictCache, cache_key
+from citation_verifier.fetcher import EXTRACTOR_VERSION, SourceFetcher
+from citation_verifier.models import SourceContent
+
+
+def _source(url, content="body", etag=None):
+    return SourceContent(url=url, content=content, fetch_status="success", etag=etag)
+
+
+def test_source_cache_roundtrip(tmp_path):
+    """Test storing and reading back a source with its validators"""
+    cache = SourceCache(str(tmp_path))
+    cache.put("https://example.com/", _source("https://example.com/", etag='"v1"'))
+
+    entry = cache.get("https://example.com/")
+
+    assert entry.content == "body"
+    assert entry.etag == '"v1"'
+    assert entry.is_fresh(cache.ttl_seconds)
+    assert cache.get("https://example.com/other") is None
+
+
+def test_source_cache_skips_failures(tmp_path):
+    """Test that failed fetches are not cached"""
+    cache = SourceCache(str(tmp_path))
+    cache.put("https://example.com/", SourceContent(url="https://example.com/", fetch_status="timeout"))
+
+    assert cache.get("https://example.com/") is None
+
+
+def test_source_cache_evicts_least_recently_used(tmp_path):
+    """Test that the byte budget evicts the least recently used entry"""
+    cache = SourceCache(str(tmp_path), max_size_mb=1)
+    half = "x" * (600 * 1024)
+
+    cache.put("https://a.com/", _source("https://a.com/", half))
+    time.sleep(0.01)
+    cache.put("https://b.com/", _source("https://b.com/", half))
+
+    assert cache.get("https://a.com/") is None
+    assert cache.get("https://b.com/") is not None
+    assert cache.total_size() <= cache.max_size_bytes
+
+
+@pytest.mark.asyncio
+async def test_fetcher_revalidates_stale_entries(tmp_path, monkeypatch):
+    """Test that a stale entry is revalidated with its ETag and reused on 304"""
+    calls = []
+
+    async def fake_fetch(url, etag=None, **kwargs):
+        calls.append(etag)
+        return SourceContent(url=url, fetch_status="not_modified")
+
+    monkeypatch.setattr(fetcher_module, "fetch_source", fake_fetch)
+    cache = SourceCache(str(tmp_path), ttl_seconds=0)
+    cache.put("https://example.com/", _source("https://example.com/", etag='"v1"'), extractor=EXTRACTOR_VERSION)
+
+    result = await SourceFetcher(cache=cache).fetch("https://example.com/")
+
+    assert calls == ['"v1"']
+    assert result.fetch_status == "success"
+    assert result.content == "body"
+
+
+@pytest.mark.asyncio
+async def test_fetcher_serves_fresh_entries_from_cache(tmp_path, monkeypatch):
+    """Test that fresh entries are served without any request"""
+    async def fake_fetch(url, **kwargs):
+        raise AssertionError("should not download")
+
+    monkeypatch.setattr(fetcher_module, "fetch_source", fake_fetch)
+    cache = SourceCache(str(tmp_path))
+    cache.put("https://example.com/", _source("https://example.com/"), extractor=EXTRACTOR_VERSION)
+
+    source_fetcher = SourceFetcher(cache=cache)
+    result = await source_fetcher.fetch("https://example.com")
+
+    assert result.content == "body"
+    assert source_fetcher.cache_hits == 1
+
+
+def test_result_cache_persists_across_instances(tmp_path):
+    """Test that results survive a restart through the SQLite backend"""
+    key = cache_key("model", "prompt", "document")
+    ResultCache(str(tmp_path), "extractions").put(key, [{"claim_text": "x"}])
+
+    assert ResultCache(str(tmp_path), "extractions").get(key) == [{"claim_text": "x"}]
+    assert ResultCache(str(tmp_path), "other").get(key) is None
+
+
+def test_result_cache_memory_only():
+    """Test the in-memory LRU without a cache directory"""
+    cache = ResultCache(None, "extractions", memory_entries=2)
+    for name in ("a", "b", "c"):
+        cache.put(name, name)
+
+    assert cache.get("a") is None
+    assert cache.get("c") == "c"
+
+
+def test_cache_key_depends_on_every_part():
+    """Test that changing any input changes the key"""
+    assert cache_key("a", "b") != cache_key("a", "c")
+    assert cache_key("ab", "c") != cache_key("a", "bc")
+
+
+def test_verdict_cache_drops_verdicts_for_old_source_versions(tmp_path):
+    """Test that storing a verdict for a new source version invalidates the old one"""
+    cache = VerdictCache(str(tmp_path))
+    verdict = {"verdict": "supported", "confidence": 0.9, "explanation": "ok", "source_quote": None}
+
+    cache.put("Claim", "https://example.com/", "hash-v1", "model", "p1", verdict)
+    cache.put("Claim", "https://example.com/", "hash-v2", "model", "p1", verdict)
+
+    reopened = VerdictCache(str(tmp_path))
+    assert reopened.get("Claim", "https://example.com/", "hash-v1", "model", "p1") is None
+    assert reopened.get("claim.", "https://example.com/", "hash-v2", "model", "p1") == verdict
+    assert reopened.get("Claim", "https://example.com/", "hash-v2", "model", "p2") is None
+
+
+def test_source_cache_drops_entries_without_body(tmp_path):
+    """Test that a cache written before raw bodies were stored starts empty"""
+    import sqlite3
+    conn = sqlite3.connect(tmp_path / "sources.sqlite")
+    conn.execute(
+        "CREATE TABLE sources (url TEXT PRIMARY KEY, content TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+        "fetched_at REAL NOT NULL, last_access REAL NOT NULL, size INTEGER NOT NULL)"
+    )
+    conn.execute("INSERT INTO sources VALUES ('https://example.com/', '<html>', NULL, NULL, 0, 0, 6)")
+    conn.commit()
+    conn.close()
+
+    cache = SourceCache(str(tmp_path))
+
+    assert cache.get("https://example.com/") is None
+    cache.put("https://example.com/", _source("https://example.com/"))
+    assert cache.get("https://example.com/").content == "body"
@@ -1,5 +1,10 @@
+import asyncio
+
+import httpx
 import pytest
-from citation_verifier.fetcher import fetch_source
+from citation_verifier import fetcher as fetcher_module
+from citation_verifier.fetcher import fetch_source, normalize_url, SourceFetcher
+from citation_verifier.models import SourceContent
 
 
 @pytest.mark.asyncio
@@ -48,3 +53,261 @@ async def test_fetch_source_max_size():
     )
 
     assert "content_too_large" in result.fetch_status
+
+
+def test_normalize_url():
+    """Test that equivalent URL spellings normalize to the same key"""
+    assert normalize_url("HTTPS://Example.com:443/page#section") == "https://example.com/page"
+    assert normalize_url("http://example.com") == "http://example.com/"
+    assert normalize_url("https://example.com/a?b=1") == "https://example.com/a?b=1"
+
+
+@pytest.mark.asyncio
+async def test_source_fetcher_deduplicates(monkeypatch):
+    """Test that concurrent and repeated fetches of one URL download it once"""
+    calls = []
+
+    async def fake_fetch(url, **kwargs):
+        calls.append(url)
+        await asyncio.sleep(0.01)
+        return SourceContent(url=url, content="page", fetch_status="success")
+
+    monkeypatch.setattr(fetcher_module, "fetch_source", fake_fetch)
+    source_fetcher = SourceFetcher()
+
+    results = await asyncio.gather(
+        source_fetcher.fetch("https://example.com/page"),
+        source_fetcher.fetch("https://EXAMPLE.com/page#ref"),
+    )
+    again = await source_fetcher.fetch("https://example.com/page")
+
+    assert len(calls) == 1
+    assert all(r.content == "page" for r in results)
+    assert again.content == "page"
+    assert source_fetcher.reused == 2
+
+
+@pytest.mark.asyncio
+async def test_source_fetcher_does_not_keep_failures(monkeypatch):
+    """Test that failed fetches are retried on the next request"""
+    calls = []
+
+    async def fake_fetch(url, **kwargs):
+        calls.append(url)
+        return SourceContent(url=url, fetch_status="timeout")
+
+    monkeypatch.setattr(fetcher_module, "fetch_source", fake_fetch)
+    source_fetcher = SourceFetcher()
+
+    await source_fetcher.fetch("https://example.com/slow")
+    await source_fetcher.fetch("https://example.com/slow")
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_source_with_client():
+    """Test fetching through a caller-provided client"""
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text="hello"))
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        result = await fetch_source("https://example.com/", client=client)
+
+    assert result.fetch_status == "success"
+    assert result.content == "hello"
+
+
+@pytest.mark.asyncio
+async def test_source_fetcher_reuses_pooled_client(monkeypatch):
+    """Test that every fetch goes through the same client, within the per-host limit"""
+    clients = []
+    in_flight = {"now": 0, "peak": 0}
+
+    async def fake_fetch(url, client=None, **kwargs):
+        clients.append(client)
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return SourceContent(url=url, content="page", fetch_status="success")
+
+    monkeypatch.setattr(fetcher_module, "fetch_source", fake_fetch)
+
+    async with SourceFetcher(max_connections_per_host=2) as source_fetcher:
+        await asyncio.gather(*(
+            source_fetcher.fetch(f"https://arxiv.org/abs/{i}") for i in range(5)
+        ))
+
+    assert len(set(map(id, clients))) == 1
+    assert in_flight["peak"] == 2
+    assert source_fetcher._client is None
+
+
+class _ChunkedStream(httpx.AsyncByteStream):
+    """Response body sent in chunks without a Content-Length header."""
+
+    def __init__(self, chunk_count, chunk_size=64 * 1024):
+        self.chunk_count = chunk_count
+        self.chunk_size = chunk_size
+        self.sent = 0
+
+    async def __aiter__(self):
+        for _ in range(self.chunk_count):
+            self.sent += 1
+            yield b"x" * self.chunk_size
+
+
+@pytest.mark.asyncio
+async def test_fetch_source_rejects_declared_oversize():
+    """Test that an oversized Content-Length is rejected before reading the body"""
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(200, headers={"Content-Length": str(50 * 1024 * 1024)})
+    )
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        result = await fetch_source("https://example.com/big", client=client, max_size_mb=1)
+
+    assert "content_too_large" in result.fetch_status
+
+
+@pytest.mark.asyncio
+async def test_fetch_source_aborts_streaming_oversize():
+    """Test that streaming stops as soon as the size limit is crossed"""
+    stream = _ChunkedStream(chunk_count=100)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=stream))
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        result = await fetch_source("https://example.com/big", client=client, max_size_mb=1)
+
+    assert "content_too_large" in result.fetch_status
+    assert stream.sent < 100
+
+
+@pytest.mark.asyncio
+async def test_fetch_source_stop_after_bytes():
+    """Test that reading stops early once enough content was collected"""
+    stream = _ChunkedStream(chunk_count=100)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=stream))
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        result = await fetch_source("https://example.com/big", client=client, stop_after_bytes=100_000)
+
+    assert result.fetch_status == "success"
+    assert result.truncated is True
+    assert len(result.content) == 100_000
+    assert stream.sent == 2
+
+
+PAGE = (
+    "<html><head><style>body {color: red}</style><script>track()</script></head><body>"
+    "<nav><a href='/'>Home</a> | <a href='/about'>About</a></nav>"
+    "<article><h1>Python history</h1>"
+    "<p>Python was conceived in the late 1980s by Guido van Rossum at CWI in the Netherlands.</p>"
+    "<p>Its first release, version 0.9.0, was published in February 1991 on alt.sources.</p>"
+    "</article><footer>Copyright 2024</footer></body></html>"
+)
+
+
+@pytest.mark.asyncio
+async def test_fetch_source_extracts_html_main_text():
+    """Test that scripts, styles and markup are dropped from fetched HTML"""
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(200, text=PAGE, headers={"Content-Type": "text/html; charset=utf-8"})
+    )
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        result = await fetch_source("https://example.com/python", client=client)
+
+    assert result.fetch_status == "success"
+    assert result.content_type == "text/html"
+    assert "published in February 1991" in result.content
+    assert "track()" not in result.content and "<p>" not in result.content
+    assert result.raw_content == PAGE.encode()
+
+
+@pytest.mark.asyncio
+async def test_fetch_source_extracts_pdf_text():
+    """Test that a fetched PDF is read with PyMuPDF instead of decoded as text"""
+    import fitz
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Python was released in 1991")
+    data = doc.tobytes()
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(200, content=data, headers={"Content-Type": "application/pdf"})
+    )
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        result = await fetch_source("https://example.com/paper.pdf", client=client, stop_after_bytes=10)
+
+    assert result.content.strip() == "Python was released in 1991"
+    assert result.truncated is False
+
+
+@pytest.mark.asyncio
+async def test_source_fetcher_extracts_old_cache_entries_again(tmp_path, monkeypatch):
+    """Test that an entry cached by an older extractor is re-extracted from its body"""
+    from citation_verifier.cache import SourceCache
+
+    async def fake_fetch(url, **kwargs):
+        raise AssertionError("should not download")
+
+    monkeypatch.setattr(fetcher_module, "fetch_source", fake_fetch)
+    cache = SourceCache(str(tmp_path))
+    source = SourceContent(
+        url="https://example.com/", content=PAGE, fetch_status="success",
+        content_type="text/html", raw_content=PAGE.encode()
+    )
+    cache.put("https://example.com/", source, extractor="0")
+
+    result = await SourceFetcher(cache=cache).fetch("https://example.com/")
+
+    assert "<p>" not in result.content and "February 1991" in result.content
+    assert cache.get("https://example.com/").extractor == fetcher_module.EXTRACTOR_VERSION
+
+
+@pytest.mark.asyncio
+async def test_source_fetcher_drops_raw_body(tmp_path, monkeypatch):
+    """Test that callers get the text only, while the cache keeps the raw body"""
+    from citation_verifier.cache import SourceCache
+
+    async def fake_fetch(url, **kwargs):
+        await asyncio.sleep(0.01)
+        return SourceContent(
+            url=url, content="text", fetch_status="success", content_type="text/html", raw_content=b"<p>text</p>"
+        )
+
+    monkeypatch.setattr(fetcher_module, "fetch_source", fake_fetch)
+    cache = SourceCache(str(tmp_path))
+    source_fetcher = SourceFetcher(cache=cache)
+
+    results = await asyncio.gather(*(source_fetcher.fetch("https://example.com/") for _ in range(3)))
+
+    assert all(result.raw_content is None for result in results)
+    assert cache.get("https://example.com/").body == b"<p>text</p>"
+
+
+@pytest.mark.asyncio
+async def test_source_fetcher_uses_cache_off_the_event_loop(tmp_path, monkeypatch):
+    """Test that the SQLite source cache is read and written in a thread"""
+    import threading
+    from citation_verifier.cache import SourceCache
+
+    async def fake_fetch(url, **kwargs):
+        return SourceContent(url=url, content="text", fetch_status="success", content_type="text/html")
+
+    class RecordingCache(SourceCache):
+        def get(self, url):
+            threads.append(threading.current_thread())
+            return super().get(url)
+
+        def put(self, url, source, extractor=None):
+            threads.append(threading.current_thread())
+            super().put(url, source, extractor)
+
+    threads = []
+    monkeypatch.setattr(fetcher_module, "fetch_source", fake_fetch)
+
+    await SourceFetcher(cache=RecordingCache(str(tmp_path))).fetch("https://example.com/")
+
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
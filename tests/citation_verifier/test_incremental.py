@@ -0,0 +1,200 @@
+import re
+
+import pytest
+
+from citation_verifier import pipeline
+from citation_verifier.incremental import (
+    assign_sections,
+    load_previous_run,
+    section_hash,
+    split_sections,
+)
+from citation_verifier.models import ClaimCitation, SourceContent, Verdict, VerificationResult
+from citation_verifier.verifier import lookup_verdict, verdict_version
+from reporters.json_report import generate_json_report
+
+
+DOCUMENT = """Python was released in 1991 (https://www.python.org/about/).
+
+Rust has no garbage collector (https://www.rust-lang.org/).
+
+This paragraph cites nothing.
+"""
+
+
+@pytest.fixture
+def fake_extraction(monkeypatch):
+    """Replace the LLM extraction by a URL regex, recording the extracted texts"""
+    calls = []
+
+    def fake_extract_claims(text, cache=None):
+        calls.append(text)
+        claims = []
+        for sentence in text.split("\n\n"):
+            match = re.search(r"\((https?://[^)]+)\)", sentence)
+            if match:
+                claims.append(ClaimCitation(
+                    claim_text=sentence[:match.start()].strip(),
+                    citation_url=match.group(1),
+                    original_context=sentence.strip()
+                ))
+        return claims
+
+    monkeypatch.setattr(pipeline, "extract_claims", fake_extract_claims)
+    return calls
+
+
+def _report(claims, sections, source_hash="hash-1"):
+    results = [
+        VerificationResult(
+            claim=claim, verdict=Verdict.SUPPORTED, confidence=0.9, explanation="ok", source_hash=source_hash
+        )
+        for claim in claims
+    ]
+    return generate_json_report(results, {
+        "sections": sections,
+        "model": "model",
+        "prompt_version": verdict_version(True),
+    })
+
+
+def test_section_hash_ignores_whitespace():
+    """Test that reflowing a paragraph does not change its hash"""
+    assert split_sections("A\n\n\nB  \n \nC") == ["A", "B", "C"]
+    assert section_hash("Some  text\nhere") == section_hash("Some text here")
+    assert section_hash("Some text") != section_hash("Other text")
+
+
+def test_assign_sections_locates_claims():
+    """Test that claims are attributed to the section they were found in"""
+    sections = ["Intro paragraph.", "Python is popular among data scientists [1]."]
+    claims = assign_sections([
+        ClaimCitation(claim_text="Python is popular", original_context="Python is popular among data scientists [1]."),
+        ClaimCitation(claim_text="Popular among data scientists", original_context="paraphrased by the model"),
+        ClaimCitation(claim_text="Unrelated statement", original_context="elsewhere"),
+    ], sections)
+
+    assert claims[0].section_hash == section_hash(sections[1])
+    assert claims[1].section_hash == section_hash(sections[1])
+    assert claims[2].section_hash is None
+
+
+def test_only_changed_sections_are_extracted(tmp_path, fake_extraction):
+    """Test that an edited paragraph is the only text sent to extraction"""
+    document = tmp_path / "doc.txt"
+    document.write_text(DOCUMENT)
+    claims, sections = pipeline.extract_document(str(document))
+    previous = load_previous_run(_report(claims, sections))
+
+    document.write_text(DOCUMENT.replace("Rust has no garbage collector", "Rust is memory safe"))
+    fake_extraction.clear()
+    claims, _ = pipeline.extract_document(str(document), previous=previous)
+
+    assert fake_extraction == ["Rust is memory safe (https://www.rust-lang.org/)."]
+    assert [claim.claim_text for claim in claims] == ["Python was released in 1991", "Rust is memory safe"]
+
+
+def test_unchanged_document_needs_no_extraction(tmp_path, fake_extraction):
+    """Test that re-running on an unchanged document reuses every claim"""
+    document = tmp_path / "doc.txt"
+    document.write_text(DOCUMENT)
+    claims, sections = pipeline.extract_document(str(document))
+    previous = load_previous_run(_report(claims, sections))
+
+    fake_extraction.clear()
+    reused, _ = pipeline.extract_document(str(document), previous=previous)
+
+    assert fake_extraction == []
+    assert [claim.claim_text for claim in reused] == [claim.claim_text for claim in claims]
+
+
+def test_previous_verdicts_reused_for_unchanged_sources():
+    """Test that a previous verdict is only reused against the same source content"""
+    claim = ClaimCitation(
+        claim_text="Python was released in 1991",
+        citation_url="https://www.python.org/about/",
+        original_context="Python was released in 1991.",
+        section_hash="abc"
+    )
+    source = SourceContent(url="https://www.python.org/about/", content="Python 1991", fetch_status="success")
+    previous = load_previous_run(_report([claim], ["abc"], source_hash=source.content_hash))
+    cache = previous.seed()
+
+    reused = lookup_verdict(claim, source, "model", True, cache)
+    assert reused.verdict == Verdict.SUPPORTED
+    assert reused.source_hash == source.content_hash
+
+    changed = source.model_copy(update={"content": "Python 1994"})
+    assert lookup_verdict(claim, changed, "model", True, cache) is None
+    assert lookup_verdict(claim, source, "other-model", True, cache) is None
+
+
+def test_load_previous_run_requires_sections():
+    """Test that a report without section hashes is rejected"""
+    with pytest.raises(ValueError):
+        load_previous_run({"summary": {}, "results": []})
+
+
+def test_claims_mapped_to_pdf_pages(fake_extraction):
+    """Test that claims of a paginated document are given the page they are on"""
+    document = pipeline.LoadedDocument(
+        text=DOCUMENT, references={}, structured=False, page_offsets=[0, DOCUMENT.index("Rust")]
+    )
+
+    claims, _ = pipeline.extract_document(document)
+
+    assert [claim.page for claim in claims] == [1, 2]
+
+
+def test_sections_with_undefined_references_are_not_recorded(tmp_path, monkeypatch):
+    """Test that a claim whose [n] is defined later is extracted on the next run"""
+    # The LLM reports the claim of an undefined marker without a URL
+    monkeypatch.setattr(pipeline, "extract_claims", lambda text, cache=None: [
+        ClaimCitation(claim_text="Rust is fast", citation_ref="[2]", original_context=text)
+    ])
+    document = tmp_path / "doc.md"
+    document.write_text("Python is popular [1].\n\nRust is fast [2].\n\n[1]: https://www.python.org/\n")
+
+    claims, sections = pipeline.extract_document(str(document))
+    assert [claim.claim_text for claim in claims] == ["Python is popular."]
+    assert section_hash("Rust is fast [2].") not in sections
+
+    previous = load_previous_run(_report(claims, sections))
+    document.write_text(document.read_text() + "[2]: https://www.rust-lang.org/\n")
+    claims, _ = pipeline.extract_document(str(document), previous=previous)
+
+    assert [claim.claim_text for claim in claims] == ["Python is popular.", "Rust is fast."]
+
+
+def test_previous_verdicts_stay_out_of_shared_cache():
+    """Test that verdicts from a supplied report are not written to the shared cache"""
+    from citation_verifier.cache import VerdictCache
+
+    claim = ClaimCitation(
+        claim_text="Python was released in 1991",
+        citation_url="https://www.python.org/about/",
+        original_context="Python was released in 1991.",
+        section_hash="abc"
+    )
+    source = SourceContent(url="https://www.python.org/about/", content="Python 1991", fetch_status="success")
+    shared = VerdictCache(None)
+    cache = load_previous_run(_report([claim], ["abc"], source_hash=source.content_hash)).seed(shared)
+
+    assert lookup_verdict(claim, source, "model", True, cache) is not None
+    assert lookup_verdict(claim, source, "model", True, shared) is None
+
+    # Verdicts computed during the run still reach the shared cache
+    cache.put("Rust is fast", "https://www.rust-lang.org/", "hash", "model", "v1", {"verdict": "SUPPORTED"})
+    assert shared.get("Rust is fast", "https://www.rust-lang.org/", "hash", "model", "v1") is not None
+    assert cache.get("Python was released in 1991", "https://www.python.org/about/", "x", "model", "v1") is None
+
+
+def test_claims_mapped_to_pages_of_a_page_range(fake_extraction):
+    """Test that page numbers account for a document starting after page 1"""
+    document = pipeline.LoadedDocument(
+        text=DOCUMENT, references={}, structured=False, page_offsets=[0, DOCUMENT.index("Rust")], first_page=5
+    )
+
+    claims, _ = pipeline.extract_document(document)
+
+    assert [claim.page for claim in claims] == [5, 6]
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+
+import anthropic
+import httpx
+import pytest
+
+from citation_verifier import llm
+
+
+def _error(cls, status, headers=None):
+    response = httpx.Response(
+        status, headers=headers or {}, request=httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    )
+    return cls("error", response=response, body=None)
+
+
+class FlakyClient:
+    """Client whose first calls fail with the given errors."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+        self.messages = SimpleNamespace(create=self._create)
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(usage=SimpleNamespace(input_tokens=10, cache_creation_input_tokens=0))
+
+
+class AsyncFlakyClient(FlakyClient):
+    async def _create(self, **kwargs):
+        return FlakyClient._create(self, **kwargs)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record sleeps instead of waiting"""
+    recorded = []
+
+    async def fake_async_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr(llm.time, "sleep", recorded.append)
+    monkeypatch.setattr(llm.asyncio, "sleep", fake_async_sleep)
+    monkeypatch.setattr(llm, "_rate_limiter", llm.RateLimiter())
+    return recorded
+
+
+def test_create_message_retries_rate_limits(sleeps):
+    """Test that 429 and 529 responses are retried, honoring retry-after"""
+    client = FlakyClient(
+        _error(anthropic.RateLimitError, 429, {"retry-after": "7"}),
+        _error(anthropic.InternalServerError, 529),
+    )
+
+    llm.create_message(client, model="m", max_tokens=10, messages=[{"role": "user", "content": "hi"}])
+
+    assert client.calls == 3
+    retries = [delay for delay in sleeps if delay > 0]
+    assert retries[0] == 7
+    assert len(retries) <= 2
+
+
+def test_create_message_does_not_retry_client_errors(sleeps):
+    """Test that a bad request fails immediately"""
+    client = FlakyClient(_error(anthropic.BadRequestError, 400))
+
+    with pytest.raises(anthropic.BadRequestError):
+        llm.create_message(client, model="m", max_tokens=10, messages=[])
+
+    assert client.calls == 1
+
+
+async def test_create_message_async_gives_up_after_max_retries(sleeps):
+    """Test that persistent overload errors are raised after MAX_RETRIES retries"""
+    client = AsyncFlakyClient(*[_error(anthropic.InternalServerError, 529)] * (llm.MAX_RETRIES + 1))
+
+    with pytest.raises(anthropic.InternalServerError):
+        await llm.create_message_async(client, model="m", max_tokens=10, messages=[])
+
+    assert client.calls == llm.MAX_RETRIES + 1
+
+
+def test_rate_limiter_spaces_requests():
+    """Test that requests beyond the bucket wait for it to refill"""
+    limiter = llm.RateLimiter(requests_per_minute=60)
+
+    waits = [limiter.reserve(0) for _ in range(62)]
+
+    assert waits[:60] == [0.0] * 60
+    assert waits[60] == pytest.approx(1.0, abs=0.1)
+    assert waits[61] == pytest.approx(2.0, abs=0.1)
+
+
+def test_rate_limiter_tokens_per_minute():
+    """Test that token reservations are refunded once actual usage is known"""
+    limiter = llm.RateLimiter(tokens_per_minute=6000)
+
+    assert limiter.reserve(6000) == 0.0
+    assert limiter.reserve(3000) == pytest.approx(30.0, abs=0.1)
+    # The second request turned out to count no tokens (e.g. a prompt cache read)
+    limiter.settle(3000, 0)
+    assert limiter.reserve(3000) == pytest.approx(30.0, abs=0.1)
@@ -0,0 +1,256 @@
+import asyncio
+
+import pytest
+from citation_verifier import fetcher, main
+from citation_verifier.models import ClaimCitation, SourceContent, VerificationResult, Verdict
+
+
+def _claims(n):
+    return [
+        ClaimCitation(
+            claim_text=f"Claim {i}",
+            citation_url=f"https://example.com/{i}",
+            original_context=f"Claim {i}"
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    """Replace extraction, fetching and verification with in-memory fakes."""
+    state = {"in_flight": 0, "peak": 0, "claims": _claims(6), "fail": set()}
+
+    async def fake_fetch(url, *args, **kwargs):
+        await asyncio.sleep(0)
+        return SourceContent(url=url, content=f"content of {url}", fetch_status="success")
+
+    async def fake_verify(claim, source, **kwargs):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        # Later claims finish first to check ordering
+        await asyncio.sleep(0.01 * (10 - int(claim.claim_text.split()[-1])))
+        state["in_flight"] -= 1
+        if claim.claim_text in state["fail"]:
+            raise RuntimeError("LLM exploded")
+        return VerificationResult(
+            claim=claim, verdict=Verdict.SUPPORTED, confidence=0.9, explanation="ok"
+        )
+
+    monkeypatch.setattr(main, "load_document", lambda source: source)
+    monkeypatch.setattr(main, "extract_document", lambda source, *args: (state["claims"], []))
+    monkeypatch.setattr(fetcher, "fetch_source", fake_fetch)
+    monkeypatch.setattr(main, "verify_claim", fake_verify)
+    return state
+
+
+async def test_verify_document_preserves_claim_order(fake_pipeline):
+    """Test that results come back in document order"""
+    results = await main.verify_document("doc.md")
+
+    assert [r.claim.claim_text for r in results] == [f"Claim {i}" for i in range(6)]
+
+
+async def test_verify_document_respects_llm_limit(fake_pipeline):
+    """Test that concurrent LLM calls never exceed the configured limit"""
+    await main.verify_document("doc.md", max_concurrent_verifications=2)
+
+    assert fake_pipeline["peak"] == 2
+
+
+async def test_verify_document_isolates_failures(fake_pipeline):
+    """Test that one failing claim does not abort the batch"""
+    fake_pipeline["fail"] = {"Claim 3"}
+
+    results = await main.verify_document("doc.md")
+
+    assert len(results) == 6
+    assert results[3].verdict == Verdict.INCONCLUSIVE
+    assert "LLM exploded" in results[3].explanation
+    assert all(r.verdict == Verdict.SUPPORTED for i, r in enumerate(results) if i != 3)
+
+
+async def test_verify_document_invalid_limits():
+    """Test that non-positive concurrency limits are rejected"""
+    with pytest.raises(ValueError):
+        await main.verify_document("doc.md", max_concurrent_fetches=0)
+
+
+async def test_verify_document_groups_claims_by_source(fake_pipeline, monkeypatch):
+    """Test that claims citing the same URL share one fetch and one context pass"""
+    for claim in fake_pipeline["claims"]:
+        claim.citation_url = "https://example.com/shared"
+    batches = []
+
+    def fake_prepare(claims, source, use_rag=True):
+        batches.append([c.claim_text for c in claims])
+        return [None] * len(claims)
+
+    monkeypatch.setattr(main, "prepare_contexts", fake_prepare)
+
+    results = await main.verify_document("doc.md")
+
+    assert len(results) == 6
+    assert batches == [[f"Claim {i}" for i in range(6)]]
+
+
+async def test_verify_document_group_claims(fake_pipeline, monkeypatch):
+    """Test that grouped mode sends the claims of one source in one batch"""
+    for claim in fake_pipeline["claims"][:4]:
+        claim.citation_url = "https://example.com/shared"
+    batches = []
+
+    async def fake_verify_grouped(claims, source, **kwargs):
+        batches.append([c.claim_text for c in claims])
+        return [
+            VerificationResult(claim=c, verdict=Verdict.SUPPORTED, confidence=0.9, explanation="ok")
+            for c in claims
+        ]
+
+    monkeypatch.setattr(main, "verify_claims_grouped", fake_verify_grouped)
+
+    results = await main.verify_document("doc.md", group_claims=True)
+
+    assert [r.claim.claim_text for r in results] == [f"Claim {i}" for i in range(6)]
+    assert sorted(batches) == [["Claim 0", "Claim 1", "Claim 2", "Claim 3"], ["Claim 4"], ["Claim 5"]]
+
+
+async def test_verify_document_warms_prompt_cache(fake_pipeline, monkeypatch):
+    """Test that claims sharing a large source wait for the first call to cache it"""
+    from citation_verifier import verifier
+
+    for claim in fake_pipeline["claims"][:3]:
+        claim.citation_url = "https://example.com/large"
+    large = "x" * verifier.min_cacheable_chars(main.DEFAULT_MODEL)
+    events = []
+
+    async def fake_fetch(url, *args, **kwargs):
+        return SourceContent(url=url, content=large, fetch_status="success")
+
+    async def fake_verify(claim, source, **kwargs):
+        events.append(("start", claim.claim_text))
+        await asyncio.sleep(0.01)
+        events.append(("end", claim.claim_text))
+        return VerificationResult(claim=claim, verdict=Verdict.SUPPORTED, confidence=0.9, explanation="ok")
+
+    monkeypatch.setattr(fetcher, "fetch_source", fake_fetch)
+    monkeypatch.setattr(main, "verify_claim", fake_verify)
+
+    await main.verify_document("doc.md")
+
+    shared = [event for event in events if event[1] in {"Claim 0", "Claim 1", "Claim 2"}]
+    assert shared[:2] == [("start", "Claim 0"), ("end", "Claim 0")]
+
+
+async def test_verify_document_reports_progress(fake_pipeline):
+    """Test that progress goes from 0 to the number of claims"""
+    progress = []
+
+    await main.verify_document("doc.md", on_progress=lambda done, total: progress.append((done, total)))
+
+    assert progress[0] == (0, 6)
+    assert progress[-1] == (6, 6)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+
+
+async def test_verify_document_streams_results(fake_pipeline):
+    """Test that each result is handed over with its claim index as it completes"""
+    streamed = {}
+
+    results = await main.verify_document("doc.md", on_result=lambda i, result: streamed.setdefault(i, result))
+
+    assert sorted(streamed) == list(range(6))
+    assert [streamed[i] for i in range(6)] == results
+
+
+async def test_verify_batch_shares_sources_between_documents(fake_pipeline, monkeypatch):
+    """Test that a source cited by several documents is downloaded once"""
+    downloads = []
+
+    async def counting_fetch(url, *args, **kwargs):
+        downloads.append(url)
+        return SourceContent(url=url, content=f"content of {url}", fetch_status="success")
+
+    monkeypatch.setattr(fetcher, "fetch_source", counting_fetch)
+
+    items = await main.verify_batch(["a.md", "b.md", "c.md"], max_concurrent_documents=2)
+
+    assert [item.source for item in items] == ["a.md", "b.md", "c.md"]
+    assert all(len(item.run.results) == 6 for item in items)
+    assert sorted(downloads) == sorted(f"https://example.com/{i}" for i in range(6))
+
+
+async def test_verify_batch_isolates_failing_documents(fake_pipeline, monkeypatch):
+    """Test that one unreadable document does not stop the batch"""
+    def fake_extract(source, *args):
+        if source == "missing.md":
+            raise FileNotFoundError(f"File not found: {source}")
+        return fake_pipeline["claims"], []
+
+    monkeypatch.setattr(main, "extract_document", fake_extract)
+    done = []
+
+    items = await main.verify_batch(["a.md", "missing.md"], on_document=lambda item: done.append(item.source))
+
+    assert items[0].run is not None
+    assert items[1].run is None
+    assert items[1].error == "File not found: missing.md"
+    assert sorted(done) == ["a.md", "missing.md"]
+
+
+async def test_run_verification_does_not_record_sections_of_unverified_claims(fake_pipeline, monkeypatch):
+    """Test that the section of a claim whose source was unavailable is extracted again next time"""
+    for i, claim in enumerate(fake_pipeline["claims"]):
+        claim.section_hash = f"section-{i}"
+    monkeypatch.setattr(
+        main, "extract_document", lambda source, *args: (fake_pipeline["claims"], [f"section-{i}" for i in range(6)])
+    )
+
+    async def flaky_fetch(url, *args, **kwargs):
+        if url.endswith("/1"):
+            return SourceContent(url=url, fetch_status="timeout")
+        return SourceContent(url=url, content=f"content of {url}", fetch_status="success")
+
+    monkeypatch.setattr(fetcher, "fetch_source", flaky_fetch)
+
+    run = await main.run_verification("doc.md")
+
+    assert len(run.results) == 5
+    assert run.incremental_state()["sections"] == [f"section-{i}" for i in range(6) if i != 1]
+
+
+async def test_verify_document_without_rag_stops_downloads_early(fake_pipeline, monkeypatch):
+    """Test that sources are only partly downloaded when RAG is disabled"""
+    from citation_verifier.verifier import NO_RAG_FETCH_BYTES
+
+    limits = []
+
+    async def recording_fetch(url, *args, stop_after_bytes=None, **kwargs):
+        limits.append(stop_after_bytes)
+        return SourceContent(url=url, content=f"content of {url}", fetch_status="success")
+
+    monkeypatch.setattr(fetcher, "fetch_source", recording_fetch)
+
+    await main.verify_document("doc.md", use_rag=False)
+    await main.verify_document("doc.md", use_rag=True)
+
+    assert limits == [NO_RAG_FETCH_BYTES] * 6 + [None] * 6
+
+
+async def test_verify_document_does_not_wait_below_cacheable_length(fake_pipeline, monkeypatch):
+    """Test that claims sharing a source too short to be cached run concurrently"""
+    from citation_verifier import verifier
+
+    fake_pipeline["claims"] = _claims(3)
+    for claim in fake_pipeline["claims"]:
+        claim.citation_url = "https://example.com/medium"
+    medium = "x" * (verifier.min_cacheable_chars(main.DEFAULT_MODEL) - 1)
+
+    async def fake_fetch(url, *args, **kwargs):
+        return SourceContent(url=url, content=medium, fetch_status="success")
+
+    monkeypatch.setattr(fetcher, "fetch_source", fake_fetch)
+
+    await main.verify_document("doc.md")
+
+    assert fake_pipeline["peak"] == 3
@@ -118,3 +118,17 @@ def test_verification_result_confidence_validation():
             confidence=-0.5,
             explanation="Test"
         )
+
+
+def test_source_content_hash_follows_content():
+    """Test that content_hash is computed once and never stale after a change"""
+    source = SourceContent(url="https://example.com", content="first", fetch_status="success")
+    first = source.content_hash
+
+    assert source.content_hash is first
+    assert source.model_copy().content_hash == first
+    copy = source.model_copy(update={"content": "second"})
+    assert copy.content_hash != first
+    source.content = "second"
+    assert source.content_hash == copy.content_hash
+    assert SourceContent(url="https://example.com").content_hash is None
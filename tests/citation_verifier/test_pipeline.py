@@ -48,3 +48,52 @@ def test_process_document_pdf_not_implemented():
     finally:
         if test_file.exists():
             test_file.unlink()
+
+
+def test_process_document_markdown_skips_llm(tmp_path, monkeypatch):
+    """Test that fully referenced Markdown is extracted without the LLM"""
+    from citation_verifier import pipeline
+
+    test_file = tmp_path / "doc.md"
+    test_file.write_text(
+        "# Report\n\nPython is popular [1].\n\n[1]: https://www.python.org/about/\n"
+    )
+
+    def fail(*args, **kwargs):
+        raise AssertionError("LLM extraction should not be called")
+
+    monkeypatch.setattr(pipeline, "extract_claims", fail)
+
+    claims = process_document(str(test_file))
+
+    assert len(claims) == 1
+    assert claims[0].citation_url == "https://www.python.org/about/"
+
+
+def test_process_document_markdown_falls_back_for_prose(tmp_path, monkeypatch):
+    """Test that only unresolved prose citations are sent to the LLM"""
+    from citation_verifier import pipeline
+    from citation_verifier.models import ClaimCitation
+
+    test_file = tmp_path / "doc.md"
+    test_file.write_text(
+        "Python is popular [1]. According to McKinsey (https://mckinsey.com), AI grows.\n\n"
+        "Selon une étude de Harvard, le télétravail augmente.\n\n"
+        "[1]: https://www.python.org/about/\n"
+    )
+    sent = []
+
+    def fake_extract(text, **kwargs):
+        sent.append(text)
+        return [ClaimCitation(
+            claim_text="Le télétravail augmente",
+            citation_ref="une étude de Harvard",
+            original_context=text
+        )]
+
+    monkeypatch.setattr(pipeline, "extract_claims", fake_extract)
+
+    claims = process_document(str(test_file))
+
+    assert sent == ["Selon une étude de Harvard, le télétravail augmente."]
+    assert [c.citation_url for c in claims] == ["https://www.python.org/about/", "https://mckinsey.com"]
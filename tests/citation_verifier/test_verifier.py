@@ -0,0 +1,235 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from citation_verifier import llm, verifier
+from citation_verifier.models import ClaimCitation, SourceContent, Verdict
+
+
+class FakeAsyncClient:
+    """Stand-in for AsyncAnthropic that answers with a fixed verdict."""
+
+    def __init__(self, verdict="supported", delay=0.05):
+        self.verdict = verdict
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.requests = []
+        self.messages = SimpleNamespace(create=self._create)
+
+    async def _create(self, **kwargs):
+        self.requests.append(kwargs)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        payload = {
+            "verdict": self.verdict,
+            "confidence": 0.9,
+            "explanation": "The source says so",
+            "source_quote": "quote",
+        }
+        usage = SimpleNamespace(
+            input_tokens=20, output_tokens=50, cache_creation_input_tokens=0, cache_read_input_tokens=1000
+        )
+        return SimpleNamespace(content=[SimpleNamespace(text=json.dumps(payload))], usage=usage)
+
+
+def _prompt(request):
+    return "\n".join(block["text"] for block in request["messages"][0]["content"])
+
+
+def _claim(text="Python is a programming language"):
+    return ClaimCitation(
+        claim_text=text,
+        citation_url="https://www.python.org/",
+        original_context=text
+    )
+
+
+def _source(content="Python is a high-level programming language."):
+    return SourceContent(url="https://www.python.org/", content=content, fetch_status="success")
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client = FakeAsyncClient()
+    monkeypatch.setattr(verifier, "get_async_client", lambda: client)
+    return client
+
+
+async def test_verify_claim_parses_verdict(fake_client):
+    """Test that the LLM answer is turned into a VerificationResult"""
+    result = await verifier.verify_claim(_claim(), _source())
+
+    assert result.verdict == Verdict.SUPPORTED
+    assert result.confidence == 0.9
+    assert result.source_quote == "quote"
+
+
+async def test_verify_claim_source_unavailable(fake_client):
+    """Test that unavailable sources skip the LLM call"""
+    source = SourceContent(url="https://www.python.org/", fetch_status="timeout")
+
+    result = await verifier.verify_claim(_claim(), source)
+
+    assert result.verdict == Verdict.SOURCE_UNAVAILABLE
+    assert fake_client.requests == []
+
+
+async def test_verify_claim_does_not_block_event_loop(fake_client):
+    """Test that concurrent verifications are in flight at the same time"""
+    await asyncio.gather(*(verifier.verify_claim(_claim(), _source()) for _ in range(4)))
+
+    assert fake_client.peak == 4
+
+
+async def test_get_async_client_is_shared(monkeypatch):
+    """Test that one async client is reused within an event loop"""
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+
+    assert llm.get_async_client() is llm.get_async_client()
+
+
+async def test_verify_claim_reuses_cached_verdict(fake_client, tmp_path):
+    """Test that an unchanged claim/source pair is verified only once"""
+    from citation_verifier.cache import VerdictCache
+
+    cache = VerdictCache(str(tmp_path))
+    first = await verifier.verify_claim(_claim(), _source(), verdict_cache=cache)
+    # Same claim modulo case and whitespace, fresh process
+    second = await verifier.verify_claim(
+        _claim("python is  a programming language."), _source(), verdict_cache=VerdictCache(str(tmp_path))
+    )
+
+    assert len(fake_client.requests) == 1
+    assert second.verdict == first.verdict
+    assert second.claim.claim_text == "python is  a programming language."
+
+
+async def test_verify_claim_cache_misses_when_source_changes(fake_client, tmp_path):
+    """Test that a changed source or model triggers a new verification"""
+    from citation_verifier.cache import VerdictCache
+
+    cache = VerdictCache(str(tmp_path))
+    await verifier.verify_claim(_claim(), _source(), verdict_cache=cache)
+    await verifier.verify_claim(_claim(), _source("Python was created by Guido."), verdict_cache=cache)
+    await verifier.verify_claim(_claim(), _source(), model="other-model", verdict_cache=cache)
+
+    assert len(fake_client.requests) == 3
+
+
+class FakeGroupedClient:
+    """Stand-in for AsyncAnthropic that answers grouped prompts with a scripted reply."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.requests = []
+        self.messages = SimpleNamespace(create=self._create)
+
+    async def _create(self, **kwargs):
+        self.requests.append(kwargs)
+        prompt = _prompt(kwargs)
+        if "AFFIRMATIONS À VÉRIFIER" in prompt:
+            text = self.reply
+        else:
+            text = json.dumps({"verdict": "partial", "confidence": 0.5, "explanation": "single", "source_quote": None})
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+
+def _grouped_reply(*ids):
+    return json.dumps({"results": [
+        {"id": n, "verdict": "supported", "confidence": 0.8, "explanation": f"claim {n}", "source_quote": None}
+        for n in ids
+    ]})
+
+
+async def test_verify_claims_grouped_single_call(monkeypatch):
+    """Test that claims citing one source are verified with one request"""
+    client = FakeGroupedClient(_grouped_reply(2, 1, 3))
+    monkeypatch.setattr(verifier, "get_async_client", lambda: client)
+    claims = [_claim(f"Claim {n}") for n in range(3)]
+
+    results = await verifier.verify_claims_grouped(claims, _source())
+
+    assert len(client.requests) == 1
+    prompt = _prompt(client.requests[0])
+    assert prompt.count("Python is a high-level programming language.") == 1
+    assert "1. Claim 0\n2. Claim 1\n3. Claim 2" in prompt
+    assert [r.claim.claim_text for r in results] == ["Claim 0", "Claim 1", "Claim 2"]
+    assert [r.explanation for r in results] == ["claim 1", "claim 2", "claim 3"]
+
+
+async def test_verify_claims_grouped_falls_back_on_bad_answer(monkeypatch):
+    """Test that an unparseable grouped answer falls back to per-claim calls"""
+    client = FakeGroupedClient("Sorry, here are the verdicts: ...")
+    monkeypatch.setattr(verifier, "get_async_client", lambda: client)
+
+    results = await verifier.verify_claims_grouped([_claim("A"), _claim("B")], _source())
+
+    assert len(client.requests) == 3
+    assert all(r.verdict == Verdict.PARTIAL for r in results)
+
+
+async def test_verify_claims_grouped_retries_missing_claims(monkeypatch):
+    """Test that only claims missing from the grouped answer are verified again"""
+    client = FakeGroupedClient(_grouped_reply(1, 3))
+    monkeypatch.setattr(verifier, "get_async_client", lambda: client)
+
+    results = await verifier.verify_claims_grouped([_claim("A"), _claim("B"), _claim("C")], _source())
+
+    assert len(client.requests) == 2
+    assert [r.verdict for r in results] == [Verdict.SUPPORTED, Verdict.PARTIAL, Verdict.SUPPORTED]
+
+
+async def test_verify_claim_source_is_cacheable_prefix(fake_client):
+    """Test that the source block comes first and is marked for prompt caching"""
+    await verifier.verify_claim(_claim(), _source())
+
+    source_block, claim_block = fake_client.requests[0]["messages"][0]["content"]
+    assert "Python is a high-level programming language." in source_block["text"]
+    assert source_block["cache_control"] == {"type": "ephemeral"}
+    assert "Python is a programming language" in claim_block["text"]
+    assert "cache_control" not in claim_block
+
+
+async def test_verify_claim_records_token_usage(fake_client):
+    """Test that cache reads and writes are accumulated over calls"""
+    from citation_verifier.llm import TokenUsage
+
+    usage = TokenUsage()
+    for _ in range(2):
+        await verifier.verify_claim(_claim(), _source(), usage=usage)
+
+    assert usage.requests == 2
+    assert usage.cache_read_input_tokens == 2000
+    assert usage.input_tokens == 40
+
+
+def test_prepare_contexts_skips_indexing_without_claims(monkeypatch):
+    """Test that a long source is not embedded when no claim needs it"""
+    import analyzers.retriever
+
+    def fail(*args, **kwargs):
+        raise AssertionError("source should not be indexed")
+
+    monkeypatch.setattr(analyzers.retriever, "get_relevant_contexts", fail)
+    source = SourceContent(url="https://example.com", content="x" * (verifier.MAX_SOURCE_CHARS + 1), fetch_status="success")
+
+    assert verifier.prepare_contexts([], source) == []
+
+
+async def test_verify_claim_prepares_context_off_the_event_loop(fake_client, monkeypatch):
+    """Test that the context of a single claim is computed through the worker pool"""
+    calls = []
+
+    async def fake_run_cpu_bound(func, *args):
+        calls.append(func)
+        return func(*args)
+
+    monkeypatch.setattr(verifier, "run_cpu_bound", fake_run_cpu_bound)
+
+    await verifier.verify_claim(_claim(), _source())
+
+    assert calls == [verifier.prepare_contexts]
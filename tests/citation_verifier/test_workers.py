@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from citation_verifier import workers
+from citation_verifier.pipeline import LoadedDocument, load_document
+
+
+def _pid(_):
+    return os.getpid()
+
+
+@pytest.fixture
+def reset_workers():
+    yield
+    workers.configure_workers(0)
+
+
+async def test_run_cpu_bound_uses_threads_by_default(reset_workers):
+    """Test that CPU-bound stages stay in this process when workers are disabled"""
+    workers.configure_workers(0)
+
+    assert workers.get_worker_pool() is None
+    assert await workers.run_cpu_bound(_pid, None) == os.getpid()
+
+
+async def test_run_cpu_bound_uses_worker_processes(reset_workers):
+    """Test that CPU-bound stages run in another process when workers are enabled"""
+    workers.configure_workers(1)
+
+    assert await workers.run_cpu_bound(_pid, None) != os.getpid()
+    pool = workers.get_worker_pool()
+    assert workers.get_worker_pool() is pool
+
+    workers.shutdown_workers()
+    assert workers._pool is None
+
+
+def test_configure_workers_rejects_negative():
+    """Test that a negative number of workers is rejected"""
+    with pytest.raises(ValueError):
+        workers.configure_workers(-1)
+
+
+async def test_load_document_in_worker(tmp_path, reset_workers):
+    """Test that a parsed document comes back from a worker process"""
+    document = tmp_path / "doc.md"
+    document.write_text("# Title\n\nPython was released in 1991 [1].\n\n[1]: https://www.python.org/\n")
+    workers.configure_workers(1)
+
+    loaded = await workers.run_cpu_bound(load_document, str(document))
+
+    assert isinstance(loaded, LoadedDocument)
+    assert loaded == load_document(str(document))
+    assert "Python was released in 1991" in loaded.text
+
+
+async def test_pdf_pages_extracted_in_workers(tmp_path, reset_workers, monkeypatch):
+    """Test that a PDF is parsed page by page in the worker processes"""
+    import fitz
+    from parsers import pdf
+
+    path = tmp_path / "doc.pdf"
+    doc = fitz.open()
+    for i in range(1, 6):
+        doc.new_page().insert_text((72, 72), f"Page {i}")
+    doc.save(str(path))
+    doc.close()
+    monkeypatch.setattr(pdf, "PAGES_PER_TASK", 2)
+    workers.configure_workers(2)
+
+    loaded = load_document(str(path), workers.get_worker_pool())
+
+    assert len(loaded.page_offsets) == 5
+    assert loaded == load_document(str(path))
@@ -1,5 +1,10 @@
+import json
+import re
+from types import SimpleNamespace
+
 import pytest
-from extractors.claim_extractor import extract_claims
+from extractors import claim_extractor
+from extractors.claim_extractor import extract_claims, split_into_segments
 from citation_verifier.models import ClaimCitation
 
 
@@ -34,3 +39,80 @@ def test_extract_claims_no_citations():
 
     # This would require mocking to avoid API calls
     pytest.skip("Requires mocking the Anthropic API")
+
+
+class FakeClient:
+    """Sync Anthropic stand-in returning one claim per '[n]' marker in the prompt."""
+
+    def __init__(self):
+        self.prompts = []
+        self.messages = SimpleNamespace(create=self._create)
+
+    def _create(self, **kwargs):
+        prompt = kwargs["messages"][0]["content"]
+        self.prompts.append(prompt)
+        document = prompt.split("DOCUMENT:", 1)[1]
+        claims = [
+            {
+                "claim_text": f"Fact {n}",
+                "citation_ref": f"[{n}]",
+                "original_context": f"Fact {n} [{n}]",
+            }
+            for n in sorted(set(re.findall(r"Fact (\d+) \[", document)), key=int)
+        ]
+        return SimpleNamespace(content=[SimpleNamespace(text=json.dumps({"claims": claims}))])
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(claim_extractor, "get_client", lambda: client)
+    return client
+
+
+def _long_document(paragraphs=60):
+    filler = "Lorem ipsum dolor sit amet. " * 12
+    return "\n\n".join(f"{filler}Fact {n} [{n}] is stated here." for n in range(1, paragraphs + 1))
+
+
+def test_extract_claims_short_document_single_call(fake_client):
+    """Test that short documents are extracted in one call"""
+    claims = extract_claims("Fact 1 [1] is stated here.")
+
+    assert len(fake_client.prompts) == 1
+    assert [c.claim_text for c in claims] == ["Fact 1"]
+
+
+def test_extract_claims_long_document_full_coverage(fake_client):
+    """Test that claims past 15,000 characters are extracted, without duplicates"""
+    document = _long_document()
+    assert len(document) > 15000
+
+    claims = extract_claims(document)
+
+    assert len(fake_client.prompts) > 1
+    assert [c.claim_text for c in claims] == [f"Fact {n}" for n in range(1, 61)]
+
+
+def test_split_into_segments_overlaps_boundaries():
+    """Test that each segment starts with the end of the previous one"""
+    segments = split_into_segments(_long_document(), segment_chars=5000, overlap_chars=800)
+
+    assert len(segments) > 1
+    assert all(len(s) <= 5000 + 800 + 2 for s in segments)
+    for previous, segment in zip(segments, segments[1:]):
+        assert segment.split("\n\n", 1)[0] in previous
+
+
+def test_extract_claims_uses_cache(fake_client, tmp_path):
+    """Test that an unchanged document is not sent to the LLM again"""
+    from citation_verifier.cache import ResultCache
+
+    document = _long_document()
+    first = extract_claims(document, cache=ResultCache(str(tmp_path), "extractions"))
+    calls = len(fake_client.prompts)
+
+    second = extract_claims(document, cache=ResultCache(str(tmp_path), "extractions"))
+
+    assert len(fake_client.prompts) == calls
+    assert second == first
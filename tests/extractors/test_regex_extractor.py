@@ -0,0 +1,130 @@
+from extractors.regex_extractor import extract_marked_claims
+
+
+REFERENCES = {
+    "[1]": "https://www.mckinsey.com/ai-report",
+    "[2]": "https://github.com/features",
+}
+
+
+def test_extract_marked_claims_resolves_markers():
+    """Test that [n] markers are paired with the reference list"""
+    document = """# AI Report
+
+According to a McKinsey study, 85% of companies use AI [1]. Developers prefer GitHub [2].
+
+[1]: https://www.mckinsey.com/ai-report
+[2]: https://github.com/features
+"""
+    claims, remaining = extract_marked_claims(document, REFERENCES)
+
+    assert remaining == ""
+    assert [c.citation_url for c in claims] == [REFERENCES["[1]"], REFERENCES["[2]"]]
+    assert claims[0].claim_text == "According to a McKinsey study, 85% of companies use AI."
+    assert claims[0].citation_ref == "[1]"
+    assert claims[0].original_context.endswith("[1].")
+
+
+def test_extract_marked_claims_inline_links():
+    """Test that inline Markdown links and bare URLs become claims"""
+    document = (
+        "Python is [very popular](https://www.python.org/about/).\n\n"
+        "Developers are 55% more productive (https://arxiv.org/abs/2302.06590)."
+    )
+    claims, remaining = extract_marked_claims(document, {})
+
+    assert remaining == ""
+    assert claims[0].claim_text == "Python is very popular."
+    assert claims[0].citation_url == "https://www.python.org/about/"
+    assert claims[1].citation_url == "https://arxiv.org/abs/2302.06590"
+
+
+def test_extract_marked_claims_leaves_prose_citations_for_llm():
+    """Test that unresolved prose citations and unknown markers are returned"""
+    document = (
+        "This sentence has no citation. According to Gartner, AI spending doubled.\n\n"
+        "An unknown reference [9] is cited here."
+    )
+    claims, remaining = extract_marked_claims(document, REFERENCES)
+
+    assert claims == []
+    assert "According to Gartner" in remaining
+    assert "[9]" in remaining
+    assert "no citation" not in remaining
+
+
+def test_extract_marked_claims_grouped_markers():
+    """Test that lists and ranges of references become one claim per source"""
+    references = {f"[{i}]": f"https://example.com/{i}" for i in range(1, 4)}
+    document = "Python is popular [1, 2].\n\nRust is fast [1-3].\n\nGo is simple [2–3]."
+
+    claims, remaining = extract_marked_claims(document, references)
+
+    assert remaining == ""
+    assert [(c.claim_text, c.citation_ref) for c in claims] == [
+        ("Python is popular.", "[1]"), ("Python is popular.", "[2]"),
+        ("Rust is fast.", "[1]"), ("Rust is fast.", "[2]"), ("Rust is fast.", "[3]"),
+        ("Go is simple.", "[2]"), ("Go is simple.", "[3]"),
+    ]
+
+
+def test_extract_marked_claims_sends_unparsed_markers_to_llm():
+    """Test that a sentence with a marker that cannot be parsed is not lost"""
+    claims, remaining = extract_marked_claims("Python is popular [1a]. Rust is fast [3-1].", REFERENCES)
+
+    assert claims == []
+    assert "Python is popular [1a]." in remaining
+    assert "Rust is fast [3-1]." in remaining
+
+
+def test_extract_marked_claims_keeps_abbreviations_in_sentence():
+    """Test that periods of abbreviations and initials do not cut the claim"""
+    document = "Also e.g. the U.S. economy grew 3% [1]. Fig. 2 shows growth [2]. Smith et al. agree [1]."
+
+    claims, remaining = extract_marked_claims(document, REFERENCES)
+
+    assert remaining == ""
+    assert [c.claim_text for c in claims] == [
+        "Also e.g. the U.S. economy grew 3%.", "Fig. 2 shows growth.", "Smith et al. agree.",
+    ]
+
+
+def test_extract_marked_claims_strips_reference_definitions_with_titles():
+    """Test that reference definitions carrying a title are not taken for claims"""
+    document = (
+        "Python is popular [1].\n\n"
+        '[1]: https://www.python.org/about/ "About Python"\n'
+        "[2]: https://github.com/features 'GitHub'\n"
+    )
+    claims, remaining = extract_marked_claims(document, {"[1]": "https://www.python.org/about/"})
+
+    assert remaining == ""
+    assert [c.claim_text for c in claims] == ["Python is popular."]
+
+
+def test_extract_marked_claims_skips_images():
+    """Test that Markdown images are neither claims nor citations"""
+    document = (
+        "![Python logo](https://www.python.org/static/logo.png)\n\n"
+        "Python is popular ![chart](https://example.com/chart.png) [1]."
+    )
+    claims, remaining = extract_marked_claims(document, REFERENCES)
+
+    assert remaining == ""
+    assert [(c.claim_text, c.citation_url) for c in claims] == [("Python is popular.", REFERENCES["[1]"])]
+
+
+def test_extract_marked_claims_skips_sentences_without_text():
+    """Test that bare links, markers and link-only list items are not claims"""
+    document = (
+        "## Further reading\n\n"
+        "- [Python docs](https://docs.python.org/)\n"
+        "- [GitHub](https://github.com/features).\n\n"
+        "https://www.python.org/\n\n"
+        "[1]\n\n"
+        "Python is [very popular](https://www.python.org/about/)."
+    )
+    claims, remaining = extract_marked_claims(document, REFERENCES)
+
+    assert remaining == ""
+    assert [c.claim_text for c in claims] == ["Python is very popular."]
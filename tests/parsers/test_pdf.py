@@ -1,6 +1,19 @@
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from parsers.pdf import parse_pdf
+import fitz
+from parsers import pdf
+from parsers.pdf import iter_pdf_pages, parse_pdf
+
+
+def _make_pdf(path, pages):
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
 
 
 def test_parse_pdf_file_not_found():
@@ -9,14 +22,142 @@ def test_parse_pdf_file_not_found():
         parse_pdf("nonexistent_file.pdf")
 
 
-def test_parse_pdf_structure():
+def test_parse_pdf_structure(tmp_path):
     """Test that parse_pdf returns correct structure"""
-    # This test requires a real PDF file
-    # For now, we just test the structure with a mock
-    pytest.skip("Requires a test PDF file")
+    path = _make_pdf(tmp_path / "doc.pdf", ["First page", "Second page", "Third page"])
+
+    doc = parse_pdf(path)
+
+    assert doc.page_count == 3
+    assert doc.source_path == str(Path(path).absolute())
+    assert len(doc.page_offsets) == 3
+    assert doc.page_at(doc.text.index("First")) == 1
+    assert doc.page_at(doc.text.index("Third")) == 3
 
 
-def test_parse_pdf_extracts_references():
+def test_parse_pdf_extracts_references(tmp_path):
     """Test that PDF parsing extracts reference patterns"""
-    # This would require a test PDF with references
-    pytest.skip("Requires a test PDF file with references")
+    path = _make_pdf(tmp_path / "refs.pdf", [
+        "Python was released in 1991 [1].",
+        "[1] https://www.python.org/about/",
+    ])
+
+    doc = parse_pdf(path)
+
+    assert doc.references == {"[1]": "https://www.python.org/about/"}
+
+
+def test_parse_pdf_page_range(tmp_path):
+    """Test that only the requested pages are extracted"""
+    path = _make_pdf(tmp_path / "doc.pdf", [f"Page {i}" for i in range(1, 6)])
+
+    doc = parse_pdf(path, first_page=2, last_page=3)
+
+    assert doc.page_count == 2
+    assert "Page 1" not in doc.text and "Page 4" not in doc.text
+    assert doc.page_at(doc.text.index("Page 3")) == 3
+
+
+def test_iter_pdf_pages_with_executor(tmp_path, monkeypatch):
+    """Test that pages extracted in batches come back in order"""
+    monkeypatch.setattr(pdf, "PAGES_PER_TASK", 2)
+    path = _make_pdf(tmp_path / "doc.pdf", [f"Page {i}" for i in range(1, 8)])
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        pages = list(iter_pdf_pages(path, executor=executor))
+
+    assert [page.number for page in pages] == list(range(1, 8))
+    assert [page.text.strip() for page in pages] == [f"Page {i}" for i in range(1, 8)]
+
+
+def test_references_only_from_bibliography(tmp_path):
+    """Test that [n] lines before the reference heading are not read as references"""
+    path = _make_pdf(tmp_path / "refs.pdf", [
+        "[9] https://not-a-reference.example/",
+        "References\n[1] https://www.python.org/about/",
+    ])
+
+    assert parse_pdf(path).references == {"[1]": "https://www.python.org/about/"}
+
+
+def test_references_wrapped_urls_and_dois(tmp_path):
+    """Test that URLs cut over two lines are joined back and DOIs become URLs"""
+    path = _make_pdf(tmp_path / "refs.pdf", [
+        "Bibliography\n"
+        "[1] Report, https://example.com/a-very-\nlong/path.html accessed 2024.\n"
+        "[2] Smith, J. Paper. doi:10.1000/xyz123.\n"
+        "[3] Page, https://example.com/page\nRetrieved 2024."
+    ])
+
+    assert parse_pdf(path).references == {
+        "[1]": "https://example.com/a-very-long/path.html",
+        "[2]": "https://doi.org/10.1000/xyz123",
+        "[3]": "https://example.com/page",
+    }
+
+
+def test_references_from_link_annotations(tmp_path):
+    """Test that a link annotation gives the URL of an entry showing none"""
+    path = tmp_path / "links.pdf"
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "References\n[1] Python website.\n[2] Rust website.")
+    words = {word[4]: fitz.Rect(word[:4]) for word in page.get_text("words")}
+    page.insert_link({"kind": fitz.LINK_URI, "from": words["Python"], "uri": "https://www.python.org/"})
+    page.insert_link({"kind": fitz.LINK_URI, "from": words["Rust"], "uri": "https://www.rust-lang.org/"})
+    doc.save(str(path))
+    doc.close()
+
+    assert parse_pdf(str(path)).references == {
+        "[1]": "https://www.python.org/",
+        "[2]": "https://www.rust-lang.org/",
+    }
+
+
+def test_references_before_notes_appendix(tmp_path):
+    """Test that a heading after the bibliography without entries does not hide it"""
+    path = _make_pdf(tmp_path / "appendix.pdf", [
+        "Python was released in 1991 [1]. Rust is fast [2].",
+        "References\n[1] https://www.python.org/about/\n[2] https://www.rust-lang.org/",
+        "Notes\nThe survey was run in 2023.",
+    ])
+
+    assert parse_pdf(path).references == {
+        "[1]": "https://www.python.org/about/",
+        "[2]": "https://www.rust-lang.org/",
+    }
+
+
+@pytest.mark.parametrize("heading", ["References\n", ""])
+def test_body_links_not_credited_to_entries(tmp_path, heading):
+    """Test that a link in the body text, after an inline [n], does not replace the entry URL"""
+    path = tmp_path / "body.pdf"
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Revenue grew 40% [1] in 2023. Visit our sponsor site")
+    page.insert_text((72, 200), heading + "[1] https://correct.example/report")
+    words = page.get_text("words")
+    sponsor = [fitz.Rect(word[:4]) for word in words if word[4] in ("sponsor", "site")]
+    page.insert_link({"kind": fitz.LINK_URI, "from": sponsor[0] | sponsor[1], "uri": "https://sponsor.example/"})
+    doc.save(str(path))
+    doc.close()
+
+    assert parse_pdf(str(path)).references == {"[1]": "https://correct.example/report"}
+
+
+def test_appendix_links_not_credited_to_last_entry(tmp_path):
+    """Test that links on pages after the last entry are not given to it"""
+    path = tmp_path / "appendix-links.pdf"
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "References\n[1] Python website.\n[2] Rust website.")
+    words = {word[4]: fitz.Rect(word[:4]) for word in page.get_text("words")}
+    page.insert_link({"kind": fitz.LINK_URI, "from": words["Python"], "uri": "https://www.python.org/"})
+    appendix = doc.new_page()
+    appendix.insert_text((72, 72), "Appendix\nSee the dataset online.")
+    words = {word[4]: fitz.Rect(word[:4]) for word in appendix.get_text("words")}
+    appendix.insert_link({"kind": fitz.LINK_URI, "from": words["dataset"], "uri": "https://data.example/"})
+    doc.save(str(path))
+    doc.close()
+
+    assert parse_pdf(str(path)).references == {"[1]": "https://www.python.org/"}